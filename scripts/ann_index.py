@@ -0,0 +1,263 @@
+"""
+ANN Index - Approximate Retrieval over LSA-Reduced Vectors
+Clusters dense LSA embeddings of the questions and scores only the clusters nearest to a query
+"""
+
+import copy
+import numpy as np
+from typing import Tuple
+import scipy.sparse as sp
+from scoring import top_k
+
+# scikit-learn is imported by the methods using it, so the scorer registry
+# of HealthIndex does not load it for models that never build an IVF index
+
+
+class IVFScorer:
+    """
+    Inverted-file (IVF) scorer over a truncated SVD (LSA) of the questions.
+
+    Building the index:
+
+    - the question-major TF-IDF matrix is reduced with a randomized
+      truncated SVD to ``n_components`` dense float32 dimensions and the
+      rows are L2-normalized, so dot products are LSA cosine similarities
+    - spherical k-means splits the reduced questions into ``n_lists``
+      clusters, and each cluster's vectors are stored contiguously
+
+    A query is projected the same way and compared with the cluster
+    centroids; only the ``n_probe`` closest clusters are scanned. With
+    ``rerank`` (the default) the ``shortlist`` best LSA candidates are then
+    re-scored with the exact TF-IDF cosine, so returned scores are the
+    ones ``DenseScorer`` would give and keep the meaning of the confidence
+    threshold; raising ``n_probe`` and ``shortlist`` trades speed for
+    recall, and probing every list with an unlimited shortlist finds the
+    exact top-k. Without ``rerank`` the LSA similarities themselves are
+    returned: questions sharing no literal term with the query can then
+    match through terms that co-occur in the corpus, but scores are on a
+    different scale than the confidence threshold assumes.
+
+    ``reindex`` re-uses the projection and clusters for a re-weighted or
+    slightly resized matrix, which costs one projection instead of a
+    training run.
+    """
+
+    # Reduced dimensions (clipped to the corpus size)
+    N_COMPONENTS = 128
+    # Probed clusters per query and LSA candidates re-scored exactly
+    N_PROBE = 8
+    SHORTLIST = 256
+    # Spherical k-means iterations, and rows assigned per matrix product
+    KMEANS_ITERATIONS = 10
+    ASSIGN_CHUNK = 16_384
+    # ``reindex`` keeps the trained projection and clusters until the number
+    # of questions differs from the trained one by more than this fraction
+    RETRAIN_DRIFT = 0.2
+
+    def __init__(self, matrix_t, n_components: int = None, n_lists: int = None,
+                 n_probe: int = None, shortlist: int = None, rerank: bool = True,
+                 seed: int = 0):
+        """
+        Args:
+            matrix_t: CSR matrix of shape (vocabulary, questions)
+            n_components: LSA dimensions (default: ``N_COMPONENTS``)
+            n_lists: Number of clusters (default: about sqrt(questions))
+            n_probe: Clusters scanned per query (default: ``N_PROBE``)
+            shortlist: LSA candidates re-scored exactly (default: ``SHORTLIST``)
+            rerank: Return exact TF-IDF scores (True) or LSA scores (False)
+            seed: Seed of the SVD and of the k-means initialization
+        """
+        from sklearn.preprocessing import normalize
+        from sklearn.utils.extmath import randomized_svd
+
+        self.options = {'n_components': n_components, 'n_lists': n_lists, 'n_probe': n_probe,
+                        'shortlist': shortlist, 'rerank': rerank, 'seed': seed}
+        self.n_probe = n_probe or self.N_PROBE
+        self.shortlist = shortlist or self.SHORTLIST
+        self.rerank = rerank
+        self._set_matrix(matrix_t)
+        n_docs = self.n_trained = self.n_docs
+
+        # Only terms that occur in some question contribute to the SVD; this
+        # keeps the projection small for hashed feature spaces
+        self.terms = np.flatnonzero(np.diff(matrix_t.indptr))
+        reduced_input = self.matrix[:, self.terms]
+        n_components = max(1, min(n_components or self.N_COMPONENTS, *reduced_input.shape))
+        rng = np.random.RandomState(seed)
+        u, s, vt = randomized_svd(reduced_input, n_components, random_state=rng)
+        self.components = vt.T.astype(np.float32)  # (terms, components)
+        embeddings = normalize(u * s).astype(np.float32)
+
+        n_lists = max(1, min(n_lists or int(round(np.sqrt(n_docs))), n_docs))
+        centroids, assignment = self._kmeans(embeddings, n_lists, rng)
+        self.centroids = centroids
+        self.n_lists = n_lists
+        self._store_lists(embeddings, assignment)
+
+    def _set_matrix(self, matrix_t):
+        """Keep the question-major rows used for exact re-scoring."""
+        self.n_docs = matrix_t.shape[1]
+        # Question-major rows with terms in vocabulary order: exact scores
+        # are accumulated in the same order as the dense product
+        self.matrix = matrix_t.T.tocsr()
+        self.matrix.sort_indices()
+
+    def _store_lists(self, embeddings: np.ndarray, assignment: np.ndarray):
+        """Store cluster members contiguously, in ascending index order."""
+        order = np.argsort(assignment, kind='stable')
+        self.list_docs = order
+        self.list_vectors = embeddings[order]
+        self.list_indptr = np.zeros(self.n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=self.n_lists), out=self.list_indptr[1:])
+
+    def reindex(self, matrix_t) -> 'IVFScorer':
+        """
+        Index a re-weighted or resized matrix with the trained projection and clusters.
+
+        Rows are projected with the existing LSA components and assigned to
+        the nearest existing centroid, skipping the SVD and k-means. Once the
+        number of questions drifts more than ``RETRAIN_DRIFT`` from the
+        trained one, a new scorer is trained instead.
+
+        Args:
+            matrix_t: CSR matrix of shape (vocabulary, questions) over the
+                same feature columns
+
+        Returns:
+            New IVFScorer; this one is left unchanged
+        """
+        n_docs = matrix_t.shape[1]
+        if abs(n_docs - self.n_trained) > self.RETRAIN_DRIFT * self.n_trained or n_docs < self.n_lists:
+            return IVFScorer(matrix_t, **self.options)
+        scorer = copy.copy(self)
+        scorer._set_matrix(matrix_t)
+        embeddings = scorer.project(scorer.matrix)
+        scorer._store_lists(embeddings, scorer._assign(embeddings, scorer.centroids))
+        return scorer
+
+    def _kmeans(self, embeddings: np.ndarray, n_lists: int,
+                rng: np.random.RandomState) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Spherical k-means (cosine distance) on L2-normalized rows.
+
+        Returns:
+            Tuple of (normalized centroids, cluster of every row)
+        """
+        from sklearn.preprocessing import normalize
+
+        centroids = embeddings[rng.choice(len(embeddings), n_lists, replace=False)]
+        assignment = self._assign(embeddings, centroids)
+        for _ in range(self.KMEANS_ITERATIONS):
+            members = sp.csr_matrix((np.ones(len(assignment), dtype=np.float32),
+                                     (assignment, np.arange(len(assignment)))),
+                                    shape=(n_lists, len(assignment)))
+            sums = members @ embeddings
+            # Empty clusters keep their previous centroid
+            filled = np.bincount(assignment, minlength=n_lists) > 0
+            centroids[filled] = normalize(sums[filled])
+            new_assignment = self._assign(embeddings, centroids)
+            if np.array_equal(new_assignment, assignment):
+                break
+            assignment = new_assignment
+        return centroids, assignment
+
+    def _assign(self, embeddings: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Nearest centroid of every row, computed in bounded chunks."""
+        assignment = np.empty(len(embeddings), dtype=np.intp)
+        for start in range(0, len(embeddings), self.ASSIGN_CHUNK):
+            chunk = embeddings[start:start + self.ASSIGN_CHUNK]
+            assignment[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignment
+
+    def project(self, query_matrix) -> np.ndarray:
+        """Reduce L2-normalized TF-IDF query rows to normalized LSA vectors."""
+        from sklearn.preprocessing import normalize
+
+        reduced = query_matrix.tocsr()[:, self.terms] @ self.components
+        return normalize(np.asarray(reduced, dtype=np.float32))
+
+    def top_k(self, query_matrix, k: int, n_probe: int = None,
+              shortlist: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Select (approximately) the best ``k`` questions for every query row.
+
+        Args:
+            query_matrix: L2-normalized sparse query matrix (n_queries x vocab)
+            k: Number of matches per query
+            n_probe: Clusters scanned per query (default: ``self.n_probe``)
+            shortlist: LSA candidates re-scored exactly (default: ``self.shortlist``)
+
+        Returns:
+            Tuple of (indices, scores) arrays of shape (n_queries, k)
+        """
+        k = max(0, min(k, self.n_docs))
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        shortlist = shortlist or self.shortlist
+        n_queries = query_matrix.shape[0]
+
+        query_matrix = query_matrix.tocsr()
+        query_matrix.sort_indices()
+        reduced = self.project(query_matrix)
+        probes, _ = top_k(reduced @ self.centroids.T, n_probe)
+        shortlists = [self._shortlist(reduced[row], probes[row], shortlist) for row in range(n_queries)]
+
+        if self.rerank:
+            # Exact cosine of every shortlisted question with its own query,
+            # computed for the whole batch with a few sparse operations
+            lengths = np.array([len(candidates) for candidates, _ in shortlists], dtype=np.intp)
+            candidates = np.concatenate([candidates for candidates, _ in shortlists])
+            owners = np.repeat(np.arange(n_queries), lengths)
+            exact = self._row_sums(self.matrix[candidates].multiply(query_matrix[owners]).tocsr())
+            offsets = np.concatenate([[0], np.cumsum(lengths)])
+            shortlists = [(candidates[offsets[row]:offsets[row + 1]], exact[offsets[row]:offsets[row + 1]])
+                          for row in range(n_queries)]
+
+        indices = np.empty((n_queries, k), dtype=np.intp)
+        scores = np.empty((n_queries, k))
+        for row, (candidates, candidate_scores) in enumerate(shortlists):
+            best, best_scores = top_k(candidate_scores, k)
+            indices[row], scores[row] = self._pad(candidates[best], best_scores, k)
+        return indices, scores
+
+    @staticmethod
+    def _row_sums(products) -> np.ndarray:
+        """
+        Sum each row of a CSR matrix left to right.
+
+        Adding the products one term at a time, in vocabulary order, rounds
+        exactly like the sparse matrix product of ``DenseScorer``.
+        """
+        products.sort_indices()
+        lengths = np.diff(products.indptr)
+        sums = np.zeros(products.shape[0], dtype=products.dtype)
+        for position in range(lengths.max(initial=0)):
+            rows = np.flatnonzero(lengths > position)
+            sums[rows] += products.data[products.indptr[rows] + position]
+        return sums
+
+    def _shortlist(self, reduced: np.ndarray, probes: np.ndarray,
+                   shortlist: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best LSA candidates of one query among the probed clusters.
+
+        Returns:
+            Tuple of (candidates in ascending index order, their LSA scores)
+        """
+        bounds = [(self.list_indptr[p], self.list_indptr[p + 1]) for p in probes]
+        candidates = np.concatenate([self.list_docs[s:e] for s, e in bounds])
+        lsa_scores = np.concatenate([self.list_vectors[s:e] @ reduced for s, e in bounds])
+        if self.rerank and len(candidates) > shortlist:
+            kept = np.argpartition(-lsa_scores, shortlist - 1)[:shortlist]
+            candidates, lsa_scores = candidates[kept], lsa_scores[kept]
+        # Ascending candidate order makes ties break towards the lower index
+        order = np.argsort(candidates)
+        return candidates[order], lsa_scores[order].astype(np.float64)
+
+    def _pad(self, indices: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Fill up to ``k`` results with the lowest unreturned indices at score 0."""
+        missing = k - len(indices)
+        if missing <= 0:
+            return indices, scores
+        pool = np.arange(min(self.n_docs, missing + len(indices)))
+        padding = np.setdiff1d(pool, indices)[:missing]
+        return np.concatenate([indices, padding]), np.concatenate([scores, np.zeros(missing)])
@@ -0,0 +1,1348 @@
+"""
+Benchmarks - Performance Measurements for the Health Chatbot
+Micro-benchmarks for the hot paths of query answering
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import pickle
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import scipy
+import sklearn
+from sklearn.preprocessing import normalize
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+from scoring import top_k
+from health_index import HealthIndex
+from health_chatbot import HealthChatbot
+from sharded_scorer import ShardedScorer
+from ann_index import IVFScorer
+from qa_store import QAStore
+from quantization import scale_queries
+
+
+def _best_time(func, repeat: int) -> float:
+    """Return the fastest of ``repeat`` runs of ``func`` in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _argsort_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Previous selection path: full descending sort, then slice."""
+    return np.argsort(scores)[::-1][:k]
+
+
+def _stable_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Reference order of ``top_k``: descending score, ties towards the lower index."""
+    return np.argsort(-scores, kind='stable')[:k]
+
+
+def benchmark_top_k(sizes: list, k: int = 3, repeat: int = 20, seed: int = 0) -> list:
+    """
+    Compare partial top-k selection against a full argsort.
+
+    Scores are sparse like real TF-IDF similarities: most questions share no
+    terms with the query and score exactly zero. ``same_scores`` checks the
+    selected scores against the full argsort; ``same_indices`` checks the
+    selected questions against a stable sort, since ``top_k`` breaks ties
+    towards the lower index where the old argsort left their order open.
+
+    Args:
+        sizes: Corpus sizes (number of Q&A pairs) to test
+        k: Number of matches selected per query
+        repeat: Runs per measurement (best run is reported)
+        seed: Random seed for the synthetic scores
+
+    Returns:
+        List of result dicts, one per corpus size
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+
+    for size in sizes:
+        scores = np.zeros(size)
+        hits = rng.choice(size, size=max(1, size // 100), replace=False)
+        # Two decimals, so large corpora also tie at the k-th score
+        scores[hits] = np.round(rng.random(len(hits)), 2)
+
+        argsort_s = _best_time(lambda: _argsort_top_k(scores, k), repeat)
+        top_k_s = _best_time(lambda: top_k(scores, k), repeat)
+
+        results.append({
+            'corpus_size': size,
+            'k': k,
+            'argsort_ms': argsort_s * 1000,
+            'top_k_ms': top_k_s * 1000,
+            'speedup': argsort_s / top_k_s,
+            'same_scores': bool(np.array_equal(scores[_argsort_top_k(scores, k)], top_k(scores, k)[1])),
+            'same_indices': bool(np.array_equal(_stable_top_k(scores, k), top_k(scores, k)[0])),
+        })
+
+    return results
+
+
+def make_synthetic_dataset(source_path: str, size: int, seed: int = 0) -> Dict:
+    """
+    Generate a synthetic dataset of ``size`` Q&A pairs from a real one.
+
+    Each synthetic question is a real question with a few words from the
+    answer texts appended, so vocabulary and term statistics stay realistic.
+
+    Args:
+        source_path: Dataset to sample from
+        size: Number of Q&A pairs to generate
+        seed: Random seed
+
+    Returns:
+        Dataset dict in the ``{"qa_pairs": [...]}`` format
+    """
+    with open(source_path, 'r', encoding='utf-8') as f:
+        source = json.load(f)['qa_pairs']
+    rng = random.Random(seed)
+    words = [w for qa in source for w in qa['answer'].lower().split() if w.isalpha()]
+
+    qa_pairs = []
+    for i in range(size):
+        base = source[i % len(source)] if i < len(source) else rng.choice(source)
+        question = base['question']
+        if i >= len(source):
+            question += ' ' + ' '.join(rng.choices(words, k=rng.randint(1, 4)))
+        qa_pairs.append(dict(base, id=i + 1, question=question))
+    return {'qa_pairs': qa_pairs}
+
+
+def write_synthetic_dataset(source_path: str, size: int, output_dir: str, seed: int = 0,
+                            jsonl: bool = False) -> str:
+    """Write a synthetic dataset (JSON, or JSONL if ``jsonl``) to ``output_dir`` and return its path."""
+    dataset = make_synthetic_dataset(source_path, size, seed)
+    path = Path(output_dir) / f"synthetic_{size}.{'jsonl' if jsonl else 'json'}"
+    with open(path, 'w', encoding='utf-8') as f:
+        if jsonl:
+            f.writelines(json.dumps(qa) + '\n' for qa in dataset['qa_pairs'])
+        else:
+            json.dump(dataset, f)
+    return str(path)
+
+
+def sample_queries(source_path: str, n: int, seed: int = 0) -> List[str]:
+    """
+    Build ``n`` test queries by perturbing the dataset's questions.
+
+    Questions get words dropped and words from other questions added, so the
+    set mixes exact, partial and low-confidence matches.
+    """
+    with open(source_path, 'r', encoding='utf-8') as f:
+        questions = [qa['question'] for qa in json.load(f)['qa_pairs']]
+    rng = random.Random(seed)
+    words = [w for q in questions for w in q.split()]
+
+    queries = []
+    for _ in range(n):
+        tokens = [w for w in rng.choice(questions).split() if rng.random() > 0.2]
+        tokens += rng.choices(words, k=rng.randint(0, 2))
+        queries.append(' '.join(tokens))
+    return queries
+
+
+# Speedup over one thread from which the concurrency benchmark reports
+# that threads scale throughput
+SCALING_SPEEDUP = 1.5
+
+
+def benchmark_concurrency(dataset_path: str, queries: List[str], thread_counts: List[int],
+                          batch_size: int = 64, scorer: str = 'dense',
+                          scorer_options: Dict[str, Dict] = None) -> List[Dict]:
+    """
+    Stress one shared HealthIndex from many threads.
+
+    For each thread count, queries are answered (a) in batches by one session
+    per task and (b) one by one through a single chatbot shared by all
+    threads. Both result sets must be identical to single-threaded
+    execution; throughput is reported for (a), with its speedup over the
+    first thread count. Most of a query holds the GIL, so the speedup stays
+    near 1x; processes (``server.py --processes``) are what scale.
+
+    Args:
+        dataset_path: Dataset to build the shared index from
+        queries: Queries to answer
+        thread_counts: Thread pool sizes to test
+        batch_size: Queries per batch task
+        scorer: Retrieval engine of every session
+        scorer_options: Constructor arguments of each scorer by name
+
+    Returns:
+        List of result dicts, one per thread count
+    """
+    index = HealthIndex.from_dataset(dataset_path, scorer_options=scorer_options)
+    reference = [HealthChatbot.from_index(index, scorer=scorer).answer_query(q) for q in queries]
+    chunks = [queries[i:i + batch_size] for i in range(0, len(queries), batch_size)]
+
+    def answer_chunk(chunk):
+        return HealthChatbot.from_index(index, scorer=scorer).batch_answer(chunk)
+
+    results = []
+    for threads in thread_counts:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            start = time.perf_counter()
+            batched = [r for rs in pool.map(answer_chunk, chunks) for r in rs]
+            elapsed = time.perf_counter() - start
+
+            shared = HealthChatbot.from_index(index, scorer=scorer)
+            shared.enable_cache(max_entries=max(1, len(queries) // 4))
+            one_by_one = list(pool.map(shared.answer_query, queries))
+
+        results.append({
+            'threads': threads,
+            'queries': len(queries),
+            'queries_per_s': len(queries) / elapsed,
+            'identical_batched': batched == reference,
+            'identical_shared_session': one_by_one == reference,
+            'history_entries': len(shared.conversation_history),
+        })
+
+    index.close()
+
+    base = results[0]['queries_per_s']
+    for r in results:
+        r['speedup'] = r['queries_per_s'] / base
+    return results
+
+
+def benchmark_sharded(dataset_path: str, queries: List[str], shard_counts: List[int],
+                      k: int = 3, batch_size: int = 256, repeat: int = 3) -> List[Dict]:
+    """
+    Compare multi-process sharded scoring against the single-process path.
+
+    Args:
+        dataset_path: Dataset to build the index from
+        queries: Queries to score
+        shard_counts: Numbers of shards (worker processes) to test
+        k: Number of matches per query
+        batch_size: Queries scored per call
+        repeat: Runs per measurement (best run is reported)
+
+    Returns:
+        List of result dicts, one per shard count
+    """
+    index = HealthIndex.from_dataset(dataset_path)
+    batches = [index.vectorize([q.lower() for q in queries[i:i + batch_size]])
+               for i in range(0, len(queries), batch_size)]
+
+    dense = index.scorer('dense')
+    reference = [dense.top_k(batch, k) for batch in batches]
+    dense_s = _best_time(lambda: [dense.top_k(batch, k) for batch in batches], repeat)
+
+    results = []
+    for shards in shard_counts:
+        scorer = ShardedScorer(index.tfidf_matrix_t, shards=shards)
+        try:
+            ranked = [scorer.top_k(batch, k) for batch in batches]
+            sharded_s = _best_time(lambda: [scorer.top_k(batch, k) for batch in batches], repeat)
+        finally:
+            scorer.close()
+
+        results.append({
+            'corpus_size': len(index.qa_pairs),
+            'shards': scorer.shards,
+            'queries': len(queries),
+            'dense_ms': dense_s * 1000,
+            'sharded_ms': sharded_s * 1000,
+            'speedup': dense_s / sharded_s,
+            'identical': all(np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1])
+                             for a, b in zip(reference, ranked)),
+        })
+
+    return results
+
+
+def benchmark_ann(dataset_path: str, queries: List[str], probe_counts: List[int],
+                  shortlists: List[int], k: int = 3, batch_size: int = 256,
+                  repeat: int = 3) -> List[Dict]:
+    """
+    Measure recall and speed of the IVF scorer against exact cosine similarity.
+
+    Recall@k is the share of the exact top-k matches (those with a
+    positive score) that the IVF scorer also returns in its top-k. Results
+    tied with the k-th exact score count as found: synthetic corpora hold
+    many equally scored near-duplicates, and the exact path picks among
+    them by index alone.
+
+    Args:
+        dataset_path: Dataset to build the index from
+        queries: Queries to score
+        probe_counts: Numbers of clusters probed per query to test
+        shortlists: Numbers of LSA candidates re-scored exactly to test
+        k: Number of matches per query
+        batch_size: Queries scored per call
+        repeat: Runs per measurement (best run is reported)
+
+    Returns:
+        List of result dicts, one per shortlist and probe count
+    """
+    index = HealthIndex.from_dataset(dataset_path)
+    batches = [index.vectorize([q.lower() for q in queries[i:i + batch_size]])
+               for i in range(0, len(queries), batch_size)]
+
+    dense = index.scorer('dense')
+    exact = [dense.top_k(batch, k) for batch in batches]
+    dense_s = _best_time(lambda: [dense.top_k(batch, k) for batch in batches], repeat)
+
+    start = time.perf_counter()
+    scorer = IVFScorer(index.tfidf_matrix_t)
+    build_s = time.perf_counter() - start
+
+    results = []
+    for shortlist in shortlists:
+        for n_probe in probe_counts:
+            ranked = [scorer.top_k(batch, k, n_probe, shortlist) for batch in batches]
+            ivf_s = _best_time(lambda: [scorer.top_k(batch, k, n_probe, shortlist) for batch in batches],
+                               repeat)
+
+            found = relevant = 0
+            for (_, exact_scores), (_, ivf_scores) in zip(exact, ranked):
+                for row in range(len(exact_scores)):
+                    targets = exact_scores[row][exact_scores[row] > 0]
+                    if len(targets):
+                        relevant += len(targets)
+                        found += min(len(targets), int((ivf_scores[row] >= targets[-1]).sum()))
+
+            results.append({
+                'corpus_size': len(index.qa_pairs),
+                'lists': scorer.n_lists,
+                'n_probe': min(n_probe, scorer.n_lists),
+                'shortlist': shortlist,
+                'queries': len(queries),
+                'build_s': build_s,
+                'dense_ms': dense_s * 1000,
+                'ivf_ms': ivf_s * 1000,
+                'speedup': dense_s / ivf_s,
+                f'recall_at_{k}': found / relevant if relevant else 1.0,
+            })
+
+    return results
+
+
+def _previous_keywords(query: str, qa_pair: Dict) -> List[str]:
+    """Previous keyword path: a second regex tokenization and a set built per match."""
+    words = re.findall(r'\b\w+\b', query.lower())
+    keywords = [w for w in words if w not in HealthChatbot.KEYWORD_STOP_WORDS and len(w) > 2]
+    qa_keywords = set(qa_pair['keywords'])
+    return [kw for kw in keywords if kw in qa_keywords]
+
+
+def benchmark_keywords(dataset_path: str, queries: List[str], repeat: int = 5) -> Dict:
+    """
+    Per-query cost of tokenizing, vectorizing and keyword matching.
+
+    The previous path tokenized every query twice (``vectorizer.transform``
+    and a regex for keywords) and built a keyword set of the best match per
+    request; the current path analyzes the query once, shares the tokens
+    and reads cached keyword sets. Queries are processed one at a time, as
+    ``answer_query`` does.
+
+    Args:
+        dataset_path: Dataset to build the index from
+        queries: Queries to process
+        repeat: Runs per measurement (best run is reported)
+
+    Returns:
+        Result dict with per-query microseconds of both paths
+    """
+    bot = _quiet(HealthChatbot, dataset_path)
+    index = bot.index
+    lowered = [q.lower().strip() for q in queries]
+    best = [int(i) for i in index.rank(index.vectorize(lowered), 1)[0][:, 0]]
+    qa_pairs = index.qa_pairs
+    records = [qa_pairs[i] for i in best]
+    n = len(queries)
+
+    def previous():
+        matrices = [normalize(index.vectorizer.transform([q])) for q in lowered]
+        matched = [_previous_keywords(q, qa) for q, qa in zip(lowered, records)]
+        return matrices, matched
+
+    def current():
+        matrices, matched = [], []
+        for q, i in zip(lowered, best):
+            analyzed = index.analyze([q])
+            matrices.append(index.vectorize_analyzed(analyzed))
+            keywords = bot._extract_keywords_from_query(analyzed[0].tokens)
+            matched.append(bot._get_matched_keywords(keywords, qa_pairs.keyword_set(i)))
+        return matrices, matched
+
+    previous_matrices, previous_matched = previous()
+    current_matrices, current_matched = current()
+    identical = previous_matched == current_matched and all(
+        np.array_equal(a.indptr, b.indptr) and np.array_equal(a.indices, b.indices)
+        and np.array_equal(a.data, b.data)
+        for a, b in zip(previous_matrices, current_matrices)
+    )
+
+    previous_keywords_s = _best_time(
+        lambda: [_previous_keywords(q, qa) for q, qa in zip(lowered, records)], repeat)
+    current_keywords_s = _best_time(
+        lambda: [bot._get_matched_keywords(bot._extract_keywords_from_query(a.tokens), qa_pairs.keyword_set(i))
+                 for a, i in zip(index.analyze(lowered), best)], repeat)
+    analyze_s = _best_time(lambda: index.analyze(lowered), repeat)
+    # Alternate the two paths so drifting machine load affects both alike
+    previous_s = current_s = float('inf')
+    for _ in range(repeat):
+        previous_s = min(previous_s, _best_time(previous, 1))
+        current_s = min(current_s, _best_time(current, 1))
+
+    return {
+        'queries': n,
+        # Keyword stage alone; the current path's tokens are produced once,
+        # for vectorization, so keyword matching reuses them for free
+        'previous_keywords_us': previous_keywords_s / n * 1e6,
+        'current_keywords_us': (current_keywords_s - analyze_s) / n * 1e6,
+        'previous_us': previous_s / n * 1e6,
+        'current_us': current_s / n * 1e6,
+        'saved_us': (previous_s - current_s) / n * 1e6,
+        'identical': identical,
+    }
+
+
+def _sklearn_vectorize(index: HealthIndex, queries: List[str]):
+    """Previous vectorization path: sklearn's ``transform`` plus re-normalization."""
+    return normalize(index.vectorizer.transform(queries))
+
+
+def benchmark_analyzer(dataset_path: str, queries: List[str], batch_size: int = 256,
+                       repeat: int = 5) -> List[Dict]:
+    """
+    Compare query vectorization through ``QueryAnalyzer`` with sklearn's ``transform``.
+
+    Both feature backends are measured one query per call (as
+    ``answer_query`` does) and in batches; the matrices must be identical.
+
+    Args:
+        dataset_path: Dataset to build the indices from
+        queries: Queries to vectorize
+        batch_size: Queries per call in the batched measurement
+        repeat: Runs per measurement (best run is reported)
+
+    Returns:
+        List of result dicts, one per feature backend
+    """
+    lowered = [q.lower() for q in queries]
+    batches = [lowered[i:i + batch_size] for i in range(0, len(lowered), batch_size)]
+    n = len(lowered)
+    results = []
+
+    for features in HealthIndex.FEATURES:
+        index = _quiet(HealthIndex.from_dataset, dataset_path, features)
+        identical = all(
+            np.array_equal(a.indptr, b.indptr) and np.array_equal(a.indices, b.indices)
+            and np.array_equal(a.data, b.data)
+            for a, b in ((_sklearn_vectorize(index, batch), index.vectorize(batch)) for batch in batches)
+        )
+        sklearn_s = _best_time(lambda: [_sklearn_vectorize(index, [q]) for q in lowered], repeat)
+        analyzer_s = _best_time(lambda: [index.vectorize([q]) for q in lowered], repeat)
+        sklearn_batch_s = _best_time(lambda: [_sklearn_vectorize(index, b) for b in batches], repeat)
+        analyzer_batch_s = _best_time(lambda: [index.vectorize(b) for b in batches], repeat)
+        analyze_s = _best_time(lambda: index.analyze(lowered), repeat)
+
+        results.append({
+            'features': features,
+            'queries': n,
+            'sklearn_us': sklearn_s / n * 1e6,
+            'analyzer_us': analyzer_s / n * 1e6,
+            'speedup': sklearn_s / analyzer_s,
+            'sklearn_batch_us': sklearn_batch_s / n * 1e6,
+            'analyzer_batch_us': analyzer_batch_s / n * 1e6,
+            'batch_speedup': sklearn_batch_s / analyzer_batch_s,
+            'analyze_us': analyze_s / n * 1e6,
+            'identical': identical,
+        })
+
+    return results
+
+
+def _traced_bytes(build) -> tuple:
+    """Return ``build()`` and the Python heap bytes it still holds afterwards."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_memory(source_path: str, sizes: List[int], seed: int = 0) -> List[Dict]:
+    """
+    Compare memory per Q&A pair of parsed JSON dicts and the columnar QAStore.
+
+    The dict baseline is what the index used to hold: the parsed records
+    plus a list of lowercased questions. Both layouts are also timed on
+    reading every answer, the access pattern of the response builder.
+
+    Args:
+        source_path: Dataset the synthetic corpora are generated from
+        sizes: Corpus sizes to measure
+        seed: Random seed for corpus generation
+
+    Returns:
+        List of result dicts, one per corpus size
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            dataset = write_synthetic_dataset(source_path, size, tmp, seed)
+
+            def load_dicts():
+                with open(dataset, 'r', encoding='utf-8') as f:
+                    qa_pairs = json.load(f)['qa_pairs']
+                return qa_pairs, [qa['question'].lower() for qa in qa_pairs]
+
+            (qa_pairs, _), dict_bytes = _traced_bytes(load_dicts)
+            store, store_bytes = _traced_bytes(lambda: QAStore.from_records(qa_pairs))
+            identical = all(a == b for a, b in zip(qa_pairs, store))
+
+            dict_s = _best_time(lambda: [qa['answer'] for qa in qa_pairs], 3)
+            store_s = _best_time(lambda: [qa['answer'] for qa in store], 3)
+
+            results.append({
+                'corpus_size': size,
+                'dict_bytes_per_pair': dict_bytes / size,
+                'store_bytes_per_pair': store_bytes / size,
+                'reduction': dict_bytes / store_bytes,
+                'dict_access_us': dict_s / size * 1e6,
+                'store_access_us': store_s / size * 1e6,
+                'identical': identical,
+            })
+            del qa_pairs, store
+    return results
+
+
+# Metrics where a larger value is better; all others (durations, memory,
+# score errors) are better when smaller
+HIGHER_IS_BETTER = ('_qps', '_reduction')
+
+# Metrics with a zero baseline (change rates, exact precisions' errors)
+# have no relative change; they regress when they move by more than this
+ABSOLUTE_TOLERANCE = 1e-6
+
+# Reduced precisions compared with float64 by the suite, and the distance
+# from the confidence threshold within which score errors are reported
+SUITE_PRECISIONS = ('float32', 'uint8')
+THRESHOLD_WINDOW = 0.05
+
+
+def _quiet(func, *args, **kwargs):
+    """Call ``func`` with its console output suppressed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def _run_fresh(setup: str, statement: str) -> Dict:
+    """
+    Run ``statement`` in a fresh interpreter after ``setup``.
+
+    Returns:
+        Dictionary with 'total_s' (setup plus statement), 'seconds'
+        (statement only), 'peak_rss_mb' (process high-water mark) and
+        'setup_rss_mb' (high-water mark after setup)
+    """
+    code = (
+        "import sys, time, io, contextlib, resource\n"
+        "def rss_mb():\n"
+        "    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+        "    return peak / (1024 ** 2 if sys.platform == 'darwin' else 1024)\n"
+        "start = time.perf_counter()\n"
+        f"sys.path.insert(0, {str(Path(__file__).resolve().parent)!r})\n"
+        f"{setup}\n"
+        "setup_rss, mid = rss_mb(), time.perf_counter()\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        f"    {statement}\n"
+        "end = time.perf_counter()\n"
+        "print(end - start, end - mid, rss_mb(), setup_rss)\n"
+    )
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    total_s, seconds, peak, setup_peak = map(float, output.stdout.strip().splitlines()[-1].split())
+    return {'total_s': total_s, 'seconds': seconds, 'peak_rss_mb': peak, 'setup_rss_mb': setup_peak}
+
+
+def _cold_init(dataset_path: str) -> Dict:
+    """Time imports plus ``HealthChatbot.__init__`` in a fresh interpreter, with peak RSS."""
+    return _run_fresh("from health_chatbot import HealthChatbot", f"HealthChatbot({dataset_path!r})")
+
+
+# Entry points timed by the startup benchmark; the serving and REPL ones
+# must never load the plotting stack
+STARTUP_ENTRY_POINTS = ('health_chatbot', 'interactive_chatbot', 'server', 'demo', 'main', 'visualization')
+SERVING_ENTRY_POINTS = ('health_chatbot', 'interactive_chatbot', 'server')
+PLOTTING_MODULES = ('matplotlib', 'seaborn')
+# Heavy packages reported when an entry point loads them
+HEAVY_MODULES = ('sklearn', 'pandas') + PLOTTING_MODULES
+# Fresh interpreter to first answer (import, artifact load, one query)
+FIRST_ANSWER_BUDGET_S = 1.0
+
+
+def _import_profile(module: str) -> Dict:
+    """
+    Import ``module`` in a fresh interpreter under ``python -X importtime``.
+
+    Returns:
+        Dictionary with 'import_ms' (cumulative import time of the module),
+        'loaded' (``HEAVY_MODULES`` it pulls in) and 'largest' (the three
+        non-project packages whose own modules take longest, as (name, ms))
+    """
+    scripts_dir = Path(__file__).resolve().parent
+    code = f"import sys; sys.path.insert(0, {str(scripts_dir)!r}); import {module}"
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True)
+
+    # Lines read "import time: <self us> | <cumulative us> | <indented name>"
+    entries = []
+    for line in output.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            entries.append((fields[2].strip(), int(fields[0].split(':')[1]), int(fields[1])))
+    names = {name for name, _, _ in entries}
+
+    # Time spent in each package's own modules, project modules excluded
+    packages = {}
+    for name, self_us, _ in entries:
+        root = name.split('.')[0]
+        if root != module and not (scripts_dir / f"{root}.py").exists():
+            packages[root] = packages.get(root, 0) + self_us
+    largest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:3]
+    return {
+        'import_ms': next(us for name, _, us in entries if name == module) / 1e3,
+        'loaded': [name for name in HEAVY_MODULES if name in names],
+        'largest': [(name, us / 1e3) for name, us in largest],
+    }
+
+
+def _first_answer(artifact_path: str, dataset_path: str, query: str) -> Dict:
+    """
+    Time a fresh interpreter from its first import to its first answer.
+
+    Returns:
+        Dictionary with 'seconds' and the ``HEAVY_MODULES`` loaded by then
+    """
+    code = (
+        "import sys, time, io, contextlib\n"
+        "start = time.perf_counter()\n"
+        f"sys.path.insert(0, {str(Path(__file__).resolve().parent)!r})\n"
+        "from health_chatbot import HealthChatbot\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        f"    HealthChatbot.load({artifact_path!r}, dataset_path={dataset_path!r}).answer_query({query!r})\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(' '.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))\n"
+    )
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    seconds, loaded = (output.stdout.rstrip('\n').split('\n') + [''])[:2]
+    return {'seconds': float(seconds), 'loaded': loaded.split()}
+
+
+def benchmark_startup(dataset_path: str, repeat: int = 3,
+                      budget_s: float = FIRST_ANSWER_BUDGET_S) -> Dict:
+    """
+    Measure import time of every entry point and time to first answer.
+
+    Each measurement runs in a fresh interpreter (best of ``repeat``). The
+    first answer loads a compiled artifact, as the REPL and server do.
+
+    Args:
+        dataset_path: Dataset the artifact is compiled from
+        repeat: Fresh interpreters per measurement
+        budget_s: Time-to-first-answer budget
+
+    Returns:
+        Dictionary with per-entry-point 'imports', 'first_answer_s',
+        'first_answer_loaded', 'budget_s' and 'violations' (entry points
+        of the serving path that load ``PLOTTING_MODULES``)
+    """
+    imports = []
+    for module in STARTUP_ENTRY_POINTS:
+        runs = [_import_profile(module) for _ in range(repeat)]
+        imports.append(dict(min(runs, key=lambda r: r['import_ms']), entry_point=module))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact_path = str(Path(tmp) / 'model')
+        _quiet(HealthIndex.from_dataset, dataset_path).save(artifact_path)
+        query = sample_queries(dataset_path, 1)[0]
+        first = min((_first_answer(artifact_path, dataset_path, query) for _ in range(repeat)),
+                    key=lambda r: r['seconds'])
+
+    violations = [r['entry_point'] for r in imports
+                  if r['entry_point'] in SERVING_ENTRY_POINTS and set(r['loaded']) & set(PLOTTING_MODULES)]
+    if set(first['loaded']) & set(PLOTTING_MODULES):
+        violations.append('first answer')
+    return {
+        'imports': imports,
+        'first_answer_s': first['seconds'],
+        'first_answer_loaded': first['loaded'],
+        'budget_s': budget_s,
+        'violations': violations,
+    }
+
+
+def benchmark_features(source_path: str, sizes: List[int], n_queries: int = 1000, k: int = 3,
+                       batch_size: int = 256, repeat: int = 3, seed: int = 0) -> List[Dict]:
+    """
+    Compare recall and latency of the 'tfidf' and 'hashing' feature backends.
+
+    Queries are corpus questions with about 20% of their words dropped;
+    a query is recalled when the pair it was made from ranks in the top-k.
+    Synthetic questions differ from each other only by appended answer
+    words, so recall shows how much of the vocabulary a backend keeps.
+
+    Args:
+        source_path: Dataset the synthetic corpora are generated from
+        sizes: Corpus sizes to test
+        n_queries: Queries per corpus
+        k: Matches per query
+        batch_size: Queries vectorized and ranked per call
+        repeat: Runs per latency measurement (best run is reported)
+        seed: Random seed for corpora and queries
+
+    Returns:
+        List of result dicts, one per corpus size and backend
+    """
+    rng = random.Random(seed)
+    results = []
+    for size in sizes:
+        qa_pairs = make_synthetic_dataset(source_path, size, seed)['qa_pairs']
+        targets = [rng.randrange(size) for _ in range(n_queries)]
+        queries = []
+        for target in targets:
+            words = qa_pairs[target]['question'].lower().split()
+            queries.append(' '.join(w for w in words if rng.random() > 0.2) or words[0])
+        batches = [queries[i:i + batch_size] for i in range(0, len(queries), batch_size)]
+
+        for features in HealthIndex.FEATURES:
+            start = time.perf_counter()
+            index = HealthIndex.from_qa_pairs(qa_pairs, features=features)
+            fit_s = time.perf_counter() - start
+
+            ranked = np.concatenate([index.rank(index.vectorize(batch), k)[0] for batch in batches])
+            recalled = index.qa_pairs.ids[ranked] == np.array([qa_pairs[t]['id'] for t in targets])[:, None]
+            query_s = _best_time(lambda: [index.rank(index.vectorize(batch), k) for batch in batches], repeat)
+
+            results.append({
+                'corpus_size': size,
+                'features': features,
+                'columns': index.tfidf_matrix_t.shape[0],
+                'fit_s': fit_s,
+                'vectorizer_kb': len(pickle.dumps(index.vectorizer)) / 1024,
+                'recall_at_1': float(recalled[:, 0].mean()),
+                f'recall_at_{k}': float(recalled.any(axis=1).mean()),
+                'query_us': query_s / len(queries) * 1e6,
+            })
+    return results
+
+
+def benchmark_load(source_path: str, sizes: List[int], seed: int = 0) -> List[Dict]:
+    """
+    Compare peak memory and time of dataset ingest paths.
+
+    Each path runs in a fresh interpreter and builds a ``HealthIndex``:
+
+    - ``json.load``: parse the whole document, then fit on the dict list
+    - ``stream-json``: ``HealthIndex.from_dataset`` on the JSON document
+    - ``stream-jsonl``: ``HealthIndex.from_dataset`` on the same data as JSONL
+
+    Args:
+        source_path: Dataset the synthetic corpora are generated from
+        sizes: Corpus sizes to test
+        seed: Random seed for corpus generation
+
+    Returns:
+        List of result dicts, one per corpus size and path
+    """
+    setup = "import json\nfrom health_index import HealthIndex"
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            dataset = write_synthetic_dataset(source_path, size, tmp, seed)
+            dataset_jsonl = write_synthetic_dataset(source_path, size, tmp, seed, jsonl=True)
+            paths = {
+                'json.load': ("with open({!r}, encoding='utf-8') as f: "
+                              "HealthIndex.from_qa_pairs(json.load(f)['qa_pairs'])").format(dataset),
+                'stream-json': f"HealthIndex.from_dataset({dataset!r})",
+                'stream-jsonl': f"HealthIndex.from_dataset({dataset_jsonl!r})",
+            }
+            for name, statement in paths.items():
+                run = _run_fresh(setup, statement)
+                results.append({
+                    'corpus_size': size,
+                    'path': name,
+                    'file_mb': os.path.getsize(dataset_jsonl if name.endswith('jsonl') else dataset) / 1024 ** 2,
+                    'seconds': run['seconds'],
+                    'peak_rss_mb': run['peak_rss_mb'],
+                    'rss_growth_mb': run['peak_rss_mb'] - run['setup_rss_mb'],
+                })
+    return results
+
+
+def _matrix_mb(index: HealthIndex) -> float:
+    """Memory held by the scoring matrix (and quantization scales) of an index."""
+    matrix_t = index.tfidf_matrix_t
+    arrays = [matrix_t.data, matrix_t.indices, matrix_t.indptr]
+    if index.term_scales is not None:
+        arrays.append(index.term_scales)
+    return sum(a.nbytes for a in arrays) / 1e6
+
+
+def _baseline_matrix_mb(index: HealthIndex) -> float:
+    """Memory of the original single float64 question-major CSR matrix with the same entries."""
+    matrix_t = index.tfidf_matrix_t
+    index_bytes = matrix_t.indices.itemsize
+    return (matrix_t.nnz * (8 + index_bytes) + (matrix_t.shape[1] + 1) * index_bytes) / 1e6
+
+
+def _precision_metrics(dataset_path: str, queries: List[str], repeat: int,
+                       threshold: float = 0.3, batch_size: int = 256) -> Dict:
+    """
+    Compare reduced-precision indices against float64 on the same queries.
+
+    Returns:
+        Flat dict with the memory of the original float64 matrix and, per
+        precision: matrix memory, its reduction against that, vectorize + rank
+        throughput and, for reduced precisions, the top-1 change rate, the
+        largest best-match score error, the largest error over every
+        query/question pair whose float64 score lies within
+        ``THRESHOLD_WINDOW`` of ``threshold``, and the share of queries
+        whose best match crosses the threshold
+    """
+    lowered = [q.lower() for q in queries]
+    batches = [lowered[i:i + batch_size] for i in range(0, len(lowered), batch_size)]
+    # Full score rows are dense, so compare them a few queries at a time
+    score_batches = [lowered[i:i + 32] for i in range(0, len(lowered), 32)]
+
+    def rank_all(index):
+        ranked = [index.rank(index.vectorize(batch), 1) for batch in batches]
+        return (np.concatenate([i[:, 0] for i, _ in ranked]),
+                np.concatenate([s[:, 0] for _, s in ranked]).astype(np.float64))
+
+    def score_rows(index, batch):
+        query_matrix = scale_queries(index.vectorize(batch), index.precision, index.term_scales)
+        return index.scorer('dense').scores(query_matrix).astype(np.float64)
+
+    indices = {precision: HealthIndex.from_dataset(dataset_path, precision=precision)
+               for precision in ('float64',) + SUITE_PRECISIONS}
+    exact_best, exact_scores = rank_all(indices['float64'])
+
+    metrics = {'baseline_matrix_mb': _baseline_matrix_mb(indices['float64'])}
+    for precision, index in indices.items():
+        metrics[f'{precision}_matrix_mb'] = _matrix_mb(index)
+        metrics[f'{precision}_matrix_reduction'] = metrics['baseline_matrix_mb'] / metrics[f'{precision}_matrix_mb']
+        metrics[f'{precision}_rank_qps'] = len(queries) / _best_time(lambda: rank_all(index), repeat)
+        if precision == 'float64':
+            continue
+
+        best, scores = rank_all(index)
+        near_error = 0.0
+        for batch in score_batches:
+            exact = score_rows(indices['float64'], batch)
+            near = np.abs(exact - threshold) <= THRESHOLD_WINDOW
+            if near.any():
+                near_error = max(near_error, float(np.abs(score_rows(index, batch) - exact)[near].max()))
+
+        metrics[f'{precision}_top1_change_rate'] = float(np.mean(best != exact_best))
+        metrics[f'{precision}_max_score_error'] = float(np.abs(scores - exact_scores).max())
+        metrics[f'{precision}_near_threshold_max_error'] = near_error
+        metrics[f'{precision}_threshold_flip_rate'] = float(np.mean((scores >= threshold)
+                                                                    != (exact_scores >= threshold)))
+    return metrics
+
+
+def benchmark_suite(source_path: str, sizes: List[int], n_queries: int = 1000,
+                    repeat: int = 3, seed: int = 0) -> Dict:
+    """
+    Measure initialization, query latency and throughput across corpus sizes.
+
+    For every size a synthetic corpus is generated from ``source_path`` and
+    the following are recorded:
+
+    - ``init_cold_s``: imports plus ``HealthChatbot.__init__`` in a fresh interpreter
+    - ``init_peak_rss_mb``: peak resident memory of that interpreter
+    - ``init_warm_s``: best ``HealthChatbot.__init__`` in this process
+    - ``artifact_load_s``: best ``HealthChatbot.load`` of a compiled artifact
+    - ``answer_*_ms``: ``answer_query`` latency distribution (one call per query)
+    - ``batch_qps``: ``batch_answer`` throughput
+    - ``batch_lazy_qps``: ``batch_answer(lazy=True)`` throughput reading
+      only answer and confidence
+    - ``similarity_qps``: ``get_similarity_scores_for_testing`` throughput
+    - ``baseline_matrix_mb``: the single float64 question-major matrix the
+      original chatbot held
+    - ``<precision>_*``: matrix memory, its reduction against the baseline
+      matrix and rank throughput of float64, float32 and uint8 indices; for
+      the reduced precisions also how often
+      the top-1 match changes, the largest score error overall and near the
+      confidence threshold, and how often a query crosses the threshold
+
+    Args:
+        source_path: Dataset the synthetic corpora are generated from
+        sizes: Corpus sizes (number of Q&A pairs) to test
+        n_queries: Queries per measurement
+        repeat: Runs per throughput/init measurement (best run is reported)
+        seed: Random seed for corpora and queries
+
+    Returns:
+        Dictionary with environment metadata and one result dict per size
+    """
+    queries = sample_queries(source_path, n_queries, seed)
+    results = []
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset = write_synthetic_dataset(source_path, size, tmp, seed)
+            artifact = str(Path(tmp) / 'artifact')
+
+            init_cold = _cold_init(dataset)
+            init_warm = _best_time(lambda: _quiet(HealthChatbot, dataset), repeat)
+            _quiet(HealthChatbot, dataset).save(artifact)
+            load = _best_time(lambda: _quiet(HealthChatbot.load, artifact), repeat)
+
+            chatbot = _quiet(HealthChatbot.load, artifact)
+            for query in queries[:10]:
+                chatbot.answer_query(query)
+
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                chatbot.answer_query(query)
+                latencies.append(time.perf_counter() - start)
+            latencies_ms = np.array(latencies) * 1000
+
+            batch_s = _best_time(lambda: chatbot.batch_answer(queries, record_history=False), repeat)
+            batch_lazy_s = _best_time(lambda: [
+                (r['answer'], r['confidence'])
+                for r in chatbot.batch_answer(queries, record_history=False, lazy=True)
+            ], repeat)
+            similarity_s = _best_time(lambda: chatbot.get_similarity_scores_for_testing(queries), repeat)
+            threshold = chatbot.confidence_threshold
+
+            chatbot.index.close()
+            del chatbot
+
+            precision = _precision_metrics(dataset, queries, repeat, threshold)
+
+        results.append({
+            'corpus_size': size,
+            'init_cold_s': init_cold['total_s'],
+            'init_peak_rss_mb': init_cold['peak_rss_mb'],
+            'init_warm_s': init_warm,
+            'artifact_load_s': load,
+            'answer_mean_ms': float(latencies_ms.mean()),
+            'answer_p50_ms': float(np.percentile(latencies_ms, 50)),
+            'answer_p95_ms': float(np.percentile(latencies_ms, 95)),
+            'answer_p99_ms': float(np.percentile(latencies_ms, 99)),
+            'batch_qps': len(queries) / batch_s,
+            'batch_lazy_qps': len(queries) / batch_lazy_s,
+            'similarity_qps': len(queries) / similarity_s,
+            **precision,
+        })
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'scipy': scipy.__version__,
+            'sklearn': sklearn.__version__,
+            'queries': n_queries,
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare_results(baseline: Dict, current: Dict, tolerance: float = 0.10,
+                    absolute_tolerance: float = ABSOLUTE_TOLERANCE) -> List[Dict]:
+    """
+    Compare two suite results metric by metric.
+
+    Args:
+        baseline: Saved output of ``benchmark_suite``
+        current: New output of ``benchmark_suite``
+        tolerance: Allowed relative slowdown before a metric is flagged
+        absolute_tolerance: Allowed change of a metric whose baseline is zero
+
+    Returns:
+        One dict per metric present in both runs, with ``change`` relative
+        to the baseline (None for a zero baseline), ``difference`` and
+        ``regression`` set when the metric got worse by more than the
+        tolerance
+    """
+    baseline_by_size = {r['corpus_size']: r for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        reference = baseline_by_size.get(result['corpus_size'])
+        if reference is None:
+            continue
+        for metric, value in result.items():
+            if metric == 'corpus_size' or metric not in reference:
+                continue
+            higher_is_better = metric.endswith(HIGHER_IS_BETTER)
+            difference = value - reference[metric]
+            if reference[metric]:
+                change = value / reference[metric] - 1
+                regression = change < -tolerance if higher_is_better else change > tolerance
+            else:
+                change = None
+                regression = (difference < -absolute_tolerance if higher_is_better
+                              else difference > absolute_tolerance)
+            rows.append({
+                'corpus_size': result['corpus_size'],
+                'metric': metric,
+                'baseline': reference[metric],
+                'current': value,
+                'change': change,
+                'difference': difference,
+                'regression': regression,
+            })
+    return rows
+
+
+def _print_comparison(rows: List[Dict], tolerance: float) -> bool:
+    """Print a comparison table; return True if any metric regressed."""
+    print(f"\n{'Corpus':>10} {'Metric':<16} {'Baseline':>12} {'Current':>12} {'Change':>9}")
+    print("-" * 63)
+    for r in rows:
+        flag = "  ⚠ REGRESSION" if r['regression'] else ""
+        # A zero baseline has no relative change; show the difference
+        change = f"{r['change']:>+8.1%}" if r['change'] is not None else f"{r['difference']:>+9.2g}"
+        print(f"{r['corpus_size']:>10} {r['metric']:<16} {r['baseline']:>12.4g} {r['current']:>12.4g} "
+              f"{change}{flag}")
+
+    regressions = [r for r in rows if r['regression']]
+    if regressions:
+        print(f"\n❌ {len(regressions)} metric(s) regressed by more than {tolerance:.0%}")
+    else:
+        print(f"\n✓ No regressions beyond {tolerance:.0%}")
+    return bool(regressions)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Health Chatbot Benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    topk_parser = subparsers.add_parser('topk', help='Top-k selection vs full argsort')
+    topk_parser.add_argument('--sizes', type=int, nargs='+', default=[50, 10_000, 100_000, 1_000_000])
+    topk_parser.add_argument('--k', type=int, default=3)
+    topk_parser.add_argument('--repeat', type=int, default=20)
+
+    concurrency_parser = subparsers.add_parser(
+        'concurrency', help='Thread-safety stress test and thread scaling of a shared index'
+    )
+    concurrency_parser.add_argument('--dataset', default='data/health_qa_dataset.json')
+    concurrency_parser.add_argument('--corpus-size', type=int, default=20_000,
+                                    help='Synthetic Q&A pairs generated from the dataset')
+    concurrency_parser.add_argument('--queries', type=int, default=5_000)
+    concurrency_parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    concurrency_parser.add_argument('--scorer', choices=sorted(HealthIndex.SCORERS), default='dense')
+    concurrency_parser.add_argument('--n-probe', type=int,
+                                    help='IVF clusters scanned per query (default: IVFScorer.N_PROBE)')
+    concurrency_parser.add_argument('--shortlist', type=int,
+                                    help='IVF candidates re-scored exactly (default: IVFScorer.SHORTLIST)')
+
+    sharded_parser = subparsers.add_parser(
+        'sharded', help='Multi-process sharded scoring vs single process'
+    )
+    sharded_parser.add_argument('--dataset', default='data/health_qa_dataset.json')
+    sharded_parser.add_argument('--corpus-size', type=int, default=200_000,
+                                help='Synthetic Q&A pairs generated from the dataset')
+    sharded_parser.add_argument('--queries', type=int, default=1_000)
+    sharded_parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4])
+    sharded_parser.add_argument('--k', type=int, default=3)
+
+    ann_parser = subparsers.add_parser(
+        'ann', help='Recall@k and speed of the IVF scorer vs exact cosine similarity'
+    )
+    ann_parser.add_argument('--dataset', default='data/health_qa_dataset.json')
+    ann_parser.add_argument('--corpus-size', type=int, default=100_000,
+                            help='Synthetic Q&A pairs generated from the dataset')
+    ann_parser.add_argument('--queries', type=int, default=1_000)
+    ann_parser.add_argument('--probes', type=int, nargs='+', default=[1, 4, 16])
+    ann_parser.add_argument('--shortlists', type=int, nargs='+', default=[64, 256, 1024],
+                            help='LSA candidates re-scored with exact cosine similarity')
+    ann_parser.add_argument('--k', type=int, default=3)
+
+    keywords_parser = subparsers.add_parser(
+        'keywords', help='Per-query tokenize/vectorize/keyword cost: shared tokens vs previous path'
+    )
+    keywords_parser.add_argument('--dataset', default='data/health_qa_dataset.json')
+    keywords_parser.add_argument('--queries', type=int, default=2_000)
+    keywords_parser.add_argument('--repeat', type=int, default=5)
+
+    analyzer_parser = subparsers.add_parser(
+        'analyzer', help='Query vectorization: single-pass analyzer vs sklearn transform'
+    )
+    analyzer_parser.add_argument('--dataset', default='data/health_qa_dataset.json')
+    analyzer_parser.add_argument('--queries', type=int, default=2_000)
+    analyzer_parser.add_argument('--batch-size', type=int, default=256)
+    analyzer_parser.add_argument('--repeat', type=int, default=5)
+
+    memory_parser = subparsers.add_parser(
+        'memory', help='Memory per Q&A pair: parsed JSON dicts vs columnar store'
+    )
+    memory_parser.add_argument('--dataset', default='data/health_qa_dataset.json')
+    memory_parser.add_argument('--sizes', type=int, nargs='+', default=[50, 10_000, 100_000])
+    memory_parser.add_argument('--seed', type=int, default=0)
+
+    features_parser = subparsers.add_parser(
+        'features', help="Recall and latency of 'tfidf' vs 'hashing' features"
+    )
+    features_parser.add_argument('--dataset', default='data/health_qa_dataset.json')
+    features_parser.add_argument('--sizes', type=int, nargs='+', default=[50, 10_000, 100_000])
+    features_parser.add_argument('--queries', type=int, default=1_000)
+    features_parser.add_argument('--k', type=int, default=3)
+    features_parser.add_argument('--seed', type=int, default=0)
+
+    load_parser = subparsers.add_parser(
+        'load', help='Peak memory of dataset ingest: json.load vs streaming JSON/JSONL'
+    )
+    load_parser.add_argument('--dataset', default='data/health_qa_dataset.json')
+    load_parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+    load_parser.add_argument('--seed', type=int, default=0)
+
+    suite_parser = subparsers.add_parser(
+        'suite', help='Init, latency and throughput across synthetic corpus sizes'
+    )
+    suite_parser.add_argument('--dataset', default='data/health_qa_dataset.json')
+    suite_parser.add_argument('--sizes', type=int, nargs='+', default=[50, 10_000, 100_000, 1_000_000])
+    suite_parser.add_argument('--queries', type=int, default=1_000)
+    suite_parser.add_argument('--repeat', type=int, default=3)
+    suite_parser.add_argument('--seed', type=int, default=0)
+    suite_parser.add_argument('--output', help='Write results as JSON to this file')
+    suite_parser.add_argument('--baseline', help='Saved suite JSON to compare against')
+    suite_parser.add_argument('--tolerance', type=float, default=0.10,
+                              help='Relative change flagged as a regression')
+    suite_parser.add_argument('--absolute-tolerance', type=float, default=ABSOLUTE_TOLERANCE,
+                              help='Change flagged as a regression when the baseline is zero')
+
+    startup_parser = subparsers.add_parser(
+        'startup', help='Import time of each entry point (-X importtime) and time to first answer'
+    )
+    startup_parser.add_argument('--dataset', default='data/health_qa_dataset.json')
+    startup_parser.add_argument('--repeat', type=int, default=3)
+    startup_parser.add_argument('--budget', type=float, default=FIRST_ANSWER_BUDGET_S,
+                                help='Time-to-first-answer budget in seconds')
+
+    compare_parser = subparsers.add_parser('compare', help='Compare two saved suite results')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--tolerance', type=float, default=0.10)
+    compare_parser.add_argument('--absolute-tolerance', type=float, default=ABSOLUTE_TOLERANCE)
+
+    args = parser.parse_args()
+
+    if args.benchmark == 'topk':
+        print(f"{'Corpus':>10} {'argsort (ms)':>14} {'top_k (ms)':>12} {'Speedup':>9} {'Same':>6} "
+              f"{'Same idx':>9}")
+        print("-" * 65)
+        results = benchmark_top_k(args.sizes, k=args.k, repeat=args.repeat)
+        for r in results:
+            print(f"{r['corpus_size']:>10} {r['argsort_ms']:>14.3f} {r['top_k_ms']:>12.3f} "
+                  f"{r['speedup']:>8.1f}x {str(r['same_scores']):>6} {str(r['same_indices']):>9}")
+        if not all(r['same_scores'] and r['same_indices'] for r in results):
+            print("❌ top_k differs from the reference selection")
+            sys.exit(1)
+
+    elif args.benchmark == 'concurrency':
+        queries = sample_queries(args.dataset, args.queries)
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset = write_synthetic_dataset(args.dataset, args.corpus_size, tmp)
+            results = benchmark_concurrency(dataset, queries, args.threads, scorer=args.scorer,
+                                            scorer_options={'ivf': {'n_probe': args.n_probe,
+                                                                    'shortlist': args.shortlist}})
+
+        print(f"{'Threads':>8} {'Queries/s':>11} {'Speedup':>9} {'Batched ==':>11} {'Shared ==':>10}")
+        print("-" * 53)
+        for r in results:
+            print(f"{r['threads']:>8} {r['queries_per_s']:>11.0f} {r['speedup']:>8.2f}x "
+                  f"{str(r['identical_batched']):>11} {str(r['identical_shared_session']):>10}")
+        best = max(results, key=lambda r: r['speedup'])
+        if best['threads'] > results[0]['threads'] and best['speedup'] >= SCALING_SPEEDUP:
+            print(f"\n✓ Throughput scales with threads: {best['speedup']:.2f}x at {best['threads']} threads")
+        else:
+            print(f"\n⚠️  Threads do not scale throughput (best {best['speedup']:.2f}x); queries are "
+                  f"GIL-bound, use server.py --processes or the 'sharded' scorer to scale")
+        if not all(r['identical_batched'] and r['identical_shared_session'] for r in results):
+            print("❌ Concurrent results differ from single-threaded execution")
+            sys.exit(1)
+
+    elif args.benchmark == 'sharded':
+        queries = sample_queries(args.dataset, args.queries)
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset = write_synthetic_dataset(args.dataset, args.corpus_size, tmp)
+            results = benchmark_sharded(dataset, queries, args.shards, k=args.k)
+
+        print(f"{'Corpus':>10} {'Shards':>7} {'Dense (ms)':>11} {'Sharded (ms)':>13} {'Speedup':>9} {'Same':>6}")
+        print("-" * 61)
+        for r in results:
+            print(f"{r['corpus_size']:>10} {r['shards']:>7} {r['dense_ms']:>11.1f} {r['sharded_ms']:>13.1f} "
+                  f"{r['speedup']:>8.2f}x {str(r['identical']):>6}")
+        if not all(r['identical'] for r in results):
+            print("❌ Sharded results differ from single-process scoring")
+            sys.exit(1)
+
+    elif args.benchmark == 'ann':
+        queries = sample_queries(args.dataset, args.queries)
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset = write_synthetic_dataset(args.dataset, args.corpus_size, tmp)
+            results = benchmark_ann(dataset, queries, args.probes, args.shortlists, k=args.k)
+
+        print(f"✓ IVF index: {results[0]['lists']} lists, built in {results[0]['build_s']:.2f}s")
+        print(f"{'Corpus':>10} {'Shortlist':>10} {'Probes':>7} {'Dense (ms)':>11} {'IVF (ms)':>9} "
+              f"{'Speedup':>9} {f'Recall@{args.k}':>9}")
+        print("-" * 71)
+        for r in results:
+            print(f"{r['corpus_size']:>10} {r['shortlist']:>10} {r['n_probe']:>7} {r['dense_ms']:>11.1f} "
+                  f"{r['ivf_ms']:>9.1f} {r['speedup']:>8.2f}x {r[f'recall_at_{args.k}']:>9.3f}")
+
+    elif args.benchmark == 'keywords':
+        r = benchmark_keywords(args.dataset, sample_queries(args.dataset, args.queries), args.repeat)
+
+        print(f"{'Path':>9} {'Keywords (µs)':>14} {'Total (µs)':>11}")
+        print("-" * 36)
+        print(f"{'previous':>9} {r['previous_keywords_us']:>14.2f} {r['previous_us']:>11.1f}")
+        print(f"{'current':>9} {r['current_keywords_us']:>14.2f} {r['current_us']:>11.1f}")
+        print(f"✓ Saved {r['saved_us']:.1f} µs per query over {r['queries']} queries")
+        if not r['identical']:
+            print("❌ Query vectors or matched keywords differ from the previous path")
+            sys.exit(1)
+
+    elif args.benchmark == 'analyzer':
+        results = benchmark_analyzer(args.dataset, sample_queries(args.dataset, args.queries),
+                                     args.batch_size, args.repeat)
+
+        print(f"{'Features':>9} {'sklearn (µs)':>13} {'Analyzer (µs)':>14} {'Speedup':>9} "
+              f"{'Batched sklearn':>16} {'Batched analyzer':>17} {'Speedup':>9} {'Same':>6}")
+        print("-" * 100)
+        for r in results:
+            print(f"{r['features']:>9} {r['sklearn_us']:>13.1f} {r['analyzer_us']:>14.1f} {r['speedup']:>8.1f}x "
+                  f"{r['sklearn_batch_us']:>16.1f} {r['analyzer_batch_us']:>17.1f} {r['batch_speedup']:>8.1f}x "
+                  f"{str(r['identical']):>6}")
+        print("Times are per query; analysis alone: "
+              + ", ".join(f"{r['features']} {r['analyze_us']:.1f} µs" for r in results))
+        if not all(r['identical'] for r in results):
+            print("❌ Analyzer vectors differ from sklearn's transform")
+            sys.exit(1)
+
+    elif args.benchmark == 'memory':
+        results = benchmark_memory(args.dataset, args.sizes, args.seed)
+
+        print(f"{'Corpus':>10} {'Dicts (B/pair)':>15} {'Store (B/pair)':>15} {'Reduction':>10} "
+              f"{'Dict read (µs)':>15} {'Store read (µs)':>16} {'Same':>6}")
+        print("-" * 95)
+        for r in results:
+            print(f"{r['corpus_size']:>10} {r['dict_bytes_per_pair']:>15.0f} {r['store_bytes_per_pair']:>15.0f} "
+                  f"{r['reduction']:>9.1f}x {r['dict_access_us']:>15.3f} {r['store_access_us']:>16.3f} "
+                  f"{str(r['identical']):>6}")
+
+    elif args.benchmark == 'features':
+        results = benchmark_features(args.dataset, args.sizes, args.queries, k=args.k, seed=args.seed)
+
+        print(f"{'Corpus':>10} {'Features':>9} {'Columns':>8} {'Fit (s)':>8} {'Model (KB)':>11} "
+              f"{'Recall@1':>9} {f'Recall@{args.k}':>9} {'Query (µs)':>11}")
+        print("-" * 83)
+        for r in results:
+            print(f"{r['corpus_size']:>10} {r['features']:>9} {r['columns']:>8} {r['fit_s']:>8.2f} "
+                  f"{r['vectorizer_kb']:>11.0f} {r['recall_at_1']:>9.3f} {r[f'recall_at_{args.k}']:>9.3f} "
+                  f"{r['query_us']:>11.1f}")
+
+    elif args.benchmark == 'load':
+        results = benchmark_load(args.dataset, args.sizes, args.seed)
+
+        print(f"{'Corpus':>10} {'Path':>13} {'File (MB)':>10} {'Time (s)':>9} {'Peak RSS (MB)':>14} {'Growth (MB)':>12}")
+        print("-" * 73)
+        for r in results:
+            print(f"{r['corpus_size']:>10} {r['path']:>13} {r['file_mb']:>10.1f} {r['seconds']:>9.2f} "
+                  f"{r['peak_rss_mb']:>14.1f} {r['rss_growth_mb']:>12.1f}")
+
+    elif args.benchmark == 'suite':
+        report = benchmark_suite(args.dataset, args.sizes, args.queries, args.repeat, args.seed)
+
+        print(f"{'Corpus':>10} {'Cold (s)':>9} {'RSS (MB)':>9} {'Warm (s)':>9} {'Load (s)':>9} {'p50 (ms)':>9} "
+              f"{'p99 (ms)':>9} {'Batch q/s':>10} {'Sim q/s':>10}")
+        print("-" * 92)
+        for r in report['results']:
+            print(f"{r['corpus_size']:>10} {r['init_cold_s']:>9.3f} {r['init_peak_rss_mb']:>9.1f} {r['init_warm_s']:>9.3f} "
+                  f"{r['artifact_load_s']:>9.3f} {r['answer_p50_ms']:>9.3f} {r['answer_p99_ms']:>9.3f} "
+                  f"{r['batch_qps']:>10.0f} {r['similarity_qps']:>10.0f}")
+
+        print(f"\n{'Corpus':>10} {'Precision':>10} {'Matrix (MB)':>12} {'vs base':>8} {'Rank q/s':>10} "
+              f"{'Top-1 Δ':>8} {'Max err':>9} {'Err @thr':>9} {'Flips':>7}")
+        print("-" * 91)
+        for r in report['results']:
+            print(f"{r['corpus_size']:>10} {'baseline':>10} {r['baseline_matrix_mb']:>12.2f}")
+            for precision in ('float64',) + SUITE_PRECISIONS:
+                reduced = precision != 'float64'
+                print(f"{r['corpus_size']:>10} {precision:>10} {r[f'{precision}_matrix_mb']:>12.2f} "
+                      f"{r[f'{precision}_matrix_reduction']:>7.2f}x {r[f'{precision}_rank_qps']:>10.0f} "
+                      + (f"{r[f'{precision}_top1_change_rate']:>7.2%} {r[f'{precision}_max_score_error']:>9.2e} "
+                         f"{r[f'{precision}_near_threshold_max_error']:>9.2e} "
+                         f"{r[f'{precision}_threshold_flip_rate']:>6.2%}" if reduced else f"{'-':>8}"))
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"\n✓ Results saved to {args.output}")
+        else:
+            print(json.dumps(report))
+
+        if args.baseline:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            if _print_comparison(compare_results(baseline, report, args.tolerance, args.absolute_tolerance),
+                                 args.tolerance):
+                sys.exit(1)
+
+    elif args.benchmark == 'startup':
+        report = benchmark_startup(args.dataset, args.repeat, args.budget)
+
+        print(f"{'Entry point':>20} {'Import (ms)':>12}  {'Heavy modules':<36} Slowest packages")
+        print("-" * 108)
+        for r in report['imports']:
+            largest = ", ".join(f"{name} {ms:.0f}" for name, ms in r['largest'])
+            print(f"{r['entry_point']:>20} {r['import_ms']:>12.0f}  {', '.join(r['loaded']) or '-':<36} {largest}")
+        within = report['first_answer_s'] <= report['budget_s']
+        print(f"\n{'✓' if within else '❌'} Time to first answer: {report['first_answer_s']:.3f} s "
+              f"(budget {report['budget_s']:.3f} s; loaded: {', '.join(report['first_answer_loaded']) or 'no heavy modules'})")
+        for name in report['violations']:
+            print(f"❌ {name} loads the plotting stack")
+        if not within or report['violations']:
+            sys.exit(1)
+
+    elif args.benchmark == 'compare':
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+        if _print_comparison(compare_results(baseline, current, args.tolerance, args.absolute_tolerance),
+                             args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Conversation History - Bounded In-Memory Window with Optional JSONL Log
+Keeps memory flat in long-running processes while preserving every entry on disk
+"""
+
+import atexit
+import json
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+
+# Control messages for the writer thread
+_STOP = object()
+_INTERVAL_ELAPSED = object()
+
+
+class JsonlHistoryWriter:
+    """
+    Append-only JSONL log written in batches by a background thread.
+
+    ``write`` only enqueues the entry, so answering a query never waits on
+    disk I/O. Entries are flushed when ``batch_size`` are pending or every
+    ``flush_interval`` seconds, whichever comes first. A failed write does
+    not stop the thread: the error is kept and raised by the next ``flush``
+    or ``close``, and the entries of that batch are dropped.
+    """
+
+    # Seconds between checks that the writer thread is still alive while waiting on it
+    LIVENESS_INTERVAL = 1.0
+
+    def __init__(self, log_path: str, batch_size: int = 256, flush_interval: float = 1.0):
+        """
+        Args:
+            log_path: JSONL file to append to (created if missing)
+            batch_size: Entries written per batch
+            flush_interval: Maximum seconds an entry waits before being written
+        """
+        self.log_path = Path(log_path)
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, entry: Dict):
+        """Queue an entry for writing."""
+        if self._closed:
+            raise ValueError("History writer is closed")
+        self._queue.put(entry)
+
+    def flush(self):
+        """
+        Block until every entry queued so far is on disk.
+
+        Raises:
+            The error of a write that failed since the last flush, or
+            RuntimeError if the writer thread is no longer running
+        """
+        if self._closed:
+            self._raise_error()
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        while not done.wait(self.LIVENESS_INTERVAL):
+            if not self._thread.is_alive():
+                raise RuntimeError(f"History writer thread for {self.log_path} is not running")
+        self._raise_error()
+
+    def close(self):
+        """Flush pending entries and stop the writer thread, raising a failed write's error."""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self):
+        """Raise (once) the error of the last failed write, if any."""
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _run(self):
+        """Writer thread: drain the queue into the log in batches."""
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _INTERVAL_ELAPSED
+
+            if isinstance(item, dict):
+                pending.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(pending) < self.batch_size:
+                    continue
+
+            if pending:
+                try:
+                    lines = [json.dumps(e, ensure_ascii=False) + '\n' for e in pending]
+                    with open(self.log_path, 'a', encoding='utf-8') as f:
+                        f.writelines(lines)
+                except Exception as error:
+                    # Keep serving flushes; the caller sees the error there
+                    self._error = error
+                pending = []
+                deadline = None
+
+            if item is _STOP:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def iter_entries(self) -> Iterator[Dict]:
+        """Stream every logged entry from disk, oldest first."""
+        self.flush()
+        if not self.log_path.exists():
+            return
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class ConversationHistory:
+    """
+    Fixed-size ring buffer of recent conversation entries.
+
+    Only the latest ``max_entries`` stay in memory; when a writer is
+    attached, every entry is also appended to it so older history can be
+    streamed back from disk.
+    """
+
+    def __init__(self, max_entries: int = 1000, writer: JsonlHistoryWriter = None):
+        """
+        Args:
+            max_entries: Size of the in-memory window
+            writer: Optional sink receiving every entry (e.g. JsonlHistoryWriter)
+        """
+        self._recent = deque(maxlen=max_entries)
+        self.writer = writer
+
+    def append(self, entry: Dict):
+        """Record an entry."""
+        self._recent.append(entry)
+        if self.writer is not None:
+            self.writer.write(entry)
+
+    def recent(self) -> List[Dict]:
+        """Return the in-memory window, oldest first."""
+        return list(self._recent)
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Iterate over the full history: the on-disk log if any, else the window."""
+        if self.writer is not None:
+            return self.writer.iter_entries()
+        return iter(self.recent())
+
+    def close(self):
+        """Flush and close the writer, if any."""
+        if self.writer is not None:
+            self.writer.close()
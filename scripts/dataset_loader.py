@@ -0,0 +1,225 @@
+"""
+Dataset Loader - Streaming Ingest of Q&A Datasets
+Reads JSON and JSONL datasets record by record with line-numbered validation
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+
+# Fields every Q&A record must have, with their JSON types
+FIELD_TYPES = {
+    'id': int,
+    'question': str,
+    'answer': str,
+    'category': str,
+    'keywords': list,
+}
+
+# Files with these suffixes hold one Q&A object per line
+JSONL_SUFFIXES = ('.jsonl', '.ndjson')
+
+# Characters read per refill while scanning a JSON document
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class DatasetError(ValueError):
+    """Invalid dataset content, reported with the file and line it was found at."""
+
+    def __init__(self, path: str, line: int, message: str):
+        super().__init__(f"{path}:{line}: {message}")
+        self.path = path
+        self.line = line
+        self.message = message
+
+
+def validate_qa_pair(qa) -> Optional[str]:
+    """
+    Check one Q&A record.
+
+    Args:
+        qa: Parsed record
+
+    Returns:
+        Description of the first problem found, or None if the record is valid
+    """
+    if not isinstance(qa, dict):
+        return f"expected a Q&A object, got {type(qa).__name__}"
+    missing = [field for field in FIELD_TYPES if field not in qa]
+    if missing:
+        return f"Q&A pair {qa.get('id')} is missing fields: {missing}"
+    for field, expected in FIELD_TYPES.items():
+        value = qa[field]
+        if not isinstance(value, expected) or isinstance(value, bool):
+            return (f"Q&A pair {qa['id']}: '{field}' must be {expected.__name__}, "
+                    f"got {type(value).__name__}")
+    if not all(isinstance(kw, str) for kw in qa['keywords']):
+        return f"Q&A pair {qa['id']}: 'keywords' must be a list of strings"
+    return None
+
+
+class _JsonStream:
+    """
+    Incremental reader of one JSON document.
+
+    Structural characters are consumed one at a time and values are
+    decoded with ``json.JSONDecoder.raw_decode`` as soon as they are
+    complete, so only the unread tail of the file is buffered.
+    """
+
+    def __init__(self, f, path: str):
+        self._file = f
+        self._path = path
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._line = 1  # line number at self._pos
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Drop consumed text and read more; returns False at end of file."""
+        if self._eof:
+            return False
+        # Reading at least as much as is buffered keeps re-decoding of a
+        # large value linear in its size
+        chunk = self._file.read(max(CHUNK_SIZE, len(self._buffer) - self._pos))
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        self._eof = not chunk
+        return not self._eof
+
+    def _advance(self, end: int):
+        self._line += self._buffer.count('\n', self._pos, end)
+        self._pos = end
+
+    def error(self, message: str, pos: int = None):
+        """Raise a DatasetError at the current (or given buffer) position."""
+        line = self._line
+        if pos is not None:
+            line += self._buffer.count('\n', self._pos, pos)
+        raise DatasetError(self._path, line, message)
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of file)."""
+        while True:
+            self._advance(_WHITESPACE.match(self._buffer, self._pos).end())
+            if self._pos < len(self._buffer) or not self._fill():
+                return self._buffer[self._pos:self._pos + 1]
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of ``chars``."""
+        char = self.peek()
+        if not char:
+            self.error("unexpected end of file")
+        if char not in chars:
+            self.error(f"expected {' or '.join(repr(c) for c in chars)}, got {char!r}")
+        self._advance(self._pos + 1)
+        return char
+
+    def value(self) -> Tuple[int, object]:
+        """
+        Decode the next JSON value.
+
+        Returns:
+            Tuple of (line the value starts on, value)
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A value ending exactly at the buffer end may be a number
+                # that continues in the next chunk
+                if end < len(self._buffer) or self._eof:
+                    line = self._line
+                    self._advance(end)
+                    return line, value
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    self.error(f"invalid JSON: {e.msg}", e.pos)
+            self._fill()
+
+
+def _iter_json_document(path: str, f) -> Iterator[Tuple[int, object]]:
+    """Yield (line, record) for each element of the top-level 'qa_pairs' list."""
+    stream = _JsonStream(f, path)
+    stream.expect('{')
+    found = False
+    if stream.peek() == '}':
+        stream.expect('}')
+    else:
+        while True:
+            _, key = stream.value()
+            if not isinstance(key, str):
+                stream.error("expected a field name")
+            stream.expect(':')
+            if key == 'qa_pairs':
+                found = True
+                stream.expect('[')
+                if stream.peek() == ']':
+                    stream.expect(']')
+                else:
+                    while True:
+                        yield stream.value()
+                        if stream.expect(',]') == ']':
+                            break
+            else:
+                # Other top-level fields are small metadata; decode and drop
+                stream.value()
+            if stream.expect(',}') == '}':
+                break
+    if stream.peek():
+        stream.error("unexpected data after the JSON document")
+    if not found:
+        raise DatasetError(path, 1, "missing 'qa_pairs' list")
+
+
+def _iter_jsonl(path: str, f) -> Iterator[Tuple[int, object]]:
+    """Yield (line, record) for each non-blank line."""
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            raise DatasetError(path, line_number, f"invalid JSON: {e.msg}") from None
+
+
+def iter_qa_pairs(dataset_path: str) -> Iterator[Dict]:
+    """
+    Stream validated Q&A records from a dataset file.
+
+    ``.jsonl``/``.ndjson`` files hold one Q&A object per line; any other
+    file is a JSON document ``{"qa_pairs": [...]}``. Both are parsed
+    incrementally, so memory use does not grow with the file size.
+
+    Args:
+        dataset_path: Path to the dataset
+
+    Yields:
+        Q&A records in file order
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        DatasetError: On malformed JSON, invalid records or duplicate ids
+    """
+    path = str(dataset_path)
+    try:
+        f = open(path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Dataset not found: {path}")
+
+    with f:
+        reader = _iter_jsonl if Path(path).suffix.lower() in JSONL_SUFFIXES else _iter_json_document
+        seen_ids = set()
+        for line, qa in reader(path, f):
+            problem = validate_qa_pair(qa)
+            if problem is None and qa['id'] in seen_ids:
+                problem = f"Duplicate Q&A id {qa['id']}"
+            if problem is not None:
+                raise DatasetError(path, line, problem)
+            seen_ids.add(qa['id'])
+            yield qa
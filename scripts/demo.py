@@ -4,6 +4,7 @@ Shows how to use the chatbot in different ways
 """
 
 from health_chatbot import HealthChatbot
+from model_artifact import DEFAULT_ARTIFACT_PATH
 import json
 
 
@@ -18,7 +19,8 @@ def demo_single_query():
     """Demonstrate a single query."""
     print_section("DEMO 1: Single Query")
     
-    chatbot = HealthChatbot(
+    chatbot = HealthChatbot.load(
+        DEFAULT_ARTIFACT_PATH,
         dataset_path='data/health_qa_dataset.json',
         confidence_threshold=0.3
     )
@@ -39,7 +41,7 @@ def demo_multiple_queries():
     """Demonstrate multiple queries at once."""
     print_section("DEMO 2: Multiple Queries (Batch)")
     
-    chatbot = HealthChatbot('data/health_qa_dataset.json')
+    chatbot = HealthChatbot.load(DEFAULT_ARTIFACT_PATH, 'data/health_qa_dataset.json')
     
     queries = [
         "How to prevent malaria?",
@@ -70,7 +72,7 @@ def demo_similarity_analysis():
     """Demonstrate similarity score analysis."""
     print_section("DEMO 3: Similarity Score Analysis")
     
-    chatbot = HealthChatbot('data/health_qa_dataset.json')
+    chatbot = HealthChatbot.load(DEFAULT_ARTIFACT_PATH, 'data/health_qa_dataset.json')
     
     test_queries = [
         "dengue fever symptoms",
@@ -100,7 +102,7 @@ def demo_conversation_history():
     """Demonstrate conversation history tracking."""
     print_section("DEMO 4: Conversation History")
     
-    chatbot = HealthChatbot('data/health_qa_dataset.json')
+    chatbot = HealthChatbot.load(DEFAULT_ARTIFACT_PATH, 'data/health_qa_dataset.json')
     
     # Ask multiple questions
     queries = [
@@ -132,7 +134,8 @@ def demo_confidence_threshold():
     query = "I have a fever and body aches"
     
     for threshold in [0.2, 0.4, 0.6, 0.8]:
-        chatbot = HealthChatbot(
+        chatbot = HealthChatbot.load(
+            DEFAULT_ARTIFACT_PATH,
             dataset_path='data/health_qa_dataset.json',
             confidence_threshold=threshold
         )
@@ -147,7 +150,7 @@ def demo_alternative_suggestions():
     """Demonstrate alternative suggestion system."""
     print_section("DEMO 6: Alternative Suggestions")
     
-    chatbot = HealthChatbot('data/health_qa_dataset.json')
+    chatbot = HealthChatbot.load(DEFAULT_ARTIFACT_PATH, 'data/health_qa_dataset.json')
     
     query = "heart problems and chest pain"
     response = chatbot.answer_query(query)
@@ -168,7 +171,7 @@ def demo_category_analysis():
     """Demonstrate category-based analysis."""
     print_section("DEMO 7: Category Analysis")
     
-    chatbot = HealthChatbot('data/health_qa_dataset.json')
+    chatbot = HealthChatbot.load(DEFAULT_ARTIFACT_PATH, 'data/health_qa_dataset.json')
     
     # Sample from each category
     test_queries = [
@@ -209,7 +212,7 @@ def demo_export_results():
     """Demonstrate exporting results to JSON."""
     print_section("DEMO 8: Export Results to JSON")
     
-    chatbot = HealthChatbot('data/health_qa_dataset.json')
+    chatbot = HealthChatbot.load(DEFAULT_ARTIFACT_PATH, 'data/health_qa_dataset.json')
     
     queries = [
         "What is dengue?",
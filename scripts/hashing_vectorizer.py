@@ -0,0 +1,153 @@
+"""
+Hashing Vectorizer - TF-IDF Features without a Vocabulary
+Hashes n-grams into a fixed number of columns and weights them with a stored IDF vector
+"""
+
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+def _hash_chunk(hasher: HashingVectorizer, documents: list):
+    """Term counts of one chunk of documents (runs in a worker process)."""
+    return hasher.transform(documents)
+
+
+class HashingTfidfVectorizer:
+    """
+    TF-IDF vectorizer whose feature space is fixed by hashing.
+
+    Implements the part of ``TfidfVectorizer`` the index uses
+    (``fit_transform``, ``transform``, ``idf_`` and the tokenization
+    settings) on top of sklearn's stateless ``HashingVectorizer``: n-grams
+    are hashed into ``n_features`` columns, so there is no vocabulary dict
+    to build, store or pickle, memory is fixed regardless of corpus size,
+    and terms never seen during fitting still get a column. The only fitted state is the
+    IDF vector (one float per column).
+
+    Weighting matches ``TfidfVectorizer`` defaults: raw counts times
+    smoothed IDF, L2-normalized rows. Distinct n-grams sharing a column
+    (hash collisions) are counted together.
+    """
+
+    # Documents hashed per task when fitting in parallel
+    CHUNK_SIZE = 20_000
+
+    def __init__(self, n_features: int = 2 ** 18, idf: np.ndarray = None, n_jobs: int = None,
+                 **params):
+        """
+        Args:
+            n_features: Number of hashed columns
+            idf: Fitted IDF vector, if already known (e.g. from an artifact)
+            n_jobs: Worker processes used by ``fit_transform`` (default: CPU
+                count); corpora of one chunk are always hashed in-process
+            **params: Tokenization options passed to ``HashingVectorizer``
+                (lowercase, stop_words, ngram_range, ...)
+        """
+        self.n_features = n_features
+        self.n_jobs = n_jobs
+        self.params = params
+        self._hasher = HashingVectorizer(n_features=n_features, alternate_sign=False,
+                                         norm=None, **params)
+        self.idf_ = idf
+
+    def get_params(self) -> Dict:
+        """Parameters that define the feature space (saved with artifacts)."""
+        return dict(self.params, n_features=self.n_features)
+
+    @property
+    def ngram_range(self):
+        """Lengths of the hashed word n-grams."""
+        return self._hasher.ngram_range
+
+    @property
+    def lowercase(self) -> bool:
+        """Whether texts are lowercased before tokenizing."""
+        return self._hasher.lowercase
+
+    @property
+    def token_pattern(self) -> str:
+        """Regular expression matching one token."""
+        return self._hasher.token_pattern
+
+    def get_stop_words(self):
+        """Stop words removed before building n-grams, or None."""
+        return self._hasher.get_stop_words()
+
+    def with_idf(self, idf: np.ndarray) -> 'HashingTfidfVectorizer':
+        """Return a vectorizer with the same feature space and new IDF weights."""
+        return HashingTfidfVectorizer(self.n_features, idf, self.n_jobs, **self.params)
+
+    def _count_chunks(self, documents: Iterable[str]):
+        """Yield term-count matrices for consecutive chunks of ``documents``."""
+        documents = iter(documents)
+        first = list(islice(documents, self.CHUNK_SIZE))
+        second = list(islice(documents, self.CHUNK_SIZE))
+        n_jobs = self.n_jobs or os.cpu_count() or 1
+        if not second or n_jobs == 1:
+            for chunk in (first, second):
+                if chunk:
+                    yield self._hasher.transform(chunk)
+            while True:
+                chunk = list(islice(documents, self.CHUNK_SIZE))
+                if not chunk:
+                    return
+                yield self._hasher.transform(chunk)
+
+        # Keep at most two chunks per worker in flight so a streamed corpus
+        # is never held in memory as text
+        with ProcessPoolExecutor(max_workers=n_jobs,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            pending = deque([pool.submit(_hash_chunk, self._hasher, first),
+                             pool.submit(_hash_chunk, self._hasher, second)])
+            while pending:
+                while len(pending) < 2 * n_jobs:
+                    chunk = list(islice(documents, self.CHUNK_SIZE))
+                    if not chunk:
+                        break
+                    pending.append(pool.submit(_hash_chunk, self._hasher, chunk))
+                yield pending.popleft().result()
+
+    def fit_transform(self, documents: Iterable[str]):
+        """
+        Learn IDF weights from ``documents`` and return their TF-IDF matrix.
+
+        Chunks of documents are hashed in parallel; document frequencies
+        are summed per chunk, so fitting needs no shared state.
+
+        Args:
+            documents: Iterable of texts (consumed once)
+
+        Returns:
+            CSR matrix of shape (n_documents, n_features)
+        """
+        chunks = list(self._count_chunks(documents))
+        counts = sp.vstack(chunks, format='csr') if chunks else sp.csr_matrix((0, self.n_features))
+        document_frequency = np.bincount(counts.indices, minlength=self.n_features)
+        # sklearn's smoothed IDF, as used by TfidfVectorizer
+        self.idf_ = np.log((counts.shape[0] + 1) / (document_frequency + 1.0)) + 1
+        return self._weight(counts)
+
+    def transform(self, documents: Iterable[str]):
+        """
+        Vectorize ``documents`` with the fitted IDF weights.
+
+        Args:
+            documents: Iterable of texts
+
+        Returns:
+            CSR matrix of shape (n_documents, n_features)
+        """
+        return self._weight(self._hasher.transform(documents))
+
+    def _weight(self, counts):
+        """Apply IDF weights and L2 normalization to a count matrix."""
+        counts.data = counts.data * self.idf_[counts.indices]
+        return normalize(counts)
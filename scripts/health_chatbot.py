@@ -3,114 +3,322 @@ Health Chatbot - Semantic Similarity Based Question Answering System
 Implements TF-IDF and cosine similarity for intelligent health query matching
 """
 
-import json
 import numpy as np
-from typing import Dict, List, Tuple
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import re
+from typing import Dict, Iterator, List, Tuple
 from datetime import datetime
+from health_index import HealthIndex
+import model_artifact
+from response_cache import ResponseCache
+from conversation_history import ConversationHistory, JsonlHistoryWriter
+from instrumentation import Instrumentation, NULL_STOPWATCH
+from lazy_response import LazyResponse
 
 
 class HealthChatbot:
     """
     Health Chatbot using TF-IDF and cosine similarity for semantic matching.
     Provides answers with confidence scores and explanations.
+    
+    A chatbot is a cheap session (threshold, history, optional cache) on top
+    of an immutable ``HealthIndex``. Sessions created with ``new_session`` or
+    ``from_index`` share one index, so each thread can have its own session
+    without copying the model. Threads do not raise throughput, as most of
+    a query runs under the GIL; use several processes (``server.py
+    --processes``) for that, see ``HealthIndex``.
     """
     
-    def __init__(self, dataset_path: str, confidence_threshold: float = 0.3):
+    # Default number of queries scored per sparse matrix product in batches
+    BATCH_CHUNK_SIZE = 1024
+    
+    # Number of recent conversation entries kept in memory
+    HISTORY_WINDOW = 1000
+    
+    # Common words never reported as matched keywords in explanations
+    KEYWORD_STOP_WORDS = frozenset({'what', 'is', 'the', 'a', 'an', 'how', 'to', 'for', 'can', 'do', 'about', 'are', 'symptoms', 'treatment', 'prevent', 'prevention'})
+    
+    # Model settings, defined by the index
+    VECTORIZER_PARAMS = HealthIndex.VECTORIZER_PARAMS
+    SCORERS = HealthIndex.SCORERS
+    FEATURES = HealthIndex.FEATURES
+    PRECISIONS = HealthIndex.PRECISIONS
+    
+    # Response fields a LazyResponse builds on first access
+    DEFERRED_FIELDS = frozenset({'explanation', 'alternatives'})
+    
+    # Incremental updates: recompute IDF after this many added/removed
+    # pairs, and compact once this many tombstones or appended (not yet
+    # folded) pairs accumulate (None: manual)
+    IDF_REFRESH_UPDATES = 1000
+    COMPACT_TOMBSTONES = 256
+    COMPACT_DELTA_ROWS = 4096
+    
+    def __init__(self, dataset_path: str, confidence_threshold: float = 0.3,
+                 scorer: str = 'dense', features: str = 'tfidf', precision: str = 'float64',
+                 scorer_options: Dict[str, Dict] = None):
         """
         Initialize the chatbot with dataset.
         
         Args:
-            dataset_path: Path to JSON dataset with Q&A pairs
+            dataset_path: Path to JSON (or JSONL) dataset with Q&A pairs
             confidence_threshold: Minimum similarity score for valid answers (0-1)
+            scorer: Retrieval engine, 'dense' (score every question),
+                'inverted' (postings-based candidate retrieval), 'sharded'
+                (questions split across a process pool) or 'ivf'
+                (approximate: LSA clusters nearest to the query, re-scored
+                exactly)
+            features: Feature backend, 'tfidf' (fitted vocabulary of at most
+                ``VECTORIZER_PARAMS['max_features']`` terms) or 'hashing'
+                (hashed n-grams with a stored IDF vector, no vocabulary)
+            precision: Storage precision of the TF-IDF matrices, 'float64'
+                (exact), 'float32', or 'uint8' (scoring weights quantized
+                with one scale per term); lower precisions shift scores by
+                a small error, see ``benchmark.py suite``
+            scorer_options: Constructor arguments of each scorer by name,
+                e.g. ``{'ivf': {'n_probe': 16, 'shortlist': 512}}`` (shared
+                by every session of the index)
         """
-        self.confidence_threshold = confidence_threshold
-        self.vectorizer = TfidfVectorizer(
-            lowercase=True,
-            stop_words='english',
-            max_features=500,
-            ngram_range=(1, 2)
-        )
+        self._check_scorer(scorer)
+        self._init_session(HealthIndex.from_dataset(dataset_path, features, precision, scorer_options),
+                           confidence_threshold, scorer)
+        self._print_summary()
+    
+    @classmethod
+    def from_index(cls, index: HealthIndex, confidence_threshold: float = 0.3,
+                   scorer: str = 'dense') -> 'HealthChatbot':
+        """
+        Create a session on an existing index (no fitting, no copies).
+        
+        Args:
+            index: Shared, fitted HealthIndex
+            confidence_threshold: Minimum similarity score for valid answers (0-1)
+            scorer: Retrieval engine, see ``__init__``
+            
+        Returns:
+            New HealthChatbot with empty history
+        """
+        cls._check_scorer(scorer)
+        chatbot = cls.__new__(cls)
+        chatbot._init_session(index, confidence_threshold, scorer)
+        return chatbot
+    
+    @classmethod
+    def load(cls, artifact_path: str = model_artifact.DEFAULT_ARTIFACT_PATH,
+             dataset_path: str = None, confidence_threshold: float = 0.3,
+             scorer: str = 'dense', features: str = 'tfidf',
+             precision: str = 'float64', scorer_options: Dict[str, Dict] = None,
+             verify_dataset: bool = False) -> 'HealthChatbot':
+        """
+        Load a compiled model without refitting TF-IDF.
+        
+        Matrices and texts are memory-mapped read-only, so startup cost is
+        independent of corpus size and processes loading the same artifact
+        share its physical pages.
+        
+        Args:
+            artifact_path: Directory written by ``save``
+            dataset_path: Source dataset; when given, a missing or stale
+                artifact (dataset hash, feature backend or TF-IDF settings
+                changed) is rebuilt first, otherwise a stale artifact raises
+                ValueError
+            confidence_threshold: Minimum similarity score for valid answers (0-1)
+            scorer: Retrieval engine, see ``__init__``
+            features: Feature backend, see ``__init__``
+            precision: Storage precision, see ``__init__``
+            scorer_options: Scorer arguments, see ``__init__``
+            verify_dataset: Hash the dataset even if its size and mtime are unchanged
+            
+        Returns:
+            Ready-to-use HealthChatbot
+        """
+        cls._check_scorer(scorer)
+        index = HealthIndex.load(artifact_path, dataset_path, features, precision, scorer_options,
+                                 verify_dataset)
+        chatbot = cls.from_index(index, confidence_threshold, scorer)
+        chatbot._print_summary()
+        return chatbot
+    
+    def new_session(self, confidence_threshold: float = None, scorer: str = None) -> 'HealthChatbot':
+        """
+        Create another session sharing this chatbot's index.
         
-        # Load dataset
-        self.qa_pairs = self._load_dataset(dataset_path)
-        self.questions = [qa['question'].lower() for qa in self.qa_pairs]
+        Args:
+            confidence_threshold: Override for the new session (default: this one's)
+            scorer: Override for the new session (default: this one's)
+            
+        Returns:
+            New HealthChatbot with empty history and no cache
+        """
+        return self.from_index(
+            self.index,
+            self.confidence_threshold if confidence_threshold is None else confidence_threshold,
+            scorer or self.scorer
+        )
+    
+    @classmethod
+    def _check_scorer(cls, scorer: str):
+        if scorer not in cls.SCORERS:
+            raise ValueError(f"Unknown scorer '{scorer}', expected one of {sorted(cls.SCORERS)}")
+    
+    def _init_session(self, index: HealthIndex, confidence_threshold: float, scorer: str):
+        """Set up per-session state on a fitted index."""
+        self.index = index
+        self.confidence_threshold = confidence_threshold
+        self.scorer = scorer
+        index.scorer(scorer)
         
-        # Build TF-IDF matrix for questions
-        self.tfidf_matrix = self.vectorizer.fit_transform(self.questions)
+        # Store conversation history (recent window in memory, see configure_history)
+        self.conversation_history = ConversationHistory(max_entries=self.HISTORY_WINDOW)
         
-        # Store conversation history
-        self.conversation_history = []
+        # Optional response cache (see enable_cache)
+        self._cache = None
         
+        # Optional per-stage latency histograms (see enable_instrumentation)
+        self._instrumentation = None
+    
+    @property
+    def vectorizer(self):
+        """Fitted TF-IDF vectorizer of the shared index."""
+        return self.index.vectorizer
+    
+    @property
+    def qa_pairs(self):
+        """Q&A records of the shared index."""
+        return self.index.qa_pairs
+    
+    @property
+    def questions(self):
+        """Lowercased questions of the shared index."""
+        return self.index.questions
+    
+    @property
+    def tfidf_matrix(self):
+        """Question-major TF-IDF matrix of the shared index (appended pairs included), derived on each access."""
+        return self.index.question_matrix()
+    
+    @property
+    def dataset_path(self) -> str:
+        """Dataset the shared index was built from."""
+        return self.index.dataset_path
+    
+    def _print_summary(self):
+        """Print the model size after initialization."""
         print(f"✓ Chatbot initialized with {len(self.qa_pairs)} Q&A pairs")
         print(f"✓ Confidence threshold: {self.confidence_threshold}")
-        print(f"✓ TF-IDF vocabulary size: {len(self.vectorizer.get_feature_names_out())}\n")
-    
-    def _load_dataset(self, dataset_path: str) -> List[Dict]:
-        """Load Q&A dataset from JSON file."""
-        try:
-            with open(dataset_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return data['qa_pairs']
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Dataset not found: {dataset_path}")
-        except json.JSONDecodeError:
-            raise ValueError(f"Invalid JSON in dataset: {dataset_path}")
-    
-    def _extract_keywords_from_query(self, query: str) -> List[str]:
-        """Extract important keywords from query for explanation."""
-        # Remove common words and extract meaningful keywords
-        stop_words = {'what', 'is', 'the', 'a', 'an', 'how', 'to', 'for', 'can', 'do', 'about', 'are', 'symptoms', 'treatment', 'prevent', 'prevention'}
-        words = re.findall(r'\b\w+\b', query.lower())
-        keywords = [w for w in words if w not in stop_words and len(w) > 2]
-        return keywords
-    
-    def _get_matched_keywords(self, query_keywords: List[str], qa_id: int) -> List[str]:
-        """Find which keywords matched from the Q&A pair."""
-        qa_keywords = set(self.qa_pairs[qa_id]['keywords'])
-        matched = [kw for kw in query_keywords if kw in qa_keywords]
-        return matched
-    
-    def answer_query(self, query: str, return_top_n: int = 3) -> Dict:
+        if self.index.features == 'hashing':
+            print(f"✓ Hashed feature columns: {self.index.analyzer.n_features}\n")
+        else:
+            print(f"✓ TF-IDF vocabulary size: {self.index.analyzer.n_features}\n")
+    
+    def save(self, artifact_path: str):
         """
-        Answer a health query with similarity scores and explanations.
+        Compile the fitted model into a memory-mappable artifact.
         
         Args:
-            query: User's health question
-            return_top_n: Number of top results to consider (default: 3)
-            
-        Returns:
-            Dictionary with answer, confidence, explanation, and alternatives
+            artifact_path: Directory to write (created if missing)
         """
-        query_lower = query.lower().strip()
+        self.index.save(artifact_path)
+    
+    def add_qa_pairs(self, qa_pairs: List[Dict]):
+        """
+        Add Q&A pairs without refitting the TF-IDF model.
         
-        if not query_lower:
-            return self._get_fallback_response("Please enter a valid question.")
+        New questions are weighted with the current vocabulary and IDF; IDF
+        is recomputed after IDF_REFRESH_UPDATES changes (or by calling
+        ``refresh_idf``). Other sessions keep the index they were created
+        with; sessions made afterwards with ``new_session`` share the update.
         
-        # Vectorize the query using same TF-IDF
-        query_vector = self.vectorizer.transform([query_lower])
+        Args:
+            qa_pairs: Records with id, question, answer, category and keywords
+        """
+        self._apply(self.index.apply_updates(add=qa_pairs))
+    
+    def remove_qa_pair(self, qa_id: int):
+        """
+        Remove a Q&A pair; it is tombstoned until the next compaction.
         
-        # Calculate cosine similarity with all questions
-        similarities = cosine_similarity(query_vector, self.tfidf_matrix)[0]
+        Args:
+            qa_id: Id of the pair to remove
+        """
+        self._apply(self.index.apply_updates(remove=[qa_id]))
+    
+    def update_qa_pair(self, qa_id: int, changes: Dict):
+        """
+        Replace fields of a Q&A pair (e.g. a corrected answer or question).
         
-        # Get top matches
-        top_indices = np.argsort(similarities)[::-1][:return_top_n]
-        top_scores = similarities[top_indices]
+        Args:
+            qa_id: Id of the pair to update
+            changes: Fields to overwrite
+        """
+        updated = dict(self.index.get_qa_pair(qa_id), **changes)
+        self._apply(self.index.apply_updates(add=[updated], remove=[qa_id]))
+    
+    def refresh_idf(self):
+        """Recompute IDF weights from the current pairs (no vocabulary refit)."""
+        self._apply(self.index.refresh_idf())
+    
+    def compact(self):
+        """Physically drop removed pairs from the index."""
+        self._apply(self.index.compact())
+    
+    def _apply(self, index: HealthIndex):
+        """Run scheduled maintenance on an updated index and switch to it."""
+        if self.IDF_REFRESH_UPDATES is not None and index.updates_since_idf >= self.IDF_REFRESH_UPDATES:
+            index = index.refresh_idf()
+        if ((self.COMPACT_TOMBSTONES is not None and len(index.deleted) >= self.COMPACT_TOMBSTONES)
+                or (self.COMPACT_DELTA_ROWS is not None and index.n_delta >= self.COMPACT_DELTA_ROWS)):
+            index = index.compact()
+        # Scorers of a new base are built by the first query that needs them
+        self.index = index
+    
+    def drift_report(self, queries: List[str] = None, k: int = 3) -> Dict:
+        """
+        Compare incremental scores against a full refit of the current pairs.
         
-        # Extract keywords for explanation
-        query_keywords = self._extract_keywords_from_query(query)
+        Args:
+            queries: Queries to compare (default: the current questions)
+            k: Number of matches compared per query
+            
+        Returns:
+            Dictionary of drift metrics, see HealthIndex.drift_report
+        """
+        return self.index.drift_report(queries, k)
+    
+    def _extract_keywords_from_query(self, query_tokens: List[str]) -> List[str]:
+        """Extract important keywords for explanation from the query's tokens."""
+        # The vectorizer's tokens are the query's words of two or more
+        # characters, so the same tokenization serves both steps
+        stop_words = self.KEYWORD_STOP_WORDS
+        return [w for w in query_tokens if len(w) > 2 and w not in stop_words]
+    
+    def _get_matched_keywords(self, query_keywords: List[str], qa_keywords: frozenset) -> List[str]:
+        """Find which keywords matched from the Q&A pair's keyword set."""
+        return [kw for kw in query_keywords if kw in qa_keywords]
+    
+    def answer_query(self, query: str, return_top_n: int = 3, lazy: bool = False) -> Dict:
+        """
+        Answer a health query with similarity scores and explanations.
         
+        Args:
+            query: User's health question
+            return_top_n: Number of top results to consider (default: 3)
+            lazy: Return a LazyResponse whose explanation and alternatives
+                are only built when read
+            
+        Returns:
+            Dictionary with answer, confidence, explanation, and alternatives
+        """
+        return self._answer_chunk([query], return_top_n, lazy=lazy)[0]
+    
+    def _build_response(self, qa_pairs, query_tokens: List[str], top_indices: np.ndarray, top_scores: np.ndarray,
+                        watch=NULL_STOPWATCH, lazy: bool = False) -> Dict:
+        """Build the response dict for one query from its ranked matches in ``qa_pairs``."""
         # Main result
         best_idx = top_indices[0]
         best_score = top_scores[0]
         
         # Create response
         if best_score >= self.confidence_threshold:
-            best_qa = self.qa_pairs[best_idx]
-            matched_keywords = self._get_matched_keywords(query_keywords, best_idx)
-            
+            best_qa = qa_pairs[best_idx]
             response = {
                 'success': True,
                 'answer': best_qa['answer'],
@@ -118,18 +326,18 @@ class HealthChatbot:
                 'question_id': best_qa['id'],
                 'category': best_qa['category'],
                 'matched_question': best_qa['question'],
-                'explanation': self._generate_explanation(
-                    best_score, 
-                    best_qa, 
-                    query_keywords,
-                    matched_keywords
-                ),
-                'alternatives': self._get_alternatives(top_indices[1:], top_scores[1:]),
+                'explanation': None,
+                'alternatives': None,
                 'similarity_scores': {
                     'best_match': float(best_score),
                     'all_top_3': [float(s) for s in top_scores]
                 }
             }
+            details = (qa_pairs, query_tokens, best_qa, best_score, top_indices, top_scores)
+            if lazy:
+                return LazyResponse(response, self.DEFERRED_FIELDS, self._build_detail, details)
+            response['explanation'] = self._build_detail('explanation', *details, watch=watch)
+            response['alternatives'] = self._build_detail('alternatives', *details, watch=watch)
         else:
             response = self._get_fallback_response(
                 f"Confidence too low (score: {best_score:.2%}). Please rephrase or consult a medical professional."
@@ -139,14 +347,46 @@ class HealthChatbot:
                 'all_top_3': [float(s) for s in top_scores]
             }
         
-        # Store in history
+        return response
+    
+    def _build_detail(self, field: str, qa_pairs, query_tokens: List[str], best_qa: Dict, best_score: float,
+                      top_indices: np.ndarray, top_scores: np.ndarray, watch=NULL_STOPWATCH):
+        """Build the 'explanation' or 'alternatives' field of a successful response."""
+        if field == 'explanation':
+            # Extract keywords for explanation
+            query_keywords = self._extract_keywords_from_query(query_tokens)
+            matched_keywords = self._get_matched_keywords(query_keywords, qa_pairs.keyword_set(top_indices[0]))
+            watch.lap('keywords')
+            explanation = self._generate_explanation(
+                best_score, 
+                best_qa, 
+                query_keywords,
+                matched_keywords
+            )
+            watch.lap('explanation')
+            return explanation
+        
+        alternatives = self._get_alternatives(qa_pairs, top_indices[1:], top_scores[1:])
+        watch.lap('alternatives')
+        return alternatives
+    
+    def _record_history(self, query: str, response: Dict):
+        """
+        Store a query and its response in the conversation history.
+        
+        Only the fields needed to review a conversation are kept; the answer
+        itself is referenced by ``question_id`` rather than copied.
+        """
         self.conversation_history.append({
             'timestamp': datetime.now().isoformat(),
             'query': query,
-            'response': response
+            'response': {
+                'success': response['success'],
+                'confidence': response['confidence'],
+                'question_id': response['question_id'],
+                'category': response['category']
+            }
         })
-        
-        return response
     
     def _generate_explanation(self, 
                              similarity_score: float, 
@@ -165,12 +405,12 @@ class HealthChatbot:
         
         return explanation
     
-    def _get_alternatives(self, alt_indices: np.ndarray, alt_scores: np.ndarray) -> List[Dict]:
+    def _get_alternatives(self, qa_pairs, alt_indices: np.ndarray, alt_scores: np.ndarray) -> List[Dict]:
         """Get alternative answers if confidence is low."""
         alternatives = []
         for idx, score in zip(alt_indices, alt_scores):
             if score > 0.1:  # Show alternatives with minimal relevance
-                qa = self.qa_pairs[idx]
+                qa = qa_pairs[idx]
                 alternatives.append({
                     'answer': qa['answer'],
                     'confidence': float(score),
@@ -196,8 +436,27 @@ class HealthChatbot:
         }
     
     def get_conversation_history(self) -> List[Dict]:
-        """Get the conversation history."""
-        return self.conversation_history
+        """Get the recent conversation history (the in-memory window)."""
+        return self.conversation_history.recent()
+    
+    def iter_conversation_history(self) -> Iterator[Dict]:
+        """Stream the full conversation history, from the on-disk log if configured."""
+        return iter(self.conversation_history)
+    
+    def configure_history(self, max_entries: int = HISTORY_WINDOW, log_path: str = None,
+                          flush_interval: float = 1.0):
+        """
+        Replace the history sink.
+        
+        Args:
+            max_entries: Number of recent entries kept in memory
+            log_path: JSONL file receiving every entry, written in batches by
+                a background thread (None keeps history in memory only)
+            flush_interval: Maximum seconds before queued entries are written
+        """
+        self.conversation_history.close()
+        writer = JsonlHistoryWriter(log_path, flush_interval=flush_interval) if log_path else None
+        self.conversation_history = ConversationHistory(max_entries=max_entries, writer=writer)
     
     def get_similarity_scores_for_testing(self, test_queries: List[str]) -> List[float]:
         """
@@ -209,17 +468,174 @@ class HealthChatbot:
         Returns:
             List of best similarity scores for each query
         """
+        index = self.index
         scores = []
-        for query in test_queries:
-            query_vector = self.vectorizer.transform([query.lower()])
-            similarities = cosine_similarity(query_vector, self.tfidf_matrix)[0]
-            best_score = np.max(similarities)
-            scores.append(float(best_score))
+        for start in range(0, len(test_queries), self.BATCH_CHUNK_SIZE):
+            chunk = [q.lower() for q in test_queries[start:start + self.BATCH_CHUNK_SIZE]]
+            _, best_scores = index.rank(index.vectorize(chunk), 1, self.scorer)
+            scores.extend(float(s) for s in best_scores[:, 0])
         return scores
     
-    def batch_answer(self, queries: List[str]) -> List[Dict]:
-        """Answer multiple queries at once."""
-        return [self.answer_query(q) for q in queries]
+    def batch_answer(self, queries: List[str], return_top_n: int = 3,
+                     chunk_size: int = None, record_history: bool = True,
+                     lazy: bool = False) -> List[Dict]:
+        """
+        Answer multiple queries at once.
+        
+        Queries are vectorized together and scored with one sparse matrix
+        product per chunk, so memory stays bounded by
+        ``chunk_size x number of Q&A pairs`` similarity values.
+        
+        Args:
+            queries: List of user queries
+            return_top_n: Number of top results to consider (default: 3)
+            chunk_size: Queries scored per matrix product (default: BATCH_CHUNK_SIZE)
+            record_history: Append the queries to the conversation history;
+                with False (and no cache) the call does not modify the chatbot
+            lazy: Return LazyResponse objects that build explanations and
+                alternatives only when read (for callers reading a few fields)
+            
+        Returns:
+            List of responses, identical to calling answer_query on each query
+        """
+        chunk_size = chunk_size or self.BATCH_CHUNK_SIZE
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        
+        responses = []
+        for start in range(0, len(queries), chunk_size):
+            responses.extend(self._answer_chunk(
+                queries[start:start + chunk_size], return_top_n, record_history, lazy
+            ))
+        return responses
+    
+    def _answer_chunk(self, queries: List[str], return_top_n: int,
+                      record_history: bool = True, lazy: bool = False) -> List[Dict]:
+        """Answer one chunk of a batch with a single vectorize/score/top-n pass."""
+        # One snapshot for the whole chunk, even if an update swaps it meanwhile
+        index = self.index
+        watch = self._instrumentation.stopwatch() if self._instrumentation is not None else NULL_STOPWATCH
+        if self._cache is not None:
+            self._cache.validate((self.confidence_threshold, index.generation))
+        
+        lowered = [q.lower().strip() for q in queries]
+        responses = [None] * len(queries)
+        pending = [i for i, query_lower in enumerate(lowered) if query_lower]
+        # Each query is analyzed once; its tokens and term ids serve the
+        # cache key, the TF-IDF vector and keyword matching
+        analyzed = dict(zip(pending, index.analyze([lowered[i] for i in pending])))
+        cache_keys = {}
+        if self._cache is not None:
+            misses = []
+            for i in pending:
+                cache_keys[i] = self._cache_key(analyzed[i].tokens, return_top_n)
+                responses[i] = self._cache.get(cache_keys[i])
+                if responses[i] is None:
+                    misses.append(i)
+            pending = misses
+            watch.lap('cache_lookup')
+        
+        if pending:
+            # Vectorize the analyzed queries using same TF-IDF, then score
+            # them against the questions and get top matches in one pass
+            query_matrix = index.vectorize_analyzed([analyzed[i] for i in pending])
+            watch.lap('vectorize')
+            top_indices, top_scores = index.rank(query_matrix, return_top_n, self.scorer)
+            watch.lap('rank')
+        
+        # Chunk-level stages are shared by every response of the chunk
+        chunk_laps = watch.take_laps()
+        item_laps = {}
+        for row, i in enumerate(pending):
+            responses[i] = self._build_response(
+                index.qa_pairs, analyzed[i].tokens, top_indices[row], top_scores[row], watch, lazy
+            )
+            watch.lap('response')
+            if self._cache is not None:
+                self._cache.put(cache_keys[i], responses[i])
+                watch.lap('cache_store')
+            item_laps[i] = watch.take_laps()
+        
+        for i, query in enumerate(queries):
+            if responses[i] is None:
+                responses[i] = self._get_fallback_response("Please enter a valid question.")
+            elif record_history:
+                self._record_history(query, responses[i])
+                watch.lap('history')
+            if chunk_laps is not None:
+                timings = dict(chunk_laps, **item_laps.get(i, {}))
+                timings.update(watch.take_laps())
+                responses[i]['timings_ms'] = timings
+        
+        watch.finish()
+        return responses
+    
+    def enable_cache(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Put a bounded LRU response cache in front of answer_query and batch_answer.
+        
+        Queries are keyed on the scorer and their analyzed tokens minus the
+        stop words that neither TF-IDF nor keyword matching use, so phrasings
+        that can only produce the same response share an entry. The cache
+        empties itself when the confidence threshold or the index changes;
+        it tracks the index by ``HealthIndex.generation``, so replaced
+        indices are not kept alive by the cache.
+        
+        Args:
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum approximate size of the cached responses
+        """
+        self._cache_stop_words = frozenset(
+            w for w in self.index.analyzer.stop_words
+            if w in self.KEYWORD_STOP_WORDS or len(w) <= 2
+        )
+        self._cache = ResponseCache(max_entries=max_entries, max_bytes=max_bytes)
+    
+    def disable_cache(self):
+        """Remove the response cache."""
+        self._cache = None
+    
+    def cache_stats(self) -> Dict:
+        """Return response cache counters, or None if caching is disabled."""
+        return self._cache.stats() if self._cache is not None else None
+    
+    def _cache_key(self, query_tokens: List[str], return_top_n: int) -> Tuple:
+        """Normalized cache key: the scorer and the query tokens that can influence the response."""
+        stop_words = self._cache_stop_words
+        return (self.scorer, return_top_n) + tuple(w for w in query_tokens if w not in stop_words)
+    
+    def enable_instrumentation(self, include_in_response: bool = False):
+        """
+        Record per-stage latencies of answer_query and batch_answer.
+        
+        Stages are cache_lookup, vectorize and rank (once per batch chunk),
+        keywords, explanation, alternatives, response, cache_store and
+        history (once per query) and total (once per chunk, i.e. per
+        answer_query call). While disabled, instrumentation costs one no-op
+        call per stage.
+        
+        Args:
+            include_in_response: Also add a 'timings_ms' dict to every
+                response (for debugging; chunk stages are shared by the chunk)
+        """
+        self._instrumentation = Instrumentation(include_in_response=include_in_response)
+    
+    def disable_instrumentation(self):
+        """Stop recording stage latencies and drop the histograms."""
+        self._instrumentation = None
+    
+    def stats(self) -> Dict:
+        """
+        Return per-stage latency summaries, or None if instrumentation is disabled.
+        
+        Returns:
+            Dict mapping stage name to count, mean, p50/p95/p99, max and total (ms)
+        """
+        return self._instrumentation.stats() if self._instrumentation is not None else None
+    
+    def prometheus_metrics(self, prefix: str = 'health_chatbot') -> str:
+        """Return the stage histograms in Prometheus text format ('' if disabled)."""
+        return self._instrumentation.prometheus(prefix) if self._instrumentation is not None else ''
     
     def print_response(self, response: Dict) -> str:
         """Pretty print a chatbot response."""
@@ -241,7 +657,8 @@ class HealthChatbot:
 def main():
     """Demo of the chatbot."""
     # Initialize chatbot
-    chatbot = HealthChatbot(
+    chatbot = HealthChatbot.load(
+        model_artifact.DEFAULT_ARTIFACT_PATH,
         dataset_path='data/health_qa_dataset.json',
         confidence_threshold=0.3
     )
@@ -0,0 +1,719 @@
+"""
+Health Index - Immutable, Shareable TF-IDF Model
+Holds the fitted vectorizer, Q&A records and scoring engines used by chatbot sessions
+"""
+
+import itertools
+import threading
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, Iterable, List, Tuple
+from scoring import DenseScorer, top_k
+from inverted_index import InvertedIndex
+from sharded_scorer import ShardedScorer
+from ann_index import IVFScorer
+import model_artifact
+import dataset_loader
+from qa_store import AppendedQAStore, LowercaseQuestions, QAStore
+from quantization import PRECISIONS, dequantize_rows, quantize_rows, scale_queries, storage_dtype
+from text_analyzer import AnalyzedQuery, QueryAnalyzer, normalize_rows_l2
+
+
+class HealthIndex:
+    """
+    Fitted model shared read-only by any number of chatbot sessions.
+
+    Nothing in an index changes after construction: its arrays are marked
+    read-only and scorers only read them, so one index can serve many
+    threads (or, through a memory-mapped artifact, many processes) without
+    locks or copies of the matrix. Per-user state such as history and the
+    confidence threshold lives in ``HealthChatbot`` sessions.
+
+    Sharing is safe but does not add throughput: tokenizing queries and
+    selecting matches run as Python code under the GIL, so more threads
+    answer no more queries per second (see ``benchmark.py concurrency``).
+    Scale out with processes that memory-map one artifact
+    (``server.py --processes``) or with the 'sharded' scorer instead.
+
+    The TF-IDF weights are held once, as the term-major scoring matrix
+    (quantized for 'uint8'); question-major rows are derived from it only
+    where they are read, such as ``question_matrix``.
+
+    Incremental updates (``apply_updates``, ``refresh_idf``, ``compact``)
+    return a new snapshot instead of modifying the index. Removed pairs are
+    tombstoned: their rows stay in the matrix, which is shared with the
+    previous snapshot, and are skipped when ranking until compaction. Added
+    pairs go to a small delta block scored exactly next to the base
+    matrix, so snapshots share the base matrix and its scorers until
+    ``refresh_idf`` or ``compact`` folds the delta into a new base.
+    """
+
+    # TF-IDF settings; saved artifacts are rebuilt with the same parameters
+    VECTORIZER_PARAMS = {
+        'lowercase': True,
+        'stop_words': 'english',
+        'max_features': 500,
+        'ngram_range': (1, 2),
+    }
+
+    # Hashed-feature settings: same tokenization, no vocabulary limit
+    HASHING_PARAMS = {
+        'lowercase': True,
+        'stop_words': 'english',
+        'ngram_range': (1, 2),
+        'n_features': 2 ** 18,
+    }
+
+    # Feature backends: 'tfidf' (fitted vocabulary of VECTORIZER_PARAMS
+    # terms) or 'hashing' (HashingTfidfVectorizer, fixed-size feature space)
+    FEATURES = ('tfidf', 'hashing')
+
+    # Storage precision of the matrices: 'float64' (exact), 'float32', or
+    # 'uint8' scoring weights with one scale per term (float32 otherwise)
+    PRECISIONS = PRECISIONS
+
+    # Available retrieval engines, built from the term-major TF-IDF matrix
+    SCORERS = {
+        'dense': DenseScorer,
+        'inverted': InvertedIndex,
+        'sharded': ShardedScorer,
+        'ivf': IVFScorer,
+    }
+
+    # Source of ``generation``, unique per index (and snapshot) in a process
+    _generations = itertools.count()
+
+    def __init__(self, vectorizer, qa_pairs: QAStore, tfidf_matrix_t, dataset_path: str = None,
+                 deleted: frozenset = frozenset(), updates_since_idf: int = 0, features: str = 'tfidf',
+                 term_scales: np.ndarray = None, precision: str = 'float64',
+                 analyzer: QueryAnalyzer = None, delta_matrix=None,
+                 scorer_options: Dict[str, Dict] = None):
+        """
+        Wrap a fitted model; use ``from_dataset`` or ``load`` to create one.
+
+        Args:
+            vectorizer: Fitted TfidfVectorizer (or HashingTfidfVectorizer),
+                or None to rebuild it from ``analyzer`` on first use
+            qa_pairs: Q&A store in matrix order (base rows, then delta rows)
+            tfidf_matrix_t: Term-major, re-normalized scoring matrix of the
+                base rows (uint8 codes for 'uint8' precision)
+            dataset_path: Dataset the model was fitted on, if the index
+                still matches it (None after incremental updates)
+            deleted: Row positions of tombstoned pairs
+            updates_since_idf: Pairs added or removed since IDF was computed
+            features: Feature backend of ``vectorizer``, one of ``FEATURES``
+            term_scales: Per-term scales of a 'uint8' scoring matrix
+            precision: Storage precision of the matrix, one of ``PRECISIONS``
+            analyzer: Query analyzer of the model (built from ``vectorizer``
+                when omitted)
+            delta_matrix: Question-major TF-IDF rows appended after the base
+                rows (stored at ``precision``), or None
+            scorer_options: Constructor arguments of each scorer by name,
+                e.g. ``{'ivf': {'n_probe': 16, 'shortlist': 512}}``
+        """
+        scorer_options = dict(scorer_options or {})
+        for name in scorer_options:
+            self._check_scorer(name)
+        self._vectorizer = vectorizer
+        self.features = features
+        self.precision = precision
+        self.term_scales = term_scales
+        self.qa_pairs = qa_pairs
+        self.questions = LowercaseQuestions(qa_pairs)
+        self.tfidf_matrix_t = tfidf_matrix_t
+        self.delta_matrix = delta_matrix
+        self.dataset_path = dataset_path
+        self.deleted = frozenset(deleted)
+        self.updates_since_idf = updates_since_idf
+        self.scorer_options = scorer_options
+        # Identifies this snapshot without holding a reference to it
+        self.generation = next(self._generations)
+
+        self._deleted_mask = np.zeros(len(qa_pairs), dtype=bool)
+        self._deleted_mask[list(self.deleted)] = True
+
+        # Counted from the matrices when first needed (see refresh_idf)
+        self._document_frequency = None
+
+        # Appended rows are few, so they are always scored exactly, with
+        # their own (uint8) scales, and merged with the base scorer's results
+        self._delta_scorer = self._delta_scales = None
+        if delta_matrix is not None:
+            delta_matrix_t, self._delta_scales = self._scoring_matrices(delta_matrix, precision)
+            self._delta_scorer = DenseScorer(delta_matrix_t)
+
+        for matrix in (tfidf_matrix_t, delta_matrix):
+            if matrix is not None:
+                for array in (matrix.data, matrix.indices, matrix.indptr):
+                    array.flags.writeable = False
+        for array in (self._deleted_mask, term_scales, self._delta_scales):
+            if array is not None:
+                array.flags.writeable = False
+
+        # Query-side analysis: tokens and feature columns computed once per
+        # query, shared by vectorization, keyword matching and cache keys
+        self.analyzer = analyzer or QueryAnalyzer.from_vectorizer(vectorizer, features)
+
+        # Row position of every live Q&A id: a map built on first use and
+        # shared with later snapshots, plus the ids each update changed
+        # since (None marks a removed id), so updates copy only the latter
+        self._positions = None
+        self._position_changes = {}
+
+        # Scorers of the base matrices are built on first use; building is
+        # the only guarded step. Snapshots with the same base share both.
+        self._scorers = {}
+        self._scorer_lock = threading.Lock()
+        # Scorers of the previous base that can index this one without
+        # retraining (see IVFScorer.reindex); each is used once
+        self._previous_scorers = {}
+
+    @property
+    def n_base(self) -> int:
+        """Number of rows in the base scoring matrix."""
+        return self.tfidf_matrix_t.shape[1]
+
+    @property
+    def n_delta(self) -> int:
+        """Number of appended rows not yet folded into the base matrix."""
+        return 0 if self.delta_matrix is None else self.delta_matrix.shape[0]
+
+    @property
+    def document_frequency(self) -> np.ndarray:
+        """Live pairs containing each feature column, counted on first use."""
+        if self._document_frequency is None:
+            matrix_t = self.tfidf_matrix_t
+            n_terms = matrix_t.shape[0]
+            terms = np.repeat(np.arange(n_terms), np.diff(matrix_t.indptr))
+            frequency = np.bincount(terms[~self._deleted_mask[matrix_t.indices]], minlength=n_terms)
+            if self.delta_matrix is not None:
+                live = np.flatnonzero(~self._deleted_mask[self.n_base:])
+                frequency += np.bincount(self.delta_matrix[live].indices, minlength=n_terms)
+            frequency.flags.writeable = False
+            self._document_frequency = frequency
+        return self._document_frequency
+
+    def _weights_t(self):
+        """Term-major, normalized weights of every row, base then appended ('uint8' codes dequantized)."""
+        weights_t = dequantize_rows(self.tfidf_matrix_t, self.term_scales)
+        if self.delta_matrix is None:
+            return weights_t
+        return sp.hstack([weights_t, self._normalized_t(self.delta_matrix, self.precision)], format='csr')
+
+    def question_matrix(self):
+        """
+        Question-major TF-IDF weights of every row, base and appended.
+
+        Derived from the scoring matrix on every call (dequantized for
+        'uint8'), so no question-major copy stays in memory.
+        """
+        return self._weights_t().T.tocsr()
+
+    @property
+    def vectorizer(self):
+        """
+        Fitted vectorizer of the model.
+
+        Loaded models answer queries through ``analyzer`` alone; the
+        scikit-learn vectorizer is rebuilt only when something needs it.
+        """
+        if self._vectorizer is None:
+            self._vectorizer = self._make_vectorizer(self.features, self.analyzer.vocabulary, self.analyzer.idf)
+        return self._vectorizer
+
+    @classmethod
+    def _check_features(cls, features: str):
+        if features not in cls.FEATURES:
+            raise ValueError(f"Unknown features '{features}', expected one of {list(cls.FEATURES)}")
+
+    @classmethod
+    def _check_scorer(cls, name: str):
+        if name not in cls.SCORERS:
+            raise ValueError(f"Unknown scorer '{name}', expected one of {sorted(cls.SCORERS)}")
+
+    @classmethod
+    def _check_precision(cls, precision: str):
+        if precision not in cls.PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {list(cls.PRECISIONS)}")
+
+    @staticmethod
+    def _normalized_t(tfidf_matrix, precision: str):
+        """Re-normalize a question-major TF-IDF matrix at the float type of ``precision`` and transpose it."""
+        from sklearn.utils.sparsefuncs_fast import inplace_csr_row_normalize_l2
+
+        # Re-normalizing gives query scoring, a single sparse-times-sparse
+        # product, the same rounding as sklearn's cosine_similarity (its row
+        # normalization, minus the input validation that dominates for the
+        # few rows of a delta block)
+        normalized = tfidf_matrix.astype(storage_dtype(precision))
+        inplace_csr_row_normalize_l2(normalized)
+        return normalized.T.tocsr()
+
+    @classmethod
+    def _scoring_matrices(cls, tfidf_matrix, precision: str) -> Tuple:
+        """
+        Build the term-major scoring matrix of a question-major TF-IDF matrix.
+
+        Returns:
+            Tuple of (term-major scoring matrix at ``precision``, per-term
+            scales or None)
+        """
+        return quantize_rows(cls._normalized_t(tfidf_matrix, precision), precision)
+
+    @classmethod
+    def vectorizer_params(cls, features: str = 'tfidf') -> Dict:
+        """Parameters identifying a feature backend (saved with artifacts)."""
+        cls._check_features(features)
+        if features == 'hashing':
+            return dict(cls.HASHING_PARAMS, features='hashing')
+        return cls.VECTORIZER_PARAMS
+
+    @classmethod
+    def from_dataset(cls, dataset_path: str, features: str = 'tfidf',
+                     precision: str = 'float64', scorer_options: Dict[str, Dict] = None) -> 'HealthIndex':
+        """
+        Fit TF-IDF on a JSON or JSONL dataset.
+
+        Records are streamed from the file straight into the columnar
+        store, so peak memory stays close to the size of the fitted model.
+
+        Args:
+            dataset_path: Path to a ``{"qa_pairs": [...]}`` JSON file or a
+                JSONL file with one Q&A pair per line
+            features: Feature backend, one of ``FEATURES``
+            precision: Storage precision, one of ``PRECISIONS``
+            scorer_options: Constructor arguments of each scorer by name
+
+        Returns:
+            Fitted HealthIndex
+
+        Raises:
+            DatasetError: On malformed JSON or invalid records (with line number)
+        """
+        cls._check_features(features)
+        cls._check_precision(precision)
+        return cls.from_qa_pairs(dataset_loader.iter_qa_pairs(dataset_path), dataset_path, features,
+                                 precision, scorer_options)
+
+    @classmethod
+    def from_qa_pairs(cls, qa_pairs: Iterable[Dict], dataset_path: str = None,
+                      features: str = 'tfidf', precision: str = 'float64',
+                      scorer_options: Dict[str, Dict] = None) -> 'HealthIndex':
+        """
+        Fit TF-IDF on in-memory Q&A records.
+
+        Args:
+            qa_pairs: Q&A records (dicts or a QAStore)
+            dataset_path: File the records were read from, if any
+            features: Feature backend, one of ``FEATURES``
+            precision: Storage precision, one of ``PRECISIONS``
+            scorer_options: Constructor arguments of each scorer by name
+
+        Returns:
+            Fitted HealthIndex
+        """
+        cls._check_features(features)
+        cls._check_precision(precision)
+        qa_pairs = QAStore.from_records(qa_pairs)
+        vectorizer = cls._make_vectorizer(features)
+
+        # Build TF-IDF matrix for questions; only its scoring form is kept
+        tfidf_matrix_t, term_scales = cls._scoring_matrices(
+            vectorizer.fit_transform(LowercaseQuestions(qa_pairs)), precision
+        )
+
+        return cls(vectorizer, qa_pairs, tfidf_matrix_t, dataset_path, features=features,
+                   term_scales=term_scales, precision=precision, scorer_options=scorer_options)
+
+    @classmethod
+    def load(cls, artifact_path: str = model_artifact.DEFAULT_ARTIFACT_PATH,
+             dataset_path: str = None, features: str = 'tfidf',
+             precision: str = 'float64', scorer_options: Dict[str, Dict] = None,
+             verify_dataset: bool = False) -> 'HealthIndex':
+        """
+        Load a compiled model without refitting TF-IDF.
+
+        Matrices and texts are memory-mapped read-only, so startup cost is
+        independent of corpus size and processes loading the same artifact
+        share its physical pages.
+
+        Args:
+            artifact_path: Directory written by ``save``
+            dataset_path: Source dataset; when given, a missing or stale
+                artifact (dataset hash, feature backend, precision or TF-IDF
+                settings changed) is rebuilt first, otherwise a stale
+                artifact raises ValueError
+            features: Feature backend the artifact must have been built with
+            precision: Storage precision the artifact must have been built with
+            scorer_options: Constructor arguments of each scorer by name
+            verify_dataset: Hash the dataset even if its size and mtime are
+                unchanged since the build (otherwise only a changed file is hashed)
+
+        Returns:
+            HealthIndex backed by the artifact
+        """
+        cls._check_precision(precision)
+        if model_artifact.is_stale(artifact_path, cls.vectorizer_params(features), dataset_path, precision,
+                                   verify_hash=verify_dataset):
+            if dataset_path is None:
+                raise ValueError(f"Model artifact is missing or stale: {artifact_path}")
+            print(f"↻ Compiling model artifact: {artifact_path}")
+            cls.from_dataset(dataset_path, features, precision).save(artifact_path)
+
+        artifact = model_artifact.read_artifact(artifact_path)
+        manifest = artifact['manifest']
+        if features == 'hashing':
+            analyzer = QueryAnalyzer.from_settings(manifest['analyzer'], artifact['idf'],
+                                                   n_features=cls.HASHING_PARAMS['n_features'])
+        else:
+            vocabulary = {term: i for i, term in enumerate(manifest['vocabulary'])}
+            analyzer = QueryAnalyzer.from_settings(manifest['analyzer'], artifact['idf'], vocabulary)
+
+        # The vectorizer itself (and scikit-learn) is only loaded when needed
+        return cls(None, artifact['qa_pairs'], artifact['tfidf_matrix_t'], dataset_path,
+                   features=features, term_scales=artifact['term_scales'], precision=precision,
+                   analyzer=analyzer, scorer_options=scorer_options)
+
+    def save(self, artifact_path: str):
+        """
+        Compile the model into a memory-mappable artifact.
+
+        Indices changed by incremental updates no longer match a dataset
+        file and cannot be saved.
+
+        Args:
+            artifact_path: Directory to write (created if missing)
+        """
+        if self.dataset_path is None:
+            raise ValueError("Cannot save an index whose source dataset is unknown or was updated")
+        # Stat before hashing: an edit in between then shows up as a changed stat
+        dataset_stat = model_artifact.dataset_file_stat(self.dataset_path)
+        model_artifact.write_artifact(
+            artifact_path,
+            dataset_hash=model_artifact.dataset_fingerprint(self.dataset_path),
+            vectorizer_params=self.vectorizer_params(self.features),
+            analyzer=self.analyzer,
+            tfidf_matrix_t=self.tfidf_matrix_t,
+            qa_pairs=self.qa_pairs,
+            precision=self.precision,
+            term_scales=self.term_scales,
+            dataset_stat=dataset_stat
+        )
+
+    @classmethod
+    def _make_vectorizer(cls, features: str, vocabulary: Dict[str, int] = None, idf: np.ndarray = None):
+        """
+        Create a vectorizer for ``features``: unfitted, or rebuilt from its
+        vocabulary (unused for hashing) and IDF weights.
+        """
+        if features == 'hashing':
+            from hashing_vectorizer import HashingTfidfVectorizer
+
+            params = dict(cls.HASHING_PARAMS)
+            return HashingTfidfVectorizer(params.pop('n_features'), idf, **params)
+
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        vectorizer = TfidfVectorizer(**cls.VECTORIZER_PARAMS)
+        if idf is not None:
+            vectorizer.vocabulary_ = vocabulary
+            vectorizer.idf_ = idf
+        return vectorizer
+
+    def scorer(self, name: str):
+        """Return the (shared, read-only) scoring engine called ``name``, built with ``scorer_options[name]``."""
+        scorer = self._scorers.get(name)
+        if scorer is None:
+            self._check_scorer(name)
+            with self._scorer_lock:
+                scorer = self._scorers.get(name)
+                if scorer is None:
+                    previous = self._previous_scorers.pop(name, None)
+                    if previous is not None:
+                        scorer = previous.reindex(self.tfidf_matrix_t)
+                    else:
+                        scorer = self.SCORERS[name](self.tfidf_matrix_t, **self.scorer_options.get(name, {}))
+                    self._scorers[name] = scorer
+        return scorer
+
+    def close(self):
+        """
+        Release resources held by scorers (e.g. worker processes).
+
+        Snapshots sharing this index's base matrices share its scorers too;
+        they rebuild them on their next query.
+        """
+        with self._scorer_lock:
+            scorers, self._scorers = self._scorers, {}
+        for scorer in scorers.values():
+            if hasattr(scorer, 'close'):
+                scorer.close()
+
+    def analyze(self, queries: List[str]) -> List[AnalyzedQuery]:
+        """Tokenize queries and map their terms to feature columns (see ``QueryAnalyzer``)."""
+        analyze = self.analyzer.analyze
+        return [analyze(query) for query in queries]
+
+    def vectorize_analyzed(self, analyzed: List[AnalyzedQuery]):
+        """Vectorize the output of ``analyze`` into L2-normalized TF-IDF rows."""
+        query_matrix = self.analyzer.vectorize(analyzed)
+        # Re-normalizing matches the rounding of sklearn's cosine_similarity
+        normalize_rows_l2(query_matrix)
+        return query_matrix
+
+    def vectorize(self, queries: List[str]):
+        """Vectorize lowercased queries into L2-normalized TF-IDF rows."""
+        return self.vectorize_analyzed(self.analyze(queries))
+
+    def rank(self, query_matrix, k: int, scorer: str = 'dense') -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Select the best ``k`` live questions for every query row.
+
+        Args:
+            query_matrix: Output of ``vectorize``
+            k: Number of matches per query
+            scorer: Name of the retrieval engine
+
+        Returns:
+            Tuple of (indices, scores) arrays of shape (n_queries, k)
+        """
+        base_queries = scale_queries(query_matrix, self.precision, self.term_scales)
+        if not self.deleted and self._delta_scorer is None:
+            return self.scorer(scorer).top_k(base_queries, k)
+
+        # The best k + |tombstones| rows always contain the best k live rows
+        k = max(0, min(k, self.n_live))
+        fetch = k + len(self.deleted)
+        indices, scores = self.scorer(scorer).top_k(base_queries, fetch)
+        if self._delta_scorer is not None:
+            delta_indices, delta_scores = self._delta_scorer.top_k(
+                scale_queries(query_matrix, self.precision, self._delta_scales), fetch
+            )
+            # Base candidates come first and both parts are in index order
+            # among equal scores, so the merge still breaks ties towards
+            # the lower index
+            candidates = np.concatenate([indices, delta_indices + self.n_base], axis=1)
+            positions, scores = top_k(np.concatenate([scores, delta_scores], axis=1), fetch)
+            indices = np.take_along_axis(candidates, positions, axis=1)
+        if not self.deleted:
+            return indices, scores
+        order = np.argsort(self._deleted_mask[indices], axis=1, kind='stable')[:, :k]
+        return np.take_along_axis(indices, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+    @property
+    def n_live(self) -> int:
+        """Number of Q&A pairs that can be matched."""
+        return len(self.qa_pairs) - len(self.deleted)
+
+    def _position(self, qa_id: int):
+        """Row position of the live Q&A pair with id ``qa_id``, or None."""
+        if qa_id in self._position_changes:
+            return self._position_changes[qa_id]
+        if self._positions is None:
+            live = np.flatnonzero(~self._deleted_mask)
+            self._positions = dict(zip(self.qa_pairs.ids[live].tolist(), live.tolist()))
+        row = self._positions.get(qa_id)
+        # Rows tombstoned after the map was built are still in it
+        return None if row is None or self._deleted_mask[row] else row
+
+    def get_qa_pair(self, qa_id: int) -> Dict:
+        """Return the live Q&A record with id ``qa_id`` (KeyError if absent)."""
+        row = self._position(qa_id)
+        if row is None:
+            raise KeyError(f"No Q&A pair with id {qa_id}")
+        return self.qa_pairs[row]
+
+    def apply_updates(self, add: Iterable[Dict] = (), remove: Iterable[int] = ()) -> 'HealthIndex':
+        """
+        Return a snapshot with pairs removed and added, without refitting.
+
+        Removed pairs are tombstoned. Added questions are vectorized with the
+        current vocabulary and IDF weights and appended to the delta block;
+        with 'tfidf' features, terms outside the vocabulary are ignored until
+        the next full refit (hashed features have no vocabulary to miss).
+        The base matrix, Q&A columns and scorers are shared with this
+        snapshot, so an update costs time in proportion to the delta, not
+        the corpus.
+
+        Args:
+            add: Q&A records to append (ids must not be live already)
+            remove: Ids of live Q&A pairs to tombstone
+
+        Returns:
+            New HealthIndex; this one is left unchanged
+        """
+        add = [dict(qa) for qa in add]
+        remove = list(remove)
+        for qa in add:
+            problem = dataset_loader.validate_qa_pair(qa)
+            if problem is not None:
+                raise ValueError(problem)
+
+        changes = dict(self._position_changes)
+        deleted = set(self.deleted)
+
+        def position(qa_id):
+            return changes[qa_id] if qa_id in changes else self._position(qa_id)
+
+        for qa_id in remove:
+            row = position(qa_id)
+            if row is None:
+                raise KeyError(f"No Q&A pair with id {qa_id}")
+            changes[qa_id] = None
+            deleted.add(row)
+
+        for offset, qa in enumerate(add):
+            if position(qa['id']) is not None:
+                raise ValueError(f"Duplicate Q&A id {qa['id']}")
+            changes[qa['id']] = len(self.qa_pairs) + offset
+
+        if len(self.qa_pairs) + len(add) == len(deleted):
+            raise ValueError("An index needs at least one live Q&A pair")
+
+        delta_matrix, qa_pairs = self.delta_matrix, self.qa_pairs
+        if add:
+            new_rows = self.analyzer.vectorize(self.analyze([qa['question'].lower() for qa in add]))
+            new_rows = new_rows.astype(storage_dtype(self.precision), copy=False)
+            delta_matrix = new_rows if delta_matrix is None else sp.vstack([delta_matrix, new_rows], format='csr')
+            if isinstance(qa_pairs, AppendedQAStore):
+                qa_pairs = qa_pairs.extend(add)
+            else:
+                qa_pairs = AppendedQAStore(qa_pairs, QAStore.from_records(add))
+
+        index = HealthIndex(self._vectorizer, qa_pairs, self.tfidf_matrix_t, deleted=deleted,
+                            updates_since_idf=self.updates_since_idf + len(add) + len(remove),
+                            features=self.features, term_scales=self.term_scales, precision=self.precision,
+                            analyzer=self.analyzer, delta_matrix=delta_matrix,
+                            scorer_options=self.scorer_options)
+        index._positions, index._position_changes = self._positions, changes
+        index._scorers, index._scorer_lock = self._scorers, self._scorer_lock
+        index._previous_scorers = self._previous_scorers
+        return index
+
+    def refresh_idf(self) -> 'HealthIndex':
+        """
+        Return a snapshot whose IDF weights reflect the live pairs.
+
+        IDF is recomputed from the live document frequencies with sklearn's
+        smoothed formula and every row is re-weighted in place of a refit;
+        the vocabulary (or hashed feature space) stays the same. Appended
+        rows are folded into the new base matrix; scorers that support it
+        are rebuilt on first use from their trained state. With 'uint8'
+        precision the dequantized weights are re-weighted and quantized
+        again.
+
+        Returns:
+            New HealthIndex; this one is left unchanged
+        """
+        old_idf = self.analyzer.idf
+        idf = np.log((self.n_live + 1) / (self.document_frequency + 1.0)) + 1
+
+        # Rows are L2-normalized, so scaling every term by new / old IDF and
+        # normalizing the questions again weights them by the new IDF
+        weights_t = self._weights_t()
+        data = weights_t.data * np.repeat(idf / old_idf, np.diff(weights_t.indptr))
+        norms = np.sqrt(np.bincount(weights_t.indices, weights=data * data, minlength=weights_t.shape[1]))
+        norms[norms == 0] = 1.0
+        data = (data / norms[weights_t.indices]).astype(storage_dtype(self.precision))
+        tfidf_matrix_t, term_scales = quantize_rows(
+            sp.csr_matrix((data, weights_t.indices, weights_t.indptr), shape=weights_t.shape), self.precision
+        )
+
+        qa_pairs = self.qa_pairs
+        if isinstance(qa_pairs, AppendedQAStore):
+            qa_pairs = qa_pairs.flatten()
+        index = HealthIndex(self._make_vectorizer(self.features, self.analyzer.vocabulary, idf),
+                            qa_pairs, tfidf_matrix_t, deleted=self.deleted, features=self.features,
+                            term_scales=term_scales, precision=self.precision,
+                            scorer_options=self.scorer_options)
+        index._document_frequency = self.document_frequency
+        index._positions, index._position_changes = self._positions, self._position_changes
+        # Trained scorers keep their model for the re-weighted rows until
+        # compact() retrains them
+        index._previous_scorers = dict(self._previous_scorers)
+        index._previous_scorers.update(
+            (name, scorer) for name, scorer in self._scorers.items() if hasattr(scorer, 'reindex')
+        )
+        return index
+
+    def compact(self) -> 'HealthIndex':
+        """
+        Return a snapshot with tombstoned rows physically removed and
+        appended rows folded into the base matrix.
+
+        Without appended rows the scoring matrix only loses the removed
+        columns ('uint8' codes and scales stay as they are); otherwise the
+        dequantized weights are quantized again together with the delta.
+
+        Returns:
+            New HealthIndex; this one is left unchanged
+        """
+        live = np.flatnonzero(~self._deleted_mask)
+        if self.delta_matrix is None:
+            tfidf_matrix_t, term_scales = self.tfidf_matrix_t[:, live], self.term_scales
+        else:
+            tfidf_matrix_t, term_scales = quantize_rows(self._weights_t()[:, live], self.precision)
+        index = HealthIndex(self._vectorizer, self.qa_pairs.take(live), tfidf_matrix_t, self.dataset_path,
+                            updates_since_idf=self.updates_since_idf, features=self.features,
+                            term_scales=term_scales, precision=self.precision, analyzer=self.analyzer,
+                            scorer_options=self.scorer_options)
+        index._document_frequency = self._document_frequency
+        return index
+
+    def drift_report(self, queries: List[str] = None, k: int = 3) -> Dict:
+        """
+        Measure how far incremental scores have drifted from a full refit.
+
+        A fresh index with the same feature backend and precision is fitted
+        on the live pairs and both rank the same queries; ids, scores, IDF
+        weights and vocabulary are compared.
+
+        Args:
+            queries: Queries to compare (default: the live questions)
+            k: Number of matches compared per query
+
+        Returns:
+            Dictionary of drift metrics
+        """
+        live = np.flatnonzero(~self._deleted_mask)
+        qa_pairs = self.qa_pairs.take(live)
+        refit = HealthIndex.from_qa_pairs(qa_pairs, features=self.features, precision=self.precision)
+
+        lowered = [q.strip() for q in ([q.lower() for q in queries] if queries is not None else
+                                       refit.questions)]
+        lowered = [q for q in lowered if q]
+        k = max(1, min(k, len(qa_pairs)))
+
+        indices, scores = self.rank(self.vectorize(lowered), k)
+        refit_indices, refit_scores = refit.rank(refit.vectorize(lowered), k)
+        indices, refit_indices = self.qa_pairs.ids[indices], qa_pairs.ids[refit_indices]
+
+        overlap = [len(set(a) & set(b)) / k for a, b in zip(indices.tolist(), refit_indices.tolist())]
+        score_error = np.abs(scores - refit_scores)
+
+        if self.features == 'hashing':
+            # Hashed columns are the same in both indices; no terms can be missing
+            vocabulary = refit_vocabulary = set()
+            idf_error = np.abs(self.vectorizer.idf_ - refit.vectorizer.idf_)
+        else:
+            vocabulary = set(self.vectorizer.vocabulary_)
+            refit_vocabulary = set(refit.vectorizer.vocabulary_)
+            shared = sorted(vocabulary & refit_vocabulary)
+            idf_error = np.abs(
+                self.vectorizer.idf_[[self.vectorizer.vocabulary_[t] for t in shared]]
+                - refit.vectorizer.idf_[[refit.vectorizer.vocabulary_[t] for t in shared]]
+            ) if shared else np.zeros(1)
+
+        return {
+            'live_pairs': len(qa_pairs),
+            'tombstones': len(self.deleted),
+            'updates_since_idf': self.updates_since_idf,
+            'queries': len(lowered),
+            'top1_agreement': float(np.mean(indices[:, 0] == refit_indices[:, 0])) if lowered else 1.0,
+            f'mean_overlap_at_{k}': float(np.mean(overlap)) if lowered else 1.0,
+            'max_score_error': float(score_error.max()) if lowered else 0.0,
+            'mean_score_error': float(score_error.mean()) if lowered else 0.0,
+            'max_idf_error': float(idf_error.max()),
+            'terms_missing': len(refit_vocabulary - vocabulary),
+            'terms_obsolete': len(vocabulary - refit_vocabulary),
+        }
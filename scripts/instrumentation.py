@@ -0,0 +1,181 @@
+"""
+Instrumentation - Per-Stage Latency Histograms for Query Answering
+Records where the time of each request goes with fixed-size, low-overhead histograms
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+# Histogram bucket upper bounds in seconds: 1 µs doubling up to ~16 s
+BUCKET_BOUNDS = [1e-6 * 2 ** i for i in range(25)]
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram.
+
+    Recording is one binary search and one counter increment; memory is
+    fixed regardless of how many samples are recorded. Quantiles are
+    estimated to within one bucket (a factor of two).
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """Add one sample."""
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate the ``q`` quantile (0-1) in seconds."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                upper = BUCKET_BOUNDS[bucket] if bucket < len(BUCKET_BOUNDS) else self.max
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        """Return count, mean, max and p50/p95/p99 in milliseconds."""
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.quantile(0.50) * 1000,
+            'p95_ms': self.quantile(0.95) * 1000,
+            'p99_ms': self.quantile(0.99) * 1000,
+            'max_ms': self.max * 1000,
+            'total_ms': self.total * 1000,
+        }
+
+
+class Stopwatch:
+    """
+    Times consecutive stages of one request or batch chunk.
+
+    Each ``lap`` records the time since the previous lap under a stage
+    name; ``finish`` records the time since the stopwatch was started.
+    """
+
+    def __init__(self, instrumentation: 'Instrumentation', keep_laps: bool):
+        self._instrumentation = instrumentation
+        self._start = self._last = time.perf_counter()
+        self.laps = {} if keep_laps else None
+
+    def lap(self, stage: str):
+        """Record the time spent in ``stage`` since the previous lap."""
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self._instrumentation.record(stage, elapsed)
+        if self.laps is not None:
+            self.laps[stage] = self.laps.get(stage, 0.0) + elapsed
+
+    def take_laps(self) -> Optional[Dict[str, float]]:
+        """Return the laps kept since the last call (in ms) and start a new set."""
+        if self.laps is None:
+            return None
+        laps = {stage: seconds * 1000 for stage, seconds in self.laps.items()}
+        self.laps = {}
+        return laps
+
+    def finish(self):
+        """Record the whole request under the 'total' stage."""
+        self._instrumentation.record('total', time.perf_counter() - self._start)
+
+
+class _NullStopwatch:
+    """Stopwatch used while instrumentation is disabled; every call is a no-op."""
+
+    laps = None
+
+    def lap(self, stage: str):
+        pass
+
+    def take_laps(self):
+        return None
+
+    def finish(self):
+        pass
+
+
+NULL_STOPWATCH = _NullStopwatch()
+
+
+class Instrumentation:
+    """
+    Collection of per-stage latency histograms.
+
+    Safe to share between threads: recording takes a lock that is held
+    only for the counter update.
+    """
+
+    def __init__(self, include_in_response: bool = False):
+        """
+        Args:
+            include_in_response: Add a 'timings_ms' dict to every response
+        """
+        self.include_in_response = include_in_response
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def stopwatch(self) -> Stopwatch:
+        """Start timing a new request."""
+        return Stopwatch(self, self.include_in_response)
+
+    def record(self, stage: str, seconds: float):
+        """Add one timing for ``stage``."""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def reset(self):
+        """Drop all recorded timings."""
+        with self._lock:
+            self._histograms = {}
+
+    def stats(self) -> Dict[str, Dict]:
+        """Return a summary of every stage, keyed by stage name."""
+        with self._lock:
+            return {stage: h.summary() for stage, h in self._histograms.items()}
+
+    def prometheus(self, prefix: str = 'health_chatbot') -> str:
+        """
+        Render all histograms in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Text with one ``<prefix>_stage_seconds`` histogram per stage
+        """
+        name = f"{prefix}_stage_seconds"
+        lines: List[str] = [
+            f"# HELP {name} Time spent in each stage of answering a query.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            for stage, h in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKET_BOUNDS, h.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {h.total:.9g}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(lines) + "\n"
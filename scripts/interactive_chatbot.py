@@ -5,9 +5,9 @@ Demonstrates the chatbot with real-world health queries
 
 import json
 import sys
-import numpy as np
 from pathlib import Path
 from health_chatbot import HealthChatbot
+from model_artifact import DEFAULT_ARTIFACT_PATH
 from datetime import datetime
 
 
@@ -16,7 +16,8 @@ class InteractiveChatbot:
     
     def __init__(self, dataset_path: str):
         """Initialize the interactive chatbot."""
-        self.chatbot = HealthChatbot(
+        self.chatbot = HealthChatbot.load(
+            DEFAULT_ARTIFACT_PATH,
             dataset_path=dataset_path,
             confidence_threshold=0.3
         )
@@ -229,7 +230,8 @@ def generate_example_logs():
     print(f"Total Conversations: {len(log_output['conversations'])}")
     print(f"Successful Matches: {successful}")
     print(f"Fallback Responses: {fallback}")
-    print(f"Average Confidence: {np.mean([c['quality_metrics']['similarity_score'] for c in log_output['conversations']]):.1%}")
+    scores = [c['quality_metrics']['similarity_score'] for c in log_output['conversations']]
+    print(f"Average Confidence: {sum(scores) / len(scores):.1%}")
     
     print("\n📝 Sample Conversation Details:")
     print("-" * 80)
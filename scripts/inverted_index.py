@@ -0,0 +1,146 @@
+"""
+Inverted Index - Candidate Retrieval over TF-IDF Postings
+Scores only the questions that share at least one term with the query
+"""
+
+import numpy as np
+from typing import Tuple
+from scoring import top_k
+
+
+class InvertedIndex:
+    """
+    Term-at-a-time scorer with MaxScore early termination.
+
+    Postings come straight from the term-major (vocabulary x questions) CSR
+    matrix: row ``t`` lists the questions containing term ``t`` in ascending
+    order together with their weights. Query terms are visited in order of
+    their best possible contribution; once the contribution still available
+    from the unvisited terms cannot lift an unseen question into the top-k,
+    the remaining postings are only probed for questions already seen.
+
+    Final scores are re-accumulated in vocabulary order, the same order the
+    sparse matrix product uses, so scores and rankings are bit-for-bit
+    identical to the dense cosine similarity path.
+    """
+
+    # Relative slack on the MaxScore bound so rounding can never prune a
+    # question that ties with the k-th best score
+    BOUND_SLACK = 1e-9
+
+    def __init__(self, matrix_t):
+        """
+        Build the index from a term-major TF-IDF matrix.
+
+        Args:
+            matrix_t: CSR matrix of shape (vocabulary, questions) with sorted indices
+        """
+        self.indptr = matrix_t.indptr
+        self.doc_ids = matrix_t.indices
+        self.weights = matrix_t.data
+        self.n_docs = matrix_t.shape[1]
+
+        # Largest weight of each term, the per-term MaxScore upper bound
+        lengths = np.diff(self.indptr)
+        self.max_weight = np.zeros(matrix_t.shape[0])
+        nonempty = lengths > 0
+        if nonempty.any():
+            self.max_weight[nonempty] = np.maximum.reduceat(self.weights, self.indptr[:-1][nonempty])
+
+    def _postings(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (question ids, weights) for one term."""
+        start, end = self.indptr[term], self.indptr[term + 1]
+        return self.doc_ids[start:end], self.weights[start:end]
+
+    def top_k(self, query_matrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Select the best ``k`` questions for every row of a query matrix.
+
+        Args:
+            query_matrix: L2-normalized sparse query matrix (n_queries x vocab)
+            k: Number of matches per query
+
+        Returns:
+            Tuple of (indices, scores) arrays of shape (n_queries, k)
+        """
+        k = max(0, min(k, self.n_docs))
+        n_queries = query_matrix.shape[0]
+        indices = np.empty((n_queries, k), dtype=np.intp)
+        scores = np.empty((n_queries, k))
+
+        query_matrix = query_matrix.tocsr()
+        query_matrix.sort_indices()
+        for row in range(n_queries):
+            start, end = query_matrix.indptr[row], query_matrix.indptr[row + 1]
+            indices[row], scores[row] = self._top_k_query(
+                query_matrix.indices[start:end], query_matrix.data[start:end], k
+            )
+        return indices, scores
+
+    def _top_k_query(self, terms: np.ndarray, weights: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rank questions for a single query given its sorted term ids and weights."""
+        candidates = self._collect_candidates(terms, weights, k)
+
+        # Exact scores, accumulated term by term in vocabulary order (in
+        # the queries' float type, like the matrix product)
+        exact = np.zeros(len(candidates), dtype=weights.dtype)
+        for term, weight in zip(terms, weights):
+            docs, term_weights = self._postings(term)
+            exact += weight * self._lookup(docs, term_weights, candidates, weights.dtype)
+
+        positive = exact > 0
+        candidates, exact = candidates[positive], exact[positive]
+        best, best_scores = top_k(exact, k)
+        indices, scores = candidates[best], best_scores
+
+        # Fewer than k matching questions: pad with the lowest-index zeros,
+        # exactly as the dense path breaks its ties
+        missing = k - len(indices)
+        if missing > 0:
+            pool = np.arange(min(self.n_docs, missing + len(candidates)))
+            padding = np.setdiff1d(pool, candidates, assume_unique=True)[:missing]
+            indices = np.concatenate([indices, padding])
+            scores = np.concatenate([scores, np.zeros(missing, dtype=scores.dtype)])
+        return indices, scores
+
+    def _collect_candidates(self, terms: np.ndarray, weights: np.ndarray, k: int) -> np.ndarray:
+        """Gather every question that can reach the top-k (MaxScore pruning)."""
+        if len(terms) == 0 or k == 0:
+            return np.empty(0, dtype=self.doc_ids.dtype)
+
+        upper_bounds = weights * self.max_weight[terms]
+        order = np.argsort(-upper_bounds, kind='stable')
+        # remaining[i]: best score an unseen question can still collect from terms order[i:]
+        remaining = np.cumsum(upper_bounds[order][::-1])[::-1]
+
+        candidates = np.empty(0, dtype=self.doc_ids.dtype)
+        partial = np.empty(0)
+        for position, term_pos in enumerate(order):
+            if len(candidates) >= k:
+                threshold = np.partition(partial, len(partial) - k)[len(partial) - k]
+                if remaining[position] * (1 + self.BOUND_SLACK) < threshold * (1 - self.BOUND_SLACK):
+                    break
+
+            docs, term_weights = self._postings(terms[term_pos])
+            merged, inverse = np.unique(np.concatenate([candidates, docs]), return_inverse=True)
+            partial = np.bincount(
+                inverse,
+                weights=np.concatenate([partial, weights[term_pos] * term_weights]),
+                minlength=len(merged)
+            )
+            candidates = merged
+
+        return candidates
+
+    @staticmethod
+    def _lookup(docs: np.ndarray, term_weights: np.ndarray, candidates: np.ndarray,
+                dtype=np.float64) -> np.ndarray:
+        """Weights of ``candidates`` in one postings list (0 where absent)."""
+        values = np.zeros(len(candidates), dtype=dtype)
+        if len(docs) == 0 or len(candidates) == 0:
+            return values
+        positions = np.searchsorted(docs, candidates)
+        found = positions < len(docs)
+        found[found] = docs[positions[found]] == candidates[found]
+        values[found] = term_weights[positions[found]]
+        return values
@@ -0,0 +1,89 @@
+"""
+Lazy Response - Chatbot Responses with Deferred Fields
+Builds explanations and alternatives only when a caller actually reads them
+"""
+
+import copy
+from collections.abc import MutableMapping
+from typing import Callable, Dict, Tuple
+
+
+class LazyResponse(MutableMapping):
+    """
+    Response mapping whose expensive fields are computed on first access.
+
+    Behaves like the response dict (same keys in the same order, item
+    access, ``get``, iteration, equality with dicts). A deferred field is
+    computed by ``build(field, *args)`` the first time it is read. Use
+    ``to_dict`` for ``json.dumps`` and logs.
+
+    Deferred work is held as one callable plus an argument tuple rather
+    than per-field closures, which keeps the number of objects tracked by
+    the garbage collector per response low.
+    """
+
+    __slots__ = ('_data', '_deferred', '_build', '_args')
+
+    def __init__(self, data: Dict, deferred: frozenset, build: Callable, args: Tuple = ()):
+        """
+        Args:
+            data: Response fields in output order; values of deferred
+                fields are placeholders
+            deferred: Names of the fields computed on first access
+            build: Called as ``build(field, *args)`` to compute a field
+            args: Extra arguments for ``build``
+        """
+        self._data = data
+        self._deferred = frozenset(deferred)
+        self._build = build
+        self._args = args
+
+    def __getitem__(self, key):
+        if key in self._deferred:
+            self._data[key] = self._build(key, *self._args)
+            self._resolved(key)
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._resolved(key)
+
+    def __delitem__(self, key):
+        del self._data[key]
+        self._resolved(key)
+
+    def _resolved(self, key):
+        """Mark ``key`` as computed and drop the builder once nothing is deferred."""
+        if key in self._deferred:
+            self._deferred = self._deferred - {key}
+            if not self._deferred:
+                self._build = self._args = None
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{k!r}: {'<deferred>' if k in self._deferred else repr(v)}"
+                           for k, v in self._data.items())
+        return f"LazyResponse({{{fields}}})"
+
+    def __deepcopy__(self, memo):
+        # The builder only reads immutable model data, so copies share it
+        data = {k: v if k in self._deferred else copy.deepcopy(v, memo)
+                for k, v in self._data.items()}
+        return LazyResponse(data, self._deferred, self._build, self._args)
+
+    @property
+    def pending(self) -> frozenset:
+        """Names of fields that have not been computed yet."""
+        return self._deferred
+
+    def to_dict(self) -> Dict:
+        """Compute every field and return the response as a plain dict."""
+        return {key: self[key] for key in self._data}
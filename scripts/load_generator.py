@@ -0,0 +1,138 @@
+"""
+Load Generator - Latency and Throughput Benchmark for the HTTP Server
+Drives /answer or /batch with concurrent keep-alive clients and reports percentiles
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import numpy as np
+from typing import Dict, List
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                   host: str, path: str, payload: Dict) -> int:
+    """Send one POST over a keep-alive connection and return the status code."""
+    body = json.dumps(payload).encode('utf-8')
+    writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                  ).encode('latin-1') + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(host: str, port: int, path: str, payloads: List[Dict],
+                  counter: List[int], total: int, latencies: List[float], errors: List[int],
+                  queries_sent: List[int]):
+    """One keep-alive client issuing requests until ``total`` have been sent."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while counter[0] < total:
+            payload = payloads[counter[0] % len(payloads)]
+            counter[0] += 1
+            start = time.perf_counter()
+            status = await _request(reader, writer, host, path, payload)
+            latencies.append(time.perf_counter() - start)
+            queries_sent[0] += len(payload['queries']) if 'queries' in payload else 1
+            if status != 200:
+                errors[0] += 1
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, queries: List[str], endpoint: str = 'answer',
+                   concurrency: int = 32, requests: int = 5000, batch_size: int = 32) -> Dict:
+    """
+    Run a closed-loop load test against a running server.
+
+    Args:
+        host: Server host
+        port: Server port
+        queries: Query texts to cycle through
+        endpoint: 'answer' (one query per request) or 'batch'
+        concurrency: Number of concurrent keep-alive clients
+        requests: Total requests to send
+        batch_size: Queries per request for the 'batch' endpoint
+
+    Returns:
+        Dictionary with throughput and latency percentiles
+    """
+    if endpoint == 'answer':
+        payloads = [{'query': q} for q in queries]
+    else:
+        payloads = [{'queries': queries[i:i + batch_size]}
+                    for i in range(0, len(queries), batch_size)]
+
+    # Count the queries actually sent: the last batch of the cycle is short
+    latencies, errors, counter, queries_sent = [], [0], [0], [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, f"/{endpoint}", payloads, counter, requests, latencies, errors, queries_sent)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'endpoint': endpoint,
+        'requests': len(latencies),
+        'queries': queries_sent[0],
+        'errors': errors[0],
+        'concurrency': concurrency,
+        'elapsed_s': elapsed,
+        'requests_per_s': len(latencies) / elapsed,
+        'queries_per_s': queries_sent[0] / elapsed,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'max_ms': float(latencies_ms.max()),
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Health Chatbot Load Generator')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--dataset', default='data/health_qa_dataset.json',
+                        help='Questions in this dataset are used as queries')
+    parser.add_argument('--endpoint', choices=['answer', 'batch'], default='answer')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+
+    with open(args.dataset, 'r', encoding='utf-8') as f:
+        queries = [qa['question'] for qa in json.load(f)['qa_pairs']]
+    random.Random(args.seed).shuffle(queries)
+
+    report = asyncio.run(run_load(args.host, args.port, queries, args.endpoint,
+                                  args.concurrency, args.requests, args.batch_size))
+
+    print(f"\n📈 LOAD TEST: /{report['endpoint']} "
+          f"({report['requests']} requests, {report['concurrency']} clients)")
+    print("-" * 60)
+    print(f"Throughput: {report['requests_per_s']:.0f} req/s ({report['queries_per_s']:.0f} queries/s)")
+    print(f"Latency:    p50 {report['p50_ms']:.2f} ms | p95 {report['p95_ms']:.2f} ms | "
+          f"p99 {report['p99_ms']:.2f} ms | max {report['max_ms']:.2f} ms")
+    print(f"Errors:     {report['errors']}")
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,9 +10,7 @@ from pathlib import Path
 # Add scripts directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from health_chatbot import HealthChatbot
-from interactive_chatbot import InteractiveChatbot, generate_example_logs
-from visualization import ChatbotAnalyzer, generate_comprehensive_analysis
+from interactive_chatbot import generate_example_logs
 
 
 def print_header(title: str):
@@ -36,6 +34,8 @@ def run_full_pipeline():
     print("\n[Step 2/3] Generating Performance Analysis & Visualization...")
     print("-" * 80)
     try:
+        # Imported here: only this step needs the analysis and plotting code
+        from visualization import generate_comprehensive_analysis
         analysis, responses, qa_analysis = generate_comprehensive_analysis()
     except Exception as e:
         print(f"\n⚠ Visualization generation encountered an issue (may need additional packages):")
@@ -117,14 +117,13 @@ dlp/
 ### Install Dependencies
 
 ```bash
-pip install scikit-learn numpy matplotlib seaborn
+pip install scikit-learn numpy matplotlib
 ```
 
 **Core Dependencies:**
 - `scikit-learn`: TF-IDF vectorizer and cosine similarity
 - `numpy`: Numerical computations
 - `matplotlib`: Visualization
-- `seaborn`: Statistical visualization
 
 ## 🚀 Quick Start
 
@@ -0,0 +1,309 @@
+"""
+Model Artifact - Compiled, Memory-Mapped Chatbot Models
+Persists a fitted chatbot so processes can start without refitting TF-IDF
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import numpy as np
+import scipy.sparse as sp
+from pathlib import Path
+from typing import Callable, Dict, Iterable
+from qa_store import QAStore
+
+
+# Bumped whenever the on-disk layout changes; older artifacts are rebuilt
+ARTIFACT_VERSION = 4
+
+# Where entry points keep the compiled model for the bundled dataset
+DEFAULT_ARTIFACT_PATH = 'models/health_qa'
+
+MANIFEST_FILE = 'manifest.json'
+TEXT_FILE = 'text.bin'
+
+
+def dataset_fingerprint(dataset_path: str) -> str:
+    """Return the SHA-256 hex digest of a dataset file."""
+    digest = hashlib.sha256()
+    with open(dataset_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dataset_file_stat(dataset_path: str) -> Dict:
+    """Return the size and modification time of a dataset file, a cheap change check."""
+    stat = os.stat(dataset_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _swap_directory(tmp_root: Path, root: Path):
+    """
+    Move a fully written artifact directory into place.
+
+    The old directory is renamed away first, so a reader sees the old
+    artifact, no artifact, or the new one, never a mix of both. Processes
+    that still have old files memory-mapped keep reading the old contents.
+    """
+    old_root = root.with_name(f".{root.name}.{os.getpid()}.old")
+    while True:
+        if root.exists():
+            os.rename(root, old_root)
+        try:
+            os.rename(tmp_root, root)
+            break
+        except OSError:
+            # Another writer moved its artifact in meanwhile; replace it
+            if not root.exists():
+                raise
+            shutil.rmtree(old_root, ignore_errors=True)
+    shutil.rmtree(old_root, ignore_errors=True)
+
+
+def _json_params(params: Dict) -> Dict:
+    """Normalize vectorizer parameters to their JSON form (tuples become lists)."""
+    return json.loads(json.dumps(params))
+
+
+def write_artifact(artifact_path: str, dataset_hash: str, vectorizer_params: Dict, analyzer,
+                   tfidf_matrix_t, qa_pairs: Iterable[Dict], precision: str = 'float64',
+                   term_scales: np.ndarray = None, dataset_stat: Dict = None):
+    """
+    Write a compiled model to ``artifact_path``.
+
+    The directory holds one ``.npy`` file per array (IDF vector, the
+    term-major scoring matrix in its stored precision, per-term scales of a
+    'uint8' matrix, Q&A ids/categories/keywords, text offsets), a single UTF-8
+    text buffer with every question and answer, and a JSON manifest with the
+    vocabulary, the query tokenization settings, the array names and the
+    dataset hash and stat. Everything is written to a temporary sibling directory
+    that replaces ``artifact_path`` only once complete, so readers and
+    crashes never leave old and new files mixed.
+
+    Args:
+        artifact_path: Output directory
+        dataset_hash: Fingerprint of the dataset the model was fitted on
+        vectorizer_params: Constructor parameters of the vectorizer
+        analyzer: QueryAnalyzer of the fitted model (IDF, vocabulary, tokenization)
+        tfidf_matrix_t: Term-major, normalized scoring matrix
+        qa_pairs: QAStore (or Q&A records) in matrix row order
+        precision: Storage precision of the scoring matrix
+        term_scales: Per-term scales of a 'uint8' scoring matrix
+        dataset_stat: ``dataset_file_stat`` of the dataset, taken before hashing it
+    """
+    root = Path(artifact_path)
+    root.parent.mkdir(parents=True, exist_ok=True)
+    tmp_root = root.with_name(f".{root.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_root, ignore_errors=True)
+    tmp_root.mkdir()
+    try:
+        _write_files(tmp_root, dataset_hash, vectorizer_params, analyzer, tfidf_matrix_t, qa_pairs,
+                     precision, term_scales, dataset_stat)
+        _swap_directory(tmp_root, root)
+    except BaseException:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+        raise
+
+
+def _write_files(root: Path, dataset_hash: str, vectorizer_params: Dict, analyzer,
+                 tfidf_matrix_t, qa_pairs: Iterable[Dict], precision: str, term_scales: np.ndarray,
+                 dataset_stat: Dict):
+    """Write the files of an artifact into the empty directory ``root``."""
+    store = QAStore.from_records(qa_pairs)
+    arrays = {
+        'idf': analyzer.idf,
+        'postings_data': tfidf_matrix_t.data,
+        'postings_indices': tfidf_matrix_t.indices,
+        'postings_indptr': tfidf_matrix_t.indptr,
+        **store.arrays(),
+    }
+    if term_scales is not None:
+        arrays['term_scales'] = term_scales
+    for name, array in arrays.items():
+        np.save(root / f"{name}.npy", np.ascontiguousarray(array))
+    with open(root / TEXT_FILE, 'wb') as f:
+        f.write(store.text)
+
+    # Hashed features have no vocabulary; their parameters define the columns
+    term_ids = analyzer.vocabulary or {}
+    vocabulary = sorted(term_ids, key=term_ids.get)
+    manifest = {
+        'version': ARTIFACT_VERSION,
+        'dataset_sha256': dataset_hash,
+        'dataset_stat': dataset_stat,
+        'num_pairs': len(store),
+        'matrix_shape': [tfidf_matrix_t.shape[1], tfidf_matrix_t.shape[0]],
+        'vectorizer_params': _json_params(vectorizer_params),
+        'precision': precision,
+        'arrays': sorted(arrays),
+        'analyzer': analyzer.settings(),
+        'vocabulary': vocabulary,
+        'categories': store.categories,
+        'keywords': store.keywords_vocabulary,
+    }
+    with open(root / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+
+def read_manifest(artifact_path: str) -> Dict:
+    """Read an artifact manifest, or return None if there is no valid artifact."""
+    try:
+        with open(Path(artifact_path) / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def is_stale(artifact_path: str, vectorizer_params: Dict, dataset_path: str = None,
+             precision: str = 'float64', verify_hash: bool = False) -> bool:
+    """
+    Check whether an artifact is missing, outdated, or built differently.
+
+    The dataset is only hashed when its size or modification time differs
+    from the ones recorded at build time (or ``verify_hash`` is set), so
+    checking an unchanged dataset costs a single ``stat``.
+
+    Args:
+        artifact_path: Artifact directory
+        vectorizer_params: Vectorizer parameters the caller expects
+        dataset_path: Source dataset whose hash must match, if given
+        precision: Storage precision the caller expects
+        verify_hash: Hash the dataset even if its size and mtime match
+
+    Returns:
+        True if the artifact has to be rebuilt
+    """
+    manifest = read_manifest(artifact_path)
+    if (manifest is None
+            or manifest.get('version') != ARTIFACT_VERSION
+            or manifest.get('vectorizer_params') != _json_params(vectorizer_params)
+            or manifest.get('precision', 'float64') != precision):
+        return True
+    if dataset_path is None:
+        return False
+    if not verify_hash and manifest.get('dataset_stat') == dataset_file_stat(dataset_path):
+        return False
+    return manifest.get('dataset_sha256') != dataset_fingerprint(dataset_path)
+
+
+def _load_array(open_file: Callable, name: str) -> np.ndarray:
+    """Memory-map a ``.npy`` file; empty arrays cannot be mapped and are created instead."""
+    with open_file(f"{name}.npy") as f:
+        version = np.lib.format.read_magic(f)
+        read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                       else np.lib.format.read_array_header_2_0)
+        shape, fortran_order, dtype = read_header(f)
+        if not np.prod(shape):
+            return np.empty(shape, dtype)
+        return np.memmap(f, dtype=dtype, mode='r', shape=shape,
+                         order='F' if fortran_order else 'C', offset=f.tell())
+
+
+def read_artifact(artifact_path: str) -> Dict:
+    """
+    Memory-map a compiled model.
+
+    Args:
+        artifact_path: Directory written by ``write_artifact``
+
+    Returns:
+        Dictionary with the manifest, the term-major scoring matrix (backed
+        by read-only memory maps), the IDF vector, its per-term scales for
+        'uint8' (else None) and a memory-mapped ``QAStore``
+    """
+    root = Path(artifact_path)
+    if os.open not in os.supports_dir_fd:
+        # No directory handles on this platform (Windows): open by path
+        try:
+            return _map_files(lambda name: open(root / name, 'rb'))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Model artifact not found: {artifact_path}") from None
+    while True:
+        try:
+            dir_fd = os.open(root, os.O_RDONLY)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Model artifact not found: {artifact_path}") from None
+        try:
+            # Every file is opened through the same directory handle, so all
+            # of them belong to one build even if a writer swaps in another
+            return _map_files(lambda name: os.fdopen(os.open(name, os.O_RDONLY, dir_fd=dir_fd), 'rb'))
+        except FileNotFoundError:
+            # Retry if the build was replaced and deleted while being opened
+            if _same_directory(dir_fd, root):
+                raise FileNotFoundError(f"Model artifact not found: {artifact_path}") from None
+        finally:
+            os.close(dir_fd)
+
+
+def _same_directory(dir_fd: int, root: Path) -> bool:
+    """Whether ``root`` is still the directory open as ``dir_fd``."""
+    try:
+        return os.path.samestat(os.fstat(dir_fd), os.stat(root))
+    except FileNotFoundError:
+        return False
+
+
+def _map_files(open_file: Callable) -> Dict:
+    """Memory-map the files of one artifact directory, opened with ``open_file(name)``."""
+    with open_file(MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != ARTIFACT_VERSION:
+        raise ValueError(f"Unsupported model artifact version: {manifest.get('version')}")
+
+    # Only the arrays this manifest lists, never leftovers of other layouts
+    arrays = {name: _load_array(open_file, name) for name in manifest['arrays']}
+    n_pairs, n_terms = manifest['matrix_shape']
+
+    tfidf_matrix_t = sp.csr_matrix(
+        (arrays['postings_data'], arrays['postings_indices'], arrays['postings_indptr']),
+        shape=(n_terms, n_pairs), copy=False
+    )
+    with open_file(TEXT_FILE) as f:
+        size = os.fstat(f.fileno()).st_size
+        text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    return {
+        'manifest': manifest,
+        'idf': arrays['idf'],
+        'tfidf_matrix_t': tfidf_matrix_t,
+        'term_scales': arrays['term_scales'] if manifest.get('precision') == 'uint8' else None,
+        'qa_pairs': QAStore(
+            ids=arrays['ids'],
+            category_codes=arrays['category_codes'],
+            categories=manifest['categories'],
+            keyword_ids=arrays['keyword_ids'],
+            keyword_indptr=arrays['keyword_indptr'],
+            keywords=manifest['keywords'],
+            text=text,
+            text_offsets=arrays['text_offsets'],
+        ),
+    }
+
+
+def main():
+    """Compile a dataset into a model artifact."""
+    import argparse
+    from health_chatbot import HealthChatbot
+
+    parser = argparse.ArgumentParser(description='Compile the Health Chatbot model artifact')
+    parser.add_argument('--dataset', default='data/health_qa_dataset.json',
+                        help='Path to JSON (or JSONL) dataset with Q&A pairs')
+    parser.add_argument('--output', default=DEFAULT_ARTIFACT_PATH,
+                        help='Artifact directory to write')
+    parser.add_argument('--features', choices=HealthChatbot.FEATURES, default='tfidf',
+                        help='Feature backend')
+    parser.add_argument('--precision', choices=HealthChatbot.PRECISIONS, default='float64',
+                        help='Storage precision of the TF-IDF matrices')
+
+    args = parser.parse_args()
+
+    chatbot = HealthChatbot(dataset_path=args.dataset, features=args.features, precision=args.precision)
+    chatbot.save(args.output)
+    print(f"✓ Model artifact written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
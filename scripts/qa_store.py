@@ -0,0 +1,369 @@
+"""
+Q&A Store - Columnar Storage for Q&A Pairs
+Keeps ids, categories, keywords and texts in flat arrays instead of per-pair dicts
+"""
+
+import sys
+from array import array
+from functools import lru_cache
+import numpy as np
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, List, Tuple
+
+
+def _gather_ranges(data, indptr: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenate the CSR-style ranges ``indptr[r]:indptr[r+1]`` of ``rows``.
+
+    Returns:
+        Tuple of (gathered data, new indptr)
+    """
+    starts, ends = indptr[rows], indptr[rows + 1]
+    lengths = ends - starts
+    new_indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_indptr[1:])
+    positions = np.repeat(starts - new_indptr[:-1], lengths) + np.arange(new_indptr[-1])
+    return np.asarray(data)[positions], new_indptr
+
+
+def _sorted_vocabulary(codes: Dict[str, int]) -> Tuple[List[str], np.ndarray]:
+    """
+    Sort a first-seen vocabulary.
+
+    Returns:
+        Tuple of (sorted entries, array mapping first-seen codes to sorted codes)
+    """
+    vocabulary = sorted(codes)
+    remap = np.empty(len(vocabulary), dtype=np.int32)
+    remap[[codes[entry] for entry in vocabulary]] = np.arange(len(vocabulary), dtype=np.int32)
+    return vocabulary, remap
+
+
+class QAStore(Sequence):
+    """
+    Columnar, read-only sequence of Q&A pairs.
+
+    - ids and category codes are NumPy arrays; category names are interned
+      once in a small lookup list
+    - questions and answers share one UTF-8 buffer: pair ``i`` has its
+      question at ``text_offsets[2i]:text_offsets[2i+1]`` and its answer
+      up to ``text_offsets[2i+2]``
+    - keywords are ids into a keyword list, in CSR layout (``keyword_ids``
+      sliced by ``keyword_indptr``)
+
+    Indexing decodes one record into a short-lived dict, so code written
+    for the list of JSON dicts keeps working while only the columns stay
+    resident. The same arrays are what a model artifact stores, so
+    artifact-backed stores are memory-mapped instead of loaded.
+    """
+
+    # Decoded records kept for popular matches (bounded, ~1 KB each)
+    RECORD_CACHE_SIZE = 1024
+
+    def __init__(self, ids: np.ndarray, category_codes: np.ndarray, categories: List[str],
+                 keyword_ids: np.ndarray, keyword_indptr: np.ndarray, keywords: List[str],
+                 text, text_offsets: np.ndarray):
+        """
+        Wrap prepared columns; use ``from_records`` to build a store from dicts.
+
+        Repeated lookups of a position return the same cached dict, as the
+        parsed JSON list did; treat records as read-only.
+
+        Args:
+            ids: Q&A ids (n,)
+            category_codes: Index into ``categories`` per pair (n,)
+            categories: Category names
+            keyword_ids: Index into ``keywords`` for every keyword of every pair
+            keyword_indptr: Keyword range of each pair (n + 1,)
+            keywords: Keyword strings
+            text: Buffer holding every question and answer as UTF-8 (bytes,
+                or an ``mmap`` for artifact-backed stores)
+            text_offsets: Text boundaries (2n + 1,)
+        """
+        self.ids = ids
+        self.category_codes = category_codes
+        self.categories = [sys.intern(c) for c in categories]
+        self.keyword_ids = keyword_ids
+        self.keyword_indptr = keyword_indptr
+        self.keywords_vocabulary = [sys.intern(k) for k in keywords]
+        self.text = text
+        self.text_offsets = text_offsets
+
+        # Scalar reads through memoryviews return plain ints without
+        # creating NumPy scalars, which dominates per-field access cost
+        self._ids = memoryview(ids)
+        self._category_codes = memoryview(category_codes)
+        self._keyword_ids = memoryview(keyword_ids)
+        self._keyword_indptr = memoryview(keyword_indptr)
+        self._text_offsets = memoryview(text_offsets)
+        self._text_view = memoryview(text)
+        self._record = lru_cache(maxsize=self.RECORD_CACHE_SIZE)(self._decode_record)
+        self._keyword_set = lru_cache(maxsize=self.RECORD_CACHE_SIZE)(self._decode_keyword_set)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping]) -> 'QAStore':
+        """
+        Build a store from Q&A dicts (or any mappings with the same fields).
+
+        Args:
+            records: Records with id, question, answer, category and keywords
+
+        Returns:
+            New QAStore
+        """
+        if isinstance(records, QAStore):
+            return records
+
+        # One pass over the records: nothing but the columns is kept, so
+        # ``records`` can be a generator streaming a large file
+        ids, category_codes, keyword_ids = array('q'), array('i'), array('i')
+        keyword_indptr, text_offsets = array('q', [0]), array('q', [0])
+        text = bytearray()
+        categories, keywords = {}, {}
+        for qa in records:
+            ids.append(qa['id'])
+            text += qa['question'].encode('utf-8')
+            text_offsets.append(len(text))
+            text += qa['answer'].encode('utf-8')
+            text_offsets.append(len(text))
+            category_codes.append(categories.setdefault(qa['category'], len(categories)))
+            for kw in qa['keywords']:
+                keyword_ids.append(keywords.setdefault(kw, len(keywords)))
+            keyword_indptr.append(len(keyword_ids))
+
+        categories, category_map = _sorted_vocabulary(categories)
+        keywords, keyword_map = _sorted_vocabulary(keywords)
+        return cls(
+            ids=np.asarray(ids, dtype=np.int64),
+            category_codes=category_map[np.asarray(category_codes, dtype=np.intp)],
+            categories=categories,
+            keyword_ids=keyword_map[np.asarray(keyword_ids, dtype=np.intp)],
+            keyword_indptr=np.asarray(keyword_indptr, dtype=np.int64),
+            keywords=keywords,
+            text=bytes(text),
+            text_offsets=np.asarray(text_offsets, dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = int(index)
+        n = len(self._ids)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError('Q&A record index out of range')
+        return self._record(index)
+
+    def _decode_record(self, index: int) -> Dict:
+        # Decoding every field in one pass is cheaper than a lazy per-field
+        # view: the response builder reads most fields of a record anyway
+        offsets, text = self._text_offsets, self.text
+        question_start, answer_start, end = offsets[2 * index], offsets[2 * index + 1], offsets[2 * index + 2]
+        vocabulary, indptr = self.keywords_vocabulary, self._keyword_indptr
+        return {
+            'id': self._ids[index],
+            'question': text[question_start:answer_start].decode('utf-8'),
+            'answer': text[answer_start:end].decode('utf-8'),
+            'category': self.categories[self._category_codes[index]],
+            'keywords': [vocabulary[k] for k in self._keyword_ids[indptr[index]:indptr[index + 1]]],
+        }
+
+    def _decode_keyword_set(self, index: int) -> frozenset:
+        vocabulary, indptr = self.keywords_vocabulary, self._keyword_indptr
+        return frozenset(vocabulary[k] for k in self._keyword_ids[indptr[index]:indptr[index + 1]])
+
+    def keyword_set(self, index: int) -> frozenset:
+        """
+        Keywords of pair ``index`` as a frozenset, for membership tests.
+
+        Sets are built once per pair and cached like decoded records, so
+        matching query words against a popular answer does not rebuild one
+        per request; memory-mapped stores still load without a pass over
+        every pair.
+        """
+        return self._keyword_set(int(index))
+
+    def question(self, index: int) -> str:
+        """Question text of pair ``index``."""
+        offsets = self._text_offsets
+        return self.text[offsets[2 * index]:offsets[2 * index + 1]].decode('utf-8')
+
+    def take(self, rows) -> 'QAStore':
+        """
+        Return a new store with the pairs at positions ``rows``, in that order.
+
+        Args:
+            rows: Integer positions
+
+        Returns:
+            New QAStore (columns are copied, vocabularies shared)
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        text, text_offsets = _gather_ranges(np.frombuffer(self._text_view, dtype=np.uint8),
+                                            self.text_offsets[::2], rows)
+        # _gather_ranges yields pair boundaries; restore question/answer splits
+        question_lengths = self.text_offsets[2 * rows + 1] - self.text_offsets[2 * rows]
+        offsets = np.empty(2 * len(rows) + 1, dtype=np.int64)
+        offsets[0::2] = text_offsets
+        offsets[1::2] = text_offsets[:-1] + question_lengths
+
+        keyword_ids, keyword_indptr = _gather_ranges(self.keyword_ids, self.keyword_indptr, rows)
+        return QAStore(self.ids[rows], self.category_codes[rows], self.categories,
+                       keyword_ids, keyword_indptr, self.keywords_vocabulary,
+                       text.tobytes(), offsets)
+
+    def extend(self, records: Iterable[Mapping]) -> 'QAStore':
+        """
+        Return a new store with ``records`` appended.
+
+        Args:
+            records: Records to append
+
+        Returns:
+            New QAStore; category and keyword vocabularies are extended
+            without renumbering existing codes
+        """
+        other = QAStore.from_records(records)
+
+        categories, category_map = self._merged_vocabulary(self.categories, other.categories)
+        keywords, keyword_map = self._merged_vocabulary(self.keywords_vocabulary,
+                                                        other.keywords_vocabulary)
+        return QAStore(
+            ids=np.concatenate([self.ids, other.ids]),
+            category_codes=np.concatenate([self.category_codes, category_map[other.category_codes]]),
+            categories=categories,
+            keyword_ids=np.concatenate([self.keyword_ids, keyword_map[other.keyword_ids]]),
+            keyword_indptr=np.concatenate([self.keyword_indptr,
+                                           other.keyword_indptr[1:] + self.keyword_indptr[-1]]),
+            keywords=keywords,
+            text=bytes(self._text_view) + bytes(other._text_view),
+            text_offsets=np.concatenate([self.text_offsets,
+                                         other.text_offsets[1:] + self.text_offsets[-1]]),
+        )
+
+    @staticmethod
+    def _merged_vocabulary(current: List[str], new: List[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Append unseen entries of ``new`` to ``current``.
+
+        Returns:
+            Tuple of (merged vocabulary, array mapping ``new`` codes to merged codes)
+        """
+        merged = list(current)
+        codes = {entry: i for i, entry in enumerate(merged)}
+        for entry in new:
+            if entry not in codes:
+                codes[entry] = len(merged)
+                merged.append(entry)
+        return merged, np.array([codes[entry] for entry in new], dtype=np.int32)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Return the columns as arrays (the layout stored in model artifacts)."""
+        return {
+            'ids': self.ids,
+            'category_codes': self.category_codes,
+            'keyword_ids': self.keyword_ids,
+            'keyword_indptr': self.keyword_indptr,
+            'text_offsets': self.text_offsets,
+        }
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns and vocabularies."""
+        vocabularies = sum(sys.getsizeof(s) for s in self.categories + self.keywords_vocabulary)
+        return sum(a.nbytes for a in self.arrays().values()) + self._text_view.nbytes + vocabularies
+
+
+class AppendedQAStore(Sequence):
+    """
+    A ``QAStore`` followed by the pairs appended to it since.
+
+    Appending copies only the (small) store of appended pairs, never the
+    base columns or text buffer, so incremental additions cost time in
+    proportion to the additions rather than the corpus. Lookups dispatch
+    to the base or the appended store; ``flatten`` builds one contiguous
+    store when the appended rows are folded into the base.
+    """
+
+    def __init__(self, base: QAStore, appended: QAStore):
+        """
+        Args:
+            base: Store holding the first ``len(base)`` pairs
+            appended: Pairs following them
+        """
+        self.base = base
+        self.appended = appended
+        self._n_base = len(base)
+        self._ids = None
+
+    def __len__(self) -> int:
+        return self._n_base + len(self.appended)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Q&A record index out of range')
+        if index < self._n_base:
+            return self.base[index]
+        return self.appended[index - self._n_base]
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Q&A ids of every pair, in order."""
+        if self._ids is None:
+            self._ids = np.concatenate([self.base.ids, self.appended.ids])
+        return self._ids
+
+    def keyword_set(self, index: int) -> frozenset:
+        """Keywords of pair ``index`` as a frozenset (see ``QAStore.keyword_set``)."""
+        index = int(index)
+        if index < self._n_base:
+            return self.base.keyword_set(index)
+        return self.appended.keyword_set(index - self._n_base)
+
+    def question(self, index: int) -> str:
+        """Question text of pair ``index``."""
+        if index < self._n_base:
+            return self.base.question(index)
+        return self.appended.question(index - self._n_base)
+
+    def extend(self, records: Iterable[Mapping]) -> 'AppendedQAStore':
+        """Return a new store with ``records`` appended (the base is shared)."""
+        return AppendedQAStore(self.base, self.appended.extend(records))
+
+    def flatten(self) -> QAStore:
+        """Copy every pair into one contiguous ``QAStore``."""
+        return self.base.extend(self.appended)
+
+    def take(self, rows) -> QAStore:
+        """Return a new store with the pairs at positions ``rows``, in that order."""
+        return self.flatten().take(rows)
+
+
+class LowercaseQuestions(Sequence):
+    """Lowercased question texts of a ``QAStore``, decoded on demand."""
+
+    def __init__(self, store: QAStore):
+        self._store = store
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Question index out of range')
+        return self._store.question(index).lower()
+
@@ -0,0 +1,97 @@
+"""
+Quantization - Reduced-Precision Storage of TF-IDF Matrices
+Stores similarity weights as float32 or as uint8 codes with one scale per row
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from typing import Optional, Tuple
+
+
+# Storage precisions of the scoring matrix, from exact to smallest
+PRECISIONS = ('float64', 'float32', 'uint8')
+
+# Largest uint8 code; a row's biggest weight is stored as this value
+UINT8_MAX = 255
+
+
+def storage_dtype(precision: str) -> np.dtype:
+    """Float type used for weights kept unquantized at ``precision``."""
+    return np.dtype(np.float64 if precision == 'float64' else np.float32)
+
+
+def quantize_rows(matrix, precision: str) -> Tuple[object, Optional[np.ndarray]]:
+    """
+    Convert a CSR matrix to ``precision``.
+
+    For 'uint8' every stored weight ``w`` of row ``r`` becomes
+    ``round(w / scales[r])`` with ``scales[r] = max(row r) / 255``; TF-IDF
+    weights are non-negative, so no sign bit is needed and the rounding
+    error of a weight is at most half a step of its own row.
+
+    Args:
+        matrix: CSR matrix with non-negative weights
+        precision: One of ``PRECISIONS``
+
+    Returns:
+        Tuple of (converted CSR matrix, per-row float32 scales or None)
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {list(PRECISIONS)}")
+    if precision != 'uint8':
+        return matrix.astype(storage_dtype(precision)), None
+
+    lengths = np.diff(matrix.indptr)
+    row_max = np.zeros(matrix.shape[0])
+    nonempty = lengths > 0
+    if nonempty.any():
+        row_max[nonempty] = np.maximum.reduceat(matrix.data, matrix.indptr[:-1][nonempty])
+    scales = (row_max / UINT8_MAX).astype(np.float32)
+
+    entry_scales = np.repeat(scales, lengths)
+    quantized = matrix.copy()
+    quantized.data = np.rint(matrix.data / np.where(entry_scales > 0, entry_scales, 1)).astype(np.uint8)
+    return quantized, scales
+
+
+def scale_queries(query_matrix, precision: str, scales: Optional[np.ndarray]):
+    """
+    Prepare query rows for a matrix stored at ``precision``.
+
+    Queries are cast to the matrix's float type so sparse products run in
+    that type instead of converting the matrix. For 'uint8', every query
+    weight of term ``t`` is multiplied by the scale of row ``t`` of the
+    term-major matrix, so ``query @ codes`` equals ``query @ weights``.
+
+    Args:
+        query_matrix: CSR query matrix (n_queries x vocab)
+        precision: Precision of the term-major scoring matrix
+        scales: Its per-row (per-term) scales, for 'uint8'
+
+    Returns:
+        CSR query matrix ready for scoring
+    """
+    dtype = storage_dtype(precision)
+    if precision != 'uint8':
+        return query_matrix if query_matrix.dtype == dtype else query_matrix.astype(dtype)
+    query_matrix = query_matrix.tocsr().astype(dtype)
+    query_matrix.data *= scales[query_matrix.indices]
+    return query_matrix
+
+
+def dequantize_rows(matrix, scales: Optional[np.ndarray]):
+    """
+    Weights of a matrix converted by ``quantize_rows``.
+
+    Args:
+        matrix: CSR matrix returned by ``quantize_rows``
+        scales: Its per-row scales, or None for float matrices
+
+    Returns:
+        The float matrix itself, or for uint8 codes a float32 CSR matrix
+        sharing their index arrays
+    """
+    if scales is None:
+        return matrix
+    data = matrix.data * np.repeat(scales, np.diff(matrix.indptr))
+    return sp.csr_matrix((data, matrix.indices, matrix.indptr), shape=matrix.shape, copy=False)
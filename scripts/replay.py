@@ -0,0 +1,266 @@
+"""
+Query Replay - Regression and Throughput Check of a Candidate Model on Captured Traffic
+Streams a JSONL query log through the batched path and compares top-1 answers against a baseline
+"""
+
+import argparse
+import json
+import sys
+import time
+from contextlib import ExitStack
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+from health_chatbot import HealthChatbot
+from model_artifact import DEFAULT_ARTIFACT_PATH
+from score_statistics import QuantileSketch, iter_log
+
+
+# Fields holding the query text: captured traffic, then conversation history entries
+QUERY_FIELDS = ('user_input', 'query')
+
+# Confidence changes up to this size are rounding, not regressions
+DEFAULT_TOLERANCE = 1e-6
+
+
+def iter_queries(log_path: str) -> Iterator[str]:
+    """
+    Stream the queries of a JSONL log.
+
+    Args:
+        log_path: JSONL file with one ``{"user_input": ...}`` (or
+            ``{"query": ...}``) object per line
+
+    Yields:
+        Query texts in log order
+    """
+    for number, entry in enumerate(iter_log(log_path), 1):
+        for field in QUERY_FIELDS:
+            if field in entry:
+                yield entry[field]
+                break
+        else:
+            raise ValueError(f"Entry {number} of {log_path} has no {' or '.join(QUERY_FIELDS)} field")
+
+
+def _top1(chatbot: HealthChatbot, queries: List[str]) -> List[Tuple[int, float]]:
+    """Answer a chunk through the batched path and keep (question_id, confidence)."""
+    # Same top-n as answer_query, so the replay ranks exactly like serving;
+    # lazy responses skip the explanations and alternatives nobody reads here
+    responses = chatbot.batch_answer(queries, chunk_size=len(queries), record_history=False, lazy=True)
+    return [(r['question_id'], r['confidence']) for r in responses]
+
+
+def _read_stored(stored: Iterator[Dict], queries: List[str], offset: int) -> List[Tuple[int, float]]:
+    """Read the stored baseline answers of a chunk, checking they belong to its queries."""
+    answers = []
+    for number, query in enumerate(queries, offset + 1):
+        entry = next(stored, None)
+        if entry is None:
+            raise ValueError(f"Baseline output ends before entry {number} of the log")
+        if entry.get('query', query) != query or 'question_id' not in entry or 'confidence' not in entry:
+            raise ValueError(f"Baseline output does not match the log at entry {number}")
+        answers.append((entry['question_id'], entry['confidence']))
+    return answers
+
+
+def replay(chatbot: HealthChatbot, log_path: str, baseline: HealthChatbot = None,
+           baseline_output: str = None, diffs_path: str = None, output_path: str = None,
+           chunk_size: int = HealthChatbot.BATCH_CHUNK_SIZE,
+           tolerance: float = DEFAULT_TOLERANCE) -> Dict:
+    """
+    Replay a query log against a candidate model.
+
+    The log is read ``chunk_size`` queries at a time and every chunk is
+    answered with one ``batch_answer`` call; diffs and answers are written
+    as each chunk completes, so memory does not depend on the log size.
+
+    Args:
+        chatbot: Candidate model
+        log_path: JSONL query log, see ``iter_queries``
+        baseline: Baseline model answering the same chunks
+        baseline_output: JSONL file written by an earlier replay's
+            ``output_path``, read alongside the log (ignored with ``baseline``)
+        diffs_path: JSONL file receiving every query whose top-1 question
+            or confidence changed
+        output_path: JSONL file receiving the candidate's answer to every
+            query, usable as ``baseline_output`` of a later replay
+        chunk_size: Queries answered per batch
+        tolerance: Largest confidence change not counted as a diff
+
+    Returns:
+        Dictionary with counts, diff rate, score drift and throughput
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    compared = baseline is not None or baseline_output is not None
+    n = changed_ids = changed_scores = diffs = 0
+    drift_sum = max_drift = 0.0
+    abs_drifts = QuantileSketch()
+    answer_time = baseline_time = 0.0
+
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        queries = iter_queries(log_path)
+        stored = iter_log(baseline_output) if baseline is None and baseline_output else None
+        diff_file = stack.enter_context(open(diffs_path, 'w', encoding='utf-8')) if diffs_path else None
+        output_file = stack.enter_context(open(output_path, 'w', encoding='utf-8')) if output_path else None
+
+        while True:
+            chunk = list(islice(queries, chunk_size))
+            if not chunk:
+                break
+
+            chunk_start = time.perf_counter()
+            candidate = _top1(chatbot, chunk)
+            answer_time += time.perf_counter() - chunk_start
+            if output_file is not None:
+                output_file.writelines(
+                    json.dumps({'query': query, 'question_id': qid, 'confidence': confidence}) + '\n'
+                    for query, (qid, confidence) in zip(chunk, candidate)
+                )
+
+            if baseline is not None:
+                chunk_start = time.perf_counter()
+                reference = _top1(baseline, chunk)
+                baseline_time += time.perf_counter() - chunk_start
+            elif stored is not None:
+                reference = _read_stored(stored, chunk, n)
+            else:
+                n += len(chunk)
+                continue
+
+            candidate_ids, candidate_scores = np.array(candidate, dtype=np.float64).T
+            reference_ids, reference_scores = np.array(reference, dtype=np.float64).T
+            drift = candidate_scores - reference_scores
+            id_changed = candidate_ids != reference_ids
+            score_changed = np.abs(drift) > tolerance
+            changed = id_changed | score_changed
+            changed_ids += int(np.count_nonzero(id_changed))
+            changed_scores += int(np.count_nonzero(score_changed))
+            diffs += int(np.count_nonzero(changed))
+            drift_sum += float(drift.sum())
+            max_drift = max(max_drift, float(np.abs(drift).max()))
+            abs_drifts.add(np.abs(drift))
+
+            if diff_file is not None:
+                diff_file.writelines(
+                    json.dumps({
+                        'entry': n + i + 1,
+                        'query': chunk[i],
+                        'baseline': {'question_id': reference[i][0], 'confidence': reference[i][1]},
+                        'candidate': {'question_id': candidate[i][0], 'confidence': candidate[i][1]},
+                        'drift': float(drift[i]),
+                    }) + '\n'
+                    for i in np.flatnonzero(changed).tolist()
+                )
+            n += len(chunk)
+
+        if stored is not None and next(stored, None) is not None:
+            raise ValueError("Baseline output has more entries than the log")
+    elapsed = time.perf_counter() - start
+
+    report = {
+        'queries': n,
+        'compared': compared,
+        'answer_s': answer_time,
+        'queries_per_s': n / answer_time if answer_time else 0.0,
+        'wall_s': elapsed,
+        'wall_queries_per_s': n / elapsed if elapsed else 0.0,
+    }
+    if compared:
+        report.update({
+            'diffs': diffs,
+            'diff_rate': diffs / n if n else 0.0,
+            'changed_question_ids': changed_ids,
+            'changed_confidences': changed_scores,
+            'tolerance': tolerance,
+            'mean_drift': drift_sum / n if n else 0.0,
+            'p95_abs_drift': abs_drifts.quantile(0.95) if n else 0.0,
+            'max_abs_drift': max_drift,
+        })
+    if baseline is not None:
+        report['baseline_queries_per_s'] = n / baseline_time if baseline_time else 0.0
+    return report
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Replay a JSONL query log against a candidate model')
+    parser.add_argument('log', help='JSONL log with a user_input (or query) field per line')
+    parser.add_argument('--dataset', default='data/health_qa_dataset.json',
+                        help='Source dataset (a missing or stale candidate artifact is rebuilt)')
+    parser.add_argument('--artifact', default=DEFAULT_ARTIFACT_PATH)
+    parser.add_argument('--scorer', choices=sorted(HealthChatbot.SCORERS), default='dense')
+    parser.add_argument('--features', choices=HealthChatbot.FEATURES, default='tfidf')
+    parser.add_argument('--precision', choices=HealthChatbot.PRECISIONS, default='float64')
+    parser.add_argument('--threshold', type=float, default=0.3, help='Confidence threshold of both models')
+    parser.add_argument('--n-probe', type=int,
+                        help='IVF clusters scanned per query, for both models (default: IVFScorer.N_PROBE)')
+    parser.add_argument('--shortlist', type=int,
+                        help='IVF candidates re-scored exactly, for both models (default: IVFScorer.SHORTLIST)')
+    parser.add_argument('--baseline-artifact',
+                        help='Compiled baseline model (must be up to date; never rebuilt)')
+    parser.add_argument('--baseline-features', choices=HealthChatbot.FEATURES,
+                        help='Feature backend of the baseline artifact (default: --features)')
+    parser.add_argument('--baseline-precision', choices=HealthChatbot.PRECISIONS,
+                        help='Storage precision of the baseline artifact (default: --precision)')
+    parser.add_argument('--baseline-scorer', choices=sorted(HealthChatbot.SCORERS),
+                        help='Baseline scorer; alone, compares two scorers on the candidate model')
+    parser.add_argument('--baseline-output', help='Stored baseline answers (a previous --save-output)')
+    parser.add_argument('--diffs', help='Write changed answers to this JSONL file')
+    parser.add_argument('--save-output', help='Write every candidate answer to this JSONL file')
+    parser.add_argument('--report', help='Write the report as JSON to this file')
+    parser.add_argument('--chunk-size', type=int, default=HealthChatbot.BATCH_CHUNK_SIZE)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Largest confidence change not counted as a diff')
+    parser.add_argument('--max-diff-rate', type=float,
+                        help='Exit with status 1 when the diff rate exceeds this fraction')
+    args = parser.parse_args()
+
+    scorer_options = {'ivf': {'n_probe': args.n_probe, 'shortlist': args.shortlist}}
+    chatbot = HealthChatbot.load(args.artifact, dataset_path=args.dataset, confidence_threshold=args.threshold,
+                                 scorer=args.scorer, features=args.features, precision=args.precision,
+                                 scorer_options=scorer_options)
+    baseline = None
+    if args.baseline_artifact:
+        baseline = HealthChatbot.load(args.baseline_artifact, confidence_threshold=args.threshold,
+                                      scorer=args.baseline_scorer or args.scorer,
+                                      features=args.baseline_features or args.features,
+                                      precision=args.baseline_precision or args.precision,
+                                      scorer_options=scorer_options)
+    elif args.baseline_scorer:
+        baseline = chatbot.new_session(scorer=args.baseline_scorer)
+
+    report = replay(chatbot, args.log, baseline, args.baseline_output, args.diffs, args.save_output,
+                    args.chunk_size, args.tolerance)
+
+    print(f"\n🔁 REPLAY: {report['queries']} queries from {args.log}")
+    print("-" * 60)
+    print(f"Throughput: {report['queries_per_s']:.0f} queries/s answering "
+          f"({report['wall_queries_per_s']:.0f} queries/s end to end)")
+    if 'baseline_queries_per_s' in report:
+        print(f"Baseline:   {report['baseline_queries_per_s']:.0f} queries/s answering")
+    if report['compared']:
+        print(f"Diffs:      {report['diffs']} ({report['diff_rate']:.2%}) | "
+              f"question changed: {report['changed_question_ids']} | "
+              f"confidence changed (> {report['tolerance']:g}): {report['changed_confidences']}")
+        print(f"Drift:      mean {report['mean_drift']:+.6f} | p95 |drift| {report['p95_abs_drift']:.6f} | "
+              f"max |drift| {report['max_abs_drift']:.6f}")
+    if args.diffs:
+        print(f"✓ Diffs saved to: {args.diffs}")
+    if args.save_output:
+        print(f"✓ Answers saved to: {args.save_output}")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Report saved to: {args.report}")
+
+    if (args.max_diff_rate is not None and report['compared']
+            and report['diff_rate'] > args.max_diff_rate):
+        print(f"❌ Diff rate {report['diff_rate']:.2%} exceeds {args.max_diff_rate:.2%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
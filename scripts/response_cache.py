@@ -0,0 +1,121 @@
+"""
+Response Cache - Bounded LRU Cache for Chatbot Responses
+Skips vectorization and scoring for frequently repeated queries
+"""
+
+import copy
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+
+def approximate_size(value) -> int:
+    """Estimate the memory footprint of a JSON-like value in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approximate_size(v) for v in value)
+    return size
+
+
+class ResponseCache:
+    """
+    Least-recently-used cache of response dicts.
+
+    Bounded both by entry count and by the approximate bytes held. Cached
+    responses are copied on the way in and out, so callers can modify what
+    they receive without corrupting later hits. All operations take an
+    internal lock, so one cache can be shared between threads.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum approximate size of all cached entries
+        """
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("Cache bounds must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._token = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def validate(self, token: Hashable):
+        """
+        Drop every entry if the model state behind the cache has changed.
+
+        Args:
+            token: Value identifying everything responses depend on
+                (e.g. threshold and dataset version)
+        """
+        with self._lock:
+            if token != self._token:
+                self._clear()
+                self._token = token
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        """Return a copy of the cached response for ``key``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(entry[0])
+
+    def put(self, key: Hashable, response: Dict):
+        """Cache a response, evicting least recently used entries as needed."""
+        if not isinstance(response, dict):
+            # Lazy responses are materialized so hits are plain dicts
+            response = dict(response)
+        size = approximate_size(key) + approximate_size(response)
+        if size > self.max_bytes:
+            return
+
+        entry = (copy.deepcopy(response), size)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = entry
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
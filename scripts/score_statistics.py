@@ -0,0 +1,263 @@
+"""
+Score Statistics - Streaming, Mergeable Analysis of Chatbot Responses
+Aggregates confidence scores, outcomes and categories of any number of responses in constant memory
+"""
+
+import argparse
+import json
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Mapping
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch for values in a bounded range.
+
+    Values are counted on a fixed grid of ``bins`` points spanning
+    ``[low, high]`` (both ends included), so memory does not depend on the
+    number of values and two sketches merge exactly by adding counts, in
+    any order. Quantiles interpolate between order statistics like
+    ``np.quantile``; each value is off by at most half a grid step
+    (5e-6 by default), and values on the grid, such as scores of exactly
+    0 or 1, are exact. Values outside the range are clipped to it.
+    """
+
+    # Grid points over the range: a step of 1e-5 for similarity scores
+    BINS = 100_001
+
+    def __init__(self, bins: int = BINS, low: float = 0.0, high: float = 1.0):
+        """
+        Args:
+            bins: Number of grid points (at least 2)
+            low: Smallest representable value
+            high: Largest representable value
+        """
+        self.bins = bins
+        self.low = low
+        self.high = high
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    @property
+    def step(self) -> float:
+        """Distance between grid points."""
+        return (self.high - self.low) / (self.bins - 1)
+
+    @property
+    def count(self) -> int:
+        """Number of values added."""
+        return int(self.counts.sum())
+
+    def add(self, values: np.ndarray):
+        """Count an array of values."""
+        positions = np.rint((np.clip(values, self.low, self.high) - self.low) / self.step)
+        self.counts += np.bincount(positions.astype(np.intp), minlength=self.bins)
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """Add the counts of a sketch with the same grid; returns self."""
+        if (other.bins, other.low, other.high) != (self.bins, self.low, self.high):
+            raise ValueError("Cannot merge quantile sketches with different grids")
+        self.counts += other.counts
+        return self
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the ``q`` quantile (0 <= q <= 1).
+
+        Returns:
+            Estimated value, or nan if the sketch is empty
+        """
+        cumulative = np.cumsum(self.counts)
+        n = int(cumulative[-1])
+        if n == 0:
+            return float('nan')
+        rank = q * (n - 1)
+        lower, upper = np.searchsorted(cumulative, [np.floor(rank), np.ceil(rank)], side='right')
+        lower_value = self.low + lower * self.step
+        upper_value = self.low + upper * self.step
+        return float(lower_value + (rank - np.floor(rank)) * (upper_value - lower_value))
+
+
+class StreamingStats:
+    """
+    Constant-memory statistics over a stream of chatbot responses.
+
+    Keeps count, running mean and variance (Welford's algorithm, combined
+    per chunk with Chan's parallel formula), min/max, a ``QuantileSketch``
+    for median and p95, success/fallback counts and per-category counts.
+    Aggregates built on separate workers or log files combine with
+    ``merge``, so months of traffic can be summarized in parallel.
+
+    Accepts response dicts (``answer_query`` output) and conversation
+    history entries, whose outcome is stored under ``'response'``.
+    """
+
+    # Responses buffered before a vectorized update
+    CHUNK_SIZE = 65_536
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.successes = 0
+        self.categories = Counter()
+        self.sketch = QuantileSketch()
+
+    def add_batch(self, confidences: Iterable[float], successes: Iterable[bool],
+                  categories: Iterable[str]) -> 'StreamingStats':
+        """
+        Add responses given as columns.
+
+        Args:
+            confidences: Confidence score of every response
+            successes: Whether each response was a successful match
+            categories: Category of every response
+
+        Returns:
+            self
+        """
+        values = np.asarray(confidences, dtype=np.float64)
+        if len(values) == 0:
+            return self
+        batch_mean = float(values.mean())
+        batch_m2 = float(np.square(values - batch_mean).sum())
+        self._combine(len(values), batch_mean, batch_m2)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.successes += int(np.count_nonzero(np.asarray(successes, dtype=bool)))
+        self.categories.update(categories)
+        self.sketch.add(values)
+        return self
+
+    def _combine(self, count: int, mean: float, m2: float):
+        """Fold another partial (count, mean, M2) into the running moments."""
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def update(self, responses: Iterable[Mapping]) -> 'StreamingStats':
+        """
+        Add a stream of responses or history entries, ``CHUNK_SIZE`` at a time.
+
+        Args:
+            responses: Iterable of response dicts or history entries
+                (consumed once; never held in memory as a whole)
+
+        Returns:
+            self
+        """
+        # Only the three needed fields are buffered, never whole responses
+        confidences, successes, categories = [], [], []
+        for entry in responses:
+            response = entry.get('response', entry)
+            confidences.append(response['confidence'])
+            successes.append(response['success'])
+            categories.append(response['category'])
+            if len(confidences) == self.CHUNK_SIZE:
+                self.add_batch(confidences, successes, categories)
+                confidences, successes, categories = [], [], []
+        return self.add_batch(confidences, successes, categories)
+
+    def merge(self, other: 'StreamingStats') -> 'StreamingStats':
+        """Combine another aggregate into this one; returns self."""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self.successes += other.successes
+            self.categories.update(other.categories)
+            self.sketch.merge(other.sketch)
+        return self
+
+    def summary(self) -> Dict:
+        """
+        Return the statistics in the format of ``ChatbotAnalyzer`` analyses.
+
+        Returns:
+            Dictionary of counts, confidence statistics and category counts
+        """
+        n = self.count
+        return {
+            'num_queries': n,
+            'mean_confidence': self.mean if n else 0.0,
+            'median_confidence': self.sketch.quantile(0.5) if n else 0.0,
+            'p95_confidence': self.sketch.quantile(0.95) if n else 0.0,
+            'std_confidence': float(np.sqrt(self.m2 / n)) if n else 0.0,
+            'min_confidence': self.min if n else 0.0,
+            'max_confidence': self.max if n else 0.0,
+            'successful_matches': self.successes,
+            'fallback_responses': n - self.successes,
+            'success_rate': self.successes / n if n else 0.0,
+            'category_counts': dict(self.categories.most_common()),
+        }
+
+
+def iter_log(log_path: str) -> Iterator[Dict]:
+    """Stream the entries of a JSONL conversation log."""
+    with open(log_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def summarize_log(log_path: str) -> StreamingStats:
+    """Aggregate one JSONL conversation log (runs in a worker process)."""
+    return StreamingStats().update(iter_log(log_path))
+
+
+def summarize_logs(log_paths: List[str], workers: int = 1) -> StreamingStats:
+    """
+    Aggregate several JSONL conversation logs, one process per file.
+
+    Args:
+        log_paths: Log files (e.g. one per day)
+        workers: Worker processes; partial aggregates are merged in order
+
+    Returns:
+        Merged StreamingStats
+    """
+    if workers > 1 and len(log_paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(log_paths)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            partials = list(pool.map(summarize_log, log_paths))
+    else:
+        partials = [summarize_log(path) for path in log_paths]
+
+    total = StreamingStats()
+    for partial in partials:
+        total.merge(partial)
+    return total
+
+
+def main():
+    """Summarize conversation logs from the command line."""
+    parser = argparse.ArgumentParser(description='Streaming statistics over JSONL conversation logs')
+    parser.add_argument('logs', nargs='+', help='JSONL conversation logs')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes (one file each)')
+    parser.add_argument('--output', help='Write the summary as JSON to this file')
+    args = parser.parse_args()
+
+    summary = summarize_logs(args.logs, args.workers).summary()
+    print(f"📊 {summary['num_queries']} responses from {len(args.logs)} log(s)")
+    print(f"  • Success Rate: {summary['success_rate']:.1%} "
+          f"({summary['successful_matches']} matched, {summary['fallback_responses']} fallback)")
+    print(f"  • Mean: {summary['mean_confidence']:.2%}  Std Dev: {summary['std_confidence']:.2%}")
+    print(f"  • Median: {summary['median_confidence']:.2%}  p95: {summary['p95_confidence']:.2%}")
+    print(f"  • Min: {summary['min_confidence']:.2%}  Max: {summary['max_confidence']:.2%}")
+    for category, count in list(summary['category_counts'].items())[:10]:
+        print(f"  • {category}: {count}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"✓ Summary saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
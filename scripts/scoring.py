@@ -0,0 +1,114 @@
+"""
+Scoring Helpers - Ranking Utilities for Similarity Scores
+Selects the best matches from score vectors without sorting the whole corpus
+"""
+
+import numpy as np
+from typing import Tuple
+
+
+# Below this many questions a full stable sort beats argpartition
+SMALL_CORPUS_SIZE = 256
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the ``k`` highest scores of a vector or of each row of a matrix.
+
+    Uses ``np.argpartition`` so the cost is linear in the number of
+    questions, then sorts only the ``k`` selected entries. Ties always
+    break towards the lower question index, so the result is the same on
+    every call and for every row layout: it equals
+    ``np.argsort(-scores, kind='stable')[:k]``. The previous full
+    ``np.argsort(scores)[::-1]`` left the order of equal scores to the sort
+    algorithm (mostly higher index first), so matches with equal scores
+    come back in a different order than before. That includes the best
+    match: when several questions tie for the top score, the answer is now
+    the one with the lowest index.
+
+    Args:
+        scores: Score vector (n_questions,) or matrix (n_queries, n_questions)
+        k: Number of matches to keep (clipped to the number of questions)
+
+    Returns:
+        Tuple of (indices, scores) shaped like the input with a last axis of k
+    """
+    scores = np.asarray(scores)
+    matrix = np.atleast_2d(scores)
+    n_rows, n_cols = matrix.shape
+    k = max(0, min(k, n_cols))
+
+    if n_cols <= SMALL_CORPUS_SIZE or k in (0, n_cols):
+        # A stable sort is cheaper than partitioning for small corpora
+        indices = np.argsort(-matrix, axis=1, kind='stable')[:, :k]
+        values = np.take_along_axis(matrix, indices, axis=1)
+    else:
+        candidates = np.argpartition(-matrix, k - 1, axis=1)[:, :k]
+        kth = np.take_along_axis(matrix, candidates, axis=1).min(axis=1)
+
+        # argpartition picks arbitrarily among entries tied with the k-th
+        # score; rebuild those rows so the lowest indices win the tie
+        ambiguous = np.flatnonzero((matrix >= kth[:, None]).sum(axis=1) > k)
+        for row in ambiguous:
+            above = np.flatnonzero(matrix[row] > kth[row])
+            tied = np.flatnonzero(matrix[row] == kth[row])[:k - len(above)]
+            candidates[row] = np.concatenate([above, tied])
+
+        values = np.take_along_axis(matrix, candidates, axis=1)
+        order = np.lexsort((candidates, -values), axis=-1)
+        indices = np.take_along_axis(candidates, order, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+
+    if scores.ndim == 1:
+        return indices[0], values[0]
+    return indices, values
+
+
+class DenseScorer:
+    """
+    Scores every question with one sparse matrix product per batch.
+
+    Used as the default scorer; ``matrix_t`` is the term-major
+    (vocabulary x questions) TF-IDF matrix, so the product of a query batch
+    with it yields the full similarity matrix. Products run in the float
+    type of the queries; for a quantized (integer) matrix only the postings
+    of the batch's terms are converted to it.
+    """
+
+    def __init__(self, matrix_t):
+        """
+        Args:
+            matrix_t: CSR matrix of shape (vocabulary, questions)
+        """
+        self.matrix_t = matrix_t
+        self.quantized = matrix_t.dtype.kind in 'iu'
+
+    def scores(self, query_matrix) -> np.ndarray:
+        """
+        Similarity of every query row with every question.
+
+        Args:
+            query_matrix: L2-normalized sparse query matrix (n_queries x vocab)
+
+        Returns:
+            Dense array of shape (n_queries, n_questions)
+        """
+        if self.quantized:
+            # A mixed-type product would convert the whole matrix per call
+            query_matrix = query_matrix.tocsr()
+            terms = np.unique(query_matrix.indices)
+            return (query_matrix[:, terms] @ self.matrix_t[terms].astype(query_matrix.dtype)).toarray()
+        return (query_matrix @ self.matrix_t).toarray()
+
+    def top_k(self, query_matrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Select the best ``k`` questions for every row of a query matrix.
+
+        Args:
+            query_matrix: L2-normalized sparse query matrix (n_queries x vocab)
+            k: Number of matches per query
+
+        Returns:
+            Tuple of (indices, scores) arrays of shape (n_queries, k)
+        """
+        return top_k(self.scores(query_matrix), k)
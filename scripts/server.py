@@ -0,0 +1,384 @@
+"""
+HTTP Server - Asyncio JSON API for the Health Chatbot
+Serves /answer, /batch, /healthz and /metrics from one shared, read-only model per process
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, List, Tuple
+from health_chatbot import HealthChatbot
+from model_artifact import DEFAULT_ARTIFACT_PATH
+
+
+# Request limits
+MAX_BODY_BYTES = 10 * 1024 * 1024
+MAX_HEADER_LINES = 100
+MAX_BATCH_QUERIES = 10_000
+MAX_TOP_N = 50
+
+
+class HTTPError(Exception):
+    """Error reported to the client as a JSON body with an HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class MicroBatcher:
+    """
+    Groups concurrent /answer requests into batches for the vectorized path.
+
+    A batch is dispatched once ``max_batch_size`` queries are waiting or
+    ``max_wait`` seconds after its first query arrived. While the scoring
+    threads are busy, new requests keep accumulating, so batches grow with
+    load instead of queries being scored one by one.
+    """
+
+    def __init__(self, chatbot: HealthChatbot, executor: ThreadPoolExecutor, workers: int,
+                 max_batch_size: int = 64, max_wait: float = 0.002):
+        """
+        Args:
+            chatbot: Shared chatbot, only ever used read-only
+            executor: Thread pool running the scoring
+            workers: Number of batches allowed to score at the same time
+            max_batch_size: Maximum queries per batch
+            max_wait: Seconds to wait for a batch to fill after its first query
+        """
+        self.chatbot = chatbot
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(workers)
+        self._task = None
+        self.batches = 0
+        self.queries = 0
+
+    def start(self):
+        """Start the batching loop on the running event loop."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Cancel the batching loop."""
+        if self._task is not None:
+            self._task.cancel()
+
+    async def submit(self, query: str, top_n: int) -> Dict:
+        """Queue one query and wait for its response."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, top_n, future))
+        return await future
+
+    async def _run(self):
+        """Collect queued queries into batches and dispatch them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: List[Tuple[str, int, asyncio.Future]]):
+        """Score one batch in the thread pool and resolve its futures."""
+        loop = asyncio.get_running_loop()
+        try:
+            by_top_n = {}
+            for item in batch:
+                by_top_n.setdefault(item[1], []).append(item)
+
+            for top_n, items in by_top_n.items():
+                queries = [query for query, _, _ in items]
+                try:
+                    responses = await loop.run_in_executor(
+                        self.executor, _score, self.chatbot, queries, top_n
+                    )
+                except Exception as e:
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, _, future), response in zip(items, responses):
+                    if not future.done():
+                        future.set_result(response)
+
+            self.batches += 1
+            self.queries += len(batch)
+        finally:
+            self._slots.release()
+
+
+def _score(chatbot: HealthChatbot, queries: List[str], top_n: int) -> List[Dict]:
+    """Answer queries without touching the chatbot's history."""
+    return chatbot.batch_answer(queries, return_top_n=top_n, record_history=False)
+
+
+class ChatbotServer:
+    """
+    Minimal HTTP/1.1 JSON server (keep-alive, Content-Length bodies).
+
+    The chatbot is loaded once and never modified afterwards: handlers only
+    call the history-free batch path over the immutable index, so no locks
+    are needed no matter how many scoring threads run.
+    """
+
+    def __init__(self, chatbot: HealthChatbot, workers: int = 1,
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        """
+        Args:
+            chatbot: Loaded chatbot, shared by every scoring thread
+            workers: Scoring threads
+            max_batch_size: Maximum queries per micro-batch
+            max_wait_ms: Milliseconds a micro-batch waits to fill
+        """
+        self.chatbot = chatbot
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scoring')
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batcher = None
+
+    async def serve(self, host: str, port: int, reuse_port: bool = False):
+        """Serve requests until cancelled."""
+        self.batcher = MicroBatcher(self.chatbot, self.executor, self.workers,
+                                    self.max_batch_size, self.max_wait)
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle_connection, host, port,
+                                            reuse_port=reuse_port)
+        print(f"✓ Serving on http://{host}:{port} (pid {os.getpid()})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+            self.executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Handle requests on one connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._write_response(writer, e.status, {'error': e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                method, path, body, keep_alive = request
+                try:
+                    payload = await self._route(method, path, body)
+                    status = HTTPStatus.OK
+                except HTTPError as e:
+                    status, payload = e.status, {'error': e.message}
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # ValueError: a request or header line exceeded the stream limit
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Parse one request; returns None when the client closed the connection."""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, path, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers")
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length else b''
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' and (version != 'HTTP/1.0' or connection == 'keep-alive')
+        return method.upper(), path.split('?', 1)[0], body, keep_alive
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: HTTPStatus,
+                              payload, keep_alive: bool):
+        """Send a JSON response (or plain text if ``payload`` is a string)."""
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _route(self, method: str, path: str, body: bytes):
+        """Dispatch a request to its endpoint."""
+        if path == '/healthz':
+            self._require_method(method, 'GET')
+            return {
+                'status': 'ok',
+                'pid': os.getpid(),
+                'qa_pairs': len(self.chatbot.qa_pairs),
+                'batches': self.batcher.batches,
+                'batched_queries': self.batcher.queries,
+            }
+
+        if path == '/metrics':
+            self._require_method(method, 'GET')
+            return self.chatbot.prometheus_metrics()
+
+        if path == '/answer':
+            self._require_method(method, 'POST')
+            request = self._parse_json(body)
+            query = request.get('query')
+            if not isinstance(query, str):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "'query' must be a string")
+            return await self.batcher.submit(query, self._parse_top_n(request))
+
+        if path == '/batch':
+            self._require_method(method, 'POST')
+            request = self._parse_json(body)
+            queries = request.get('queries')
+            if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "'queries' must be a list of strings")
+            if len(queries) > MAX_BATCH_QUERIES:
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                f"At most {MAX_BATCH_QUERIES} queries per batch")
+            responses = await asyncio.get_running_loop().run_in_executor(
+                self.executor, _score, self.chatbot, queries, self._parse_top_n(request)
+            )
+            return {'responses': responses}
+
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {path}")
+
+    @staticmethod
+    def _require_method(method: str, expected: str):
+        if method != expected:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"Use {expected}")
+
+    @staticmethod
+    def _parse_json(body: bytes) -> Dict:
+        try:
+            request = json.loads(body)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be valid JSON")
+        if not isinstance(request, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+        return request
+
+    @staticmethod
+    def _parse_top_n(request: Dict) -> int:
+        top_n = request.get('top_n', 3)
+        if not isinstance(top_n, int) or isinstance(top_n, bool) or not 1 <= top_n <= MAX_TOP_N:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"'top_n' must be an integer in 1..{MAX_TOP_N}")
+        return top_n
+
+
+def run_server(args: argparse.Namespace, reuse_port: bool = False):
+    """Load the model and serve in the current process."""
+    chatbot = HealthChatbot.load(args.artifact, dataset_path=args.dataset, scorer=args.scorer,
+                                 features=args.features, precision=args.precision,
+                                 scorer_options={'ivf': {'n_probe': args.n_probe, 'shortlist': args.shortlist}},
+                                 verify_dataset=args.verify_dataset and not reuse_port)
+    if args.instrument:
+        chatbot.enable_instrumentation()
+    server = ChatbotServer(chatbot, workers=args.workers,
+                           max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+    try:
+        asyncio.run(server.serve(args.host, args.port, reuse_port=reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Health Chatbot HTTP Server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--dataset', default='data/health_qa_dataset.json')
+    parser.add_argument('--artifact', default=DEFAULT_ARTIFACT_PATH)
+    parser.add_argument('--scorer', choices=sorted(HealthChatbot.SCORERS), default='dense')
+    parser.add_argument('--n-probe', type=int,
+                        help='IVF clusters scanned per query (ivf scorer; default: IVFScorer.N_PROBE)')
+    parser.add_argument('--shortlist', type=int,
+                        help='IVF candidates re-scored exactly (ivf scorer; default: IVFScorer.SHORTLIST)')
+    parser.add_argument('--features', choices=HealthChatbot.FEATURES, default='tfidf',
+                        help='Feature backend (an artifact built with another backend is rebuilt)')
+    parser.add_argument('--precision', choices=HealthChatbot.PRECISIONS, default='float64',
+                        help='Storage precision of the TF-IDF matrices (float32 halves, uint8 '
+                             'quantizes the scoring weights)')
+    parser.add_argument('--verify-dataset', action='store_true',
+                        help='Hash the dataset on startup even if its size and mtime match the artifact')
+    parser.add_argument('--instrument', action='store_true',
+                        help='Record per-stage latencies, exposed on GET /metrics')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Scoring threads per process (they share the GIL; use --processes '
+                             'for throughput)')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='Server processes sharing the port and the memory-mapped model')
+    parser.add_argument('--max-batch', type=int, default=64,
+                        help='Maximum queries per micro-batch')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                        help='Milliseconds a micro-batch waits to fill')
+
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_server(args)
+        return
+
+    # Compile the artifact once so the workers only memory-map it
+    HealthChatbot.load(args.artifact, dataset_path=args.dataset, features=args.features,
+                       precision=args.precision, verify_dataset=args.verify_dataset)
+    workers = [multiprocessing.Process(target=run_server, args=(args, True))
+               for _ in range(args.processes)]
+    for process in workers:
+        process.start()
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        for process in workers:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Sharded Scorer - Multi-Process Scoring over Shared Memory
+Splits the question matrix row-wise across worker processes and merges their top-k
+"""
+
+import os
+import weakref
+import numpy as np
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Tuple
+from scipy.sparse import csr_matrix
+from scoring import top_k
+
+
+# Question-major matrix attached by each worker process
+_worker_matrix = None
+_worker_buffers = []
+
+
+def _attach_worker(layout: Dict):
+    """Pool initializer: map the shared CSR buffers without copying them."""
+    global _worker_matrix
+    arrays = {}
+    for name, (shm_name, dtype, length) in layout['arrays'].items():
+        shm = SharedMemory(name=shm_name)
+        _worker_buffers.append(shm)
+        array = np.ndarray((length,), dtype=dtype, buffer=shm.buf)
+        array.flags.writeable = False
+        arrays[name] = array
+    _worker_matrix = (arrays['data'], arrays['indices'], arrays['indptr'], layout['n_terms'])
+
+
+def _score_shard(start: int, end: int, query_t, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score questions ``start:end`` against a query batch.
+
+    ``query_t`` is the transposed (vocabulary x queries) CSR query matrix.
+    Each question's row lists its terms in vocabulary order, so every score
+    is accumulated in the same order as the single-process product.
+
+    Returns:
+        Tuple of (global indices, scores) arrays of shape (n_queries, k)
+    """
+    data, indices, indptr, n_terms = _worker_matrix
+    lo, hi = indptr[start], indptr[end]
+    shard = csr_matrix((data[lo:hi], indices[lo:hi], indptr[start:end + 1] - lo),
+                       shape=(end - start, n_terms))
+    shard_indices, scores = top_k((shard @ query_t).T.tocsr().toarray(), k)
+    return shard_indices + start, scores
+
+
+def _release(executor: ProcessPoolExecutor, buffers: List[SharedMemory]):
+    """Stop the workers and free the shared buffers."""
+    executor.shutdown(wait=True, cancel_futures=True)
+    for shm in buffers:
+        shm.close()
+        shm.unlink()
+
+
+class ShardedScorer:
+    """
+    Scores a query batch on several processes at once.
+
+    The re-normalized question-major TF-IDF matrix is copied once into
+    shared memory; every worker maps the same buffers and scores a
+    contiguous block of questions. Each shard returns its own top-k, which
+    already contains every global top-k candidate from that block, so only
+    ``k * shards`` scores per query travel back and are merged.
+
+    Ties break towards the lower question index within and across shards,
+    so indices and scores match ``DenseScorer`` exactly.
+    """
+
+    def __init__(self, matrix_t, shards: int = None):
+        """
+        Args:
+            matrix_t: CSR matrix of shape (vocabulary, questions)
+            shards: Number of shards and worker processes (default: CPU count)
+        """
+        n_terms, n_docs = matrix_t.shape
+        self.n_docs = n_docs
+        self.shards = max(1, min(shards or os.cpu_count() or 1, n_docs or 1))
+
+        bounds = np.linspace(0, n_docs, self.shards + 1).astype(np.intp)
+        self.bounds = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+        # Question-major rows list each question's terms in ascending order
+        matrix = matrix_t.T.tocsr()
+        matrix.sort_indices()
+
+        self._buffers = []
+        layout = {'n_terms': n_terms, 'arrays': {}}
+        for name in ('data', 'indices', 'indptr'):
+            array = getattr(matrix, name)
+            shm = SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+            self._buffers.append(shm)
+            layout['arrays'][name] = (shm.name, array.dtype.str, len(array))
+
+        # Spawned (not forked) workers are safe to start from threaded servers
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.shards,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_attach_worker,
+            initargs=(layout,)
+        )
+        self._finalizer = weakref.finalize(self, _release, self._executor, self._buffers)
+
+    def top_k(self, query_matrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Select the best ``k`` questions for every row of a query matrix.
+
+        Args:
+            query_matrix: L2-normalized sparse query matrix (n_queries x vocab)
+            k: Number of matches per query
+
+        Returns:
+            Tuple of (indices, scores) arrays of shape (n_queries, k)
+        """
+        query_matrix = query_matrix.tocsr()
+        query_matrix.sort_indices()
+        query_t = query_matrix.T.tocsr()
+
+        futures = [self._executor.submit(_score_shard, start, end, query_t, k)
+                   for start, end in self.bounds]
+        parts = [future.result() for future in futures]
+
+        # Candidates are laid out shard by shard, each in index order among
+        # equal scores, so the merge's lowest-position tie-break is also the
+        # lowest question index
+        candidates = np.concatenate([indices for indices, _ in parts], axis=1)
+        positions, scores = top_k(np.concatenate([scores for _, scores in parts], axis=1), k)
+        return np.take_along_axis(candidates, positions, axis=1), scores
+
+    def close(self):
+        """Shut down the worker processes and release shared memory."""
+        self._finalizer()
@@ -0,0 +1,191 @@
+"""
+Text Analyzer - Single-Pass Query Analysis
+Turns each query into tokens and feature columns once, for vectorization, keyword matching and cache keys
+"""
+
+import math
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+import scipy.sparse as sp
+
+
+# Signed 32-bit murmur hash that sklearn maps to a column by its own rule
+_INT32_MIN = -2 ** 31
+
+
+def normalize_rows_l2(matrix):
+    """
+    Scale the rows of a CSR matrix to unit L2 norm, in place.
+
+    Squares are added left to right in stored order, so the result equals
+    sklearn's ``inplace_csr_row_normalize_l2`` bit for bit without loading
+    scikit-learn on the query path. Rows whose norm is zero are unchanged.
+    """
+    data = matrix.data
+    if matrix.shape[0] == 1:
+        # A single query: adding Python floats is cheaper than array calls
+        total = 0.0
+        for square in (data * data).tolist():
+            total += square
+        if total:
+            data /= np.float64(math.sqrt(total))
+        return
+    lengths = np.diff(matrix.indptr)
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    # bincount adds the weights of each row in order, starting from 0.0
+    sums = np.bincount(rows, weights=data * data, minlength=len(lengths))
+    sums[sums == 0] = 1.0
+    data /= np.sqrt(sums)[rows]
+
+
+class AnalyzedQuery(NamedTuple):
+    """One query after analysis."""
+    # Tokens in query order, before stop-word removal and n-grams
+    tokens: List[str]
+    # Feature column of every term occurrence (repeats are counted)
+    term_ids: List[int]
+
+
+class QueryAnalyzer:
+    """
+    Query-side replacement for a fitted vectorizer's ``transform``.
+
+    A query is lowercased and tokenized like the vectorizer's word
+    analyzer, stop words are removed, word n-grams are built and every
+    term is mapped to its feature column (vocabulary lookup, or sklearn's
+    murmur hash for hashed features) in one pass. ``vectorize`` turns
+    analyzed queries into TF-IDF rows equal, bit for bit, to
+    ``vectorizer.transform``, without the input validation sklearn repeats
+    on every call, which dominates the cost of short queries.
+
+    The tokens are kept, so keyword matching and cache keys reuse them
+    instead of splitting the query again. Analyzers hold only picklable
+    state (a compiled pattern, sets, a dict and the IDF array) and can be
+    sent to worker processes. Their ``settings`` are saved with model
+    artifacts, so a loaded model answers 'tfidf' queries without importing
+    scikit-learn.
+    """
+
+    def __init__(self, lowercase: bool, token_pattern: str, stop_words: Optional[Iterable[str]],
+                 ngram_range: Tuple[int, int], idf: np.ndarray,
+                 vocabulary: Dict[str, int] = None, n_features: int = None):
+        """
+        Args:
+            lowercase: Lowercase queries before tokenizing
+            token_pattern: Regular expression matching one token
+            stop_words: Tokens dropped before building n-grams
+            ngram_range: Smallest and largest word n-gram length
+            idf: IDF weight of every feature column
+            vocabulary: Term to column mapping; None for hashed features
+            n_features: Number of hashed columns (ignored with a vocabulary)
+        """
+        self.lowercase = lowercase
+        self.token_pattern = token_pattern
+        self._token_regex = re.compile(token_pattern)
+        self.stop_words = frozenset(stop_words or ())
+        self.ngram_range = tuple(ngram_range)
+        self.idf = idf
+        self.vocabulary = vocabulary
+        self.n_features = len(vocabulary) if vocabulary is not None else n_features
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer, features: str = 'tfidf') -> 'QueryAnalyzer':
+        """
+        Build the analyzer of a fitted vectorizer.
+
+        Args:
+            vectorizer: Fitted TfidfVectorizer or HashingTfidfVectorizer
+            features: 'tfidf' (vocabulary lookup) or 'hashing'
+
+        Returns:
+            QueryAnalyzer producing the vectorizer's features
+        """
+        hashed = features == 'hashing'
+        return cls(vectorizer.lowercase, vectorizer.token_pattern, vectorizer.get_stop_words(),
+                   vectorizer.ngram_range, vectorizer.idf_,
+                   vocabulary=None if hashed else vectorizer.vocabulary_,
+                   n_features=vectorizer.n_features if hashed else None)
+
+    def settings(self) -> Dict:
+        """Tokenization settings in JSON form (saved with model artifacts)."""
+        return {
+            'lowercase': self.lowercase,
+            'token_pattern': self.token_pattern,
+            'stop_words': sorted(self.stop_words),
+            'ngram_range': list(self.ngram_range),
+        }
+
+    @classmethod
+    def from_settings(cls, settings: Dict, idf: np.ndarray, vocabulary: Dict[str, int] = None,
+                      n_features: int = None) -> 'QueryAnalyzer':
+        """
+        Rebuild an analyzer from its ``settings`` and fitted weights.
+
+        Args:
+            settings: Output of ``settings``
+            idf: IDF weight of every feature column
+            vocabulary: Term to column mapping; None for hashed features
+            n_features: Number of hashed columns (ignored with a vocabulary)
+
+        Returns:
+            QueryAnalyzer equal to the one the settings were taken from
+        """
+        return cls(settings['lowercase'], settings['token_pattern'], settings['stop_words'],
+                   settings['ngram_range'], idf, vocabulary=vocabulary, n_features=n_features)
+
+    def terms(self, tokens: List[str]) -> List[str]:
+        """
+        Turn tokens into the terms of a word analyzer (stop words removed, then n-grams).
+
+        Produces the same terms, in the same order, as the word analyzer of
+        sklearn's vectorizers.
+        """
+        stop_words = self.stop_words
+        if stop_words:
+            tokens = [t for t in tokens if t not in stop_words]
+        min_n, max_n = self.ngram_range
+        terms = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            terms.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def _column(self, h: int) -> int:
+        """Column of a term's signed murmur hash, as computed by sklearn's FeatureHasher."""
+        if h == _INT32_MIN:
+            return (2 ** 31 - 1 - (self.n_features - 1)) % self.n_features
+        return abs(h) % self.n_features
+
+    def analyze(self, query: str) -> AnalyzedQuery:
+        """Tokenize ``query`` and map its terms to feature columns."""
+        tokens = self._token_regex.findall(query.lower() if self.lowercase else query)
+        terms = self.terms(tokens)
+        vocabulary = self.vocabulary
+        if vocabulary is None:
+            # Hashed features are fitted with scikit-learn, so it is loaded anyway
+            from sklearn.utils import murmurhash3_32
+            term_ids = [self._column(murmurhash3_32(term, seed=0)) for term in terms]
+        else:
+            term_ids = [j for j in map(vocabulary.get, terms) if j is not None]
+        return AnalyzedQuery(tokens, term_ids)
+
+    def vectorize(self, analyzed: List[AnalyzedQuery]):
+        """
+        Build L2-normalized TF-IDF rows from analyzed queries.
+
+        Args:
+            analyzed: Output of ``analyze`` for every query
+
+        Returns:
+            CSR matrix of shape (n_queries, n_features), equal to the
+            vectorizer's ``transform`` of the same queries
+        """
+        indptr = np.zeros(len(analyzed) + 1, dtype=np.int32)
+        np.cumsum([len(a.term_ids) for a in analyzed], out=indptr[1:])
+        indices = np.fromiter((j for a in analyzed for j in a.term_ids), dtype=np.int32, count=indptr[-1])
+        matrix = sp.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(analyzed), self.n_features))
+        # Adds up repeated terms and sorts columns, as sklearn's counting does
+        matrix.sum_duplicates()
+        matrix.data *= self.idf[matrix.indices]
+        normalize_rows_l2(matrix)
+        return matrix
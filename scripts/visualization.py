@@ -3,25 +3,121 @@ Visualization and Analysis of Chatbot Performance
 Generates histograms and statistical analysis of similarity scores
 """
 
+import argparse
 import json
+import time
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
+from typing import Dict, List, Tuple
 from health_chatbot import HealthChatbot
+from model_artifact import DEFAULT_ARTIFACT_PATH
+from score_statistics import StreamingStats
+
+
+# Response fields kept per evaluated query (one column each)
+RESULT_FIELDS = ('success', 'confidence', 'question_id', 'category', 'answer', 'matched_question')
+
+# Figure formats; 'none' skips the plot and only the JSON analysis is written
+PLOT_FORMATS = ('png', 'svg', 'pdf', 'none')
+DEFAULT_DPI = 300
+# Resolution of the fast rendering mode
+FAST_DPI = 100
+# Most markers drawn on the cumulative distribution; the line keeps every
+# point, except in the fast mode, which samples it down to this many too
+MAX_MARKERS = 500
+
+# Axes style of seaborn's "whitegrid" theme, applied without importing seaborn
+WHITEGRID_STYLE = {
+    'figure.facecolor': 'white',
+    'axes.facecolor': 'white',
+    'axes.edgecolor': '.8',
+    'axes.grid': True,
+    'axes.axisbelow': True,
+    'axes.labelcolor': '.15',
+    'axes.spines.left': True,
+    'axes.spines.bottom': True,
+    'axes.spines.right': True,
+    'axes.spines.top': True,
+    'grid.color': '.8',
+    'grid.linestyle': '-',
+    'text.color': '.15',
+    'xtick.color': '.15',
+    'ytick.color': '.15',
+    'xtick.direction': 'out',
+    'ytick.direction': 'out',
+    'xtick.bottom': False,
+    'xtick.top': False,
+    'ytick.left': False,
+    'ytick.right': False,
+    'font.family': ['sans-serif'],
+    'font.sans-serif': ['Arial', 'DejaVu Sans', 'Liberation Sans', 'Bitstream Vera Sans', 'sans-serif'],
+    'lines.solid_capstyle': 'round',
+    'patch.edgecolor': 'w',
+    'patch.force_edgecolor': True,
+}
+
+
+def _load_pyplot():
+    """Import pyplot on first use, on the non-interactive Agg backend."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def evaluate_queries(chatbot: HealthChatbot, queries: List[str]) -> Dict[str, list]:
+    """
+    Answer queries in vectorized batches and keep the fields analysis needs.
+
+    Responses are built lazily (explanations and alternatives are never
+    read) and not recorded in the chatbot's history.
+
+    Args:
+        chatbot: Chatbot session to evaluate
+        queries: Queries to answer
+
+    Returns:
+        Dictionary mapping each of ``RESULT_FIELDS`` to one value per query
+    """
+    responses = chatbot.batch_answer(queries, record_history=False, lazy=True)
+    return {field: [r[field] for r in responses] for field in RESULT_FIELDS}
 
 
 class ChatbotAnalyzer:
-    """Analyze and visualize chatbot performance metrics."""
-    
-    def __init__(self, dataset_path: str):
+    """
+    Analyze and visualize chatbot performance metrics.
+
+    Test queries are scored once by ``analyze_test_queries``; the returned
+    results feed both the plots and the query/response JSON. The seconds
+    spent scoring and rendering are kept apart in ``timings``.
+    """
+
+    def __init__(self, dataset_path: str, artifact_path: str = DEFAULT_ARTIFACT_PATH):
         """Initialize analyzer with chatbot."""
-        self.chatbot = HealthChatbot(
+        self.chatbot = HealthChatbot.load(
+            artifact_path,
             dataset_path=dataset_path,
             confidence_threshold=0.3
         )
+        self.timings = {'analysis': 0.0, 'render': 0.0}
     
-    def analyze_test_queries(self, test_queries: list) -> dict:
+    def evaluate(self, test_queries: List[str]) -> Dict[str, list]:
+        """
+        Score every test query once.
+
+        Queries are answered in this process: a query costs about as much
+        to score as its answer costs to send back from a worker process, so
+        a process pool is slower than this single batched pass.
+
+        Args:
+            test_queries: Queries to answer
+
+        Returns:
+            Result columns (``query`` plus ``RESULT_FIELDS``), in query order
+        """
+        return {'query': list(test_queries), **evaluate_queries(self.chatbot, test_queries)}
+
+    def analyze_test_queries(self, test_queries: list) -> Tuple[Dict, Dict[str, list]]:
         """
         Analyze similarity scores for test queries.
         
@@ -29,105 +125,83 @@ class ChatbotAnalyzer:
             test_queries: List of test queries
             
         Returns:
-            Dictionary with analysis results
+            Tuple of (statistics dict, result columns from ``evaluate``)
         """
-        scores = []
-        responses = []
-        
         print("\n🔍 Analyzing test queries...")
+        start = time.perf_counter()
         
-        for query in test_queries:
-            response = self.chatbot.answer_query(query)
-            responses.append(response)
-            scores.append(response['confidence'])
-        
-        # Calculate statistics
-        analysis = {
-            'num_queries': len(test_queries),
-            'scores': scores,
-            'mean_confidence': float(np.mean(scores)),
-            'median_confidence': float(np.median(scores)),
-            'std_confidence': float(np.std(scores)),
-            'min_confidence': float(np.min(scores)),
-            'max_confidence': float(np.max(scores)),
-            'successful_matches': sum(1 for r in responses if r['success']),
-            'fallback_responses': sum(1 for r in responses if not r['success']),
-            'success_rate': sum(1 for r in responses if r['success']) / len(responses)
-        }
+        results = self.evaluate(test_queries)
+        
+        # Calculate statistics with the same streaming aggregator used for
+        # conversation logs; the scores are kept for the plots
+        stats = StreamingStats().add_batch(results['confidence'], results['success'], results['category'])
+        analysis = {'num_queries': len(test_queries), 'scores': list(map(float, results['confidence']))}
+        analysis.update(stats.summary())
+        self.timings['analysis'] = time.perf_counter() - start
         
-        return analysis, responses
+        return analysis, results
     
-    def generate_visualizations(self, test_queries: list, output_dir: str = 'outputs'):
-        """Generate visualizations for chatbot performance."""
+    def generate_visualizations(self, test_queries: list, output_dir: str = 'outputs',
+                                evaluation: Tuple[Dict, Dict[str, list]] = None,
+                                image_format: str = 'png', dpi: int = None, fast: bool = False):
+        """
+        Generate visualizations for chatbot performance.
         
-        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        Args:
+            test_queries: List of test queries
+            output_dir: Directory receiving the figure
+            evaluation: Output of ``analyze_test_queries`` for ``test_queries``
+                (computed when omitted)
+            image_format: One of ``PLOT_FORMATS``; 'none' skips the plot
+            dpi: Figure resolution (default: ``DEFAULT_DPI``, or ``FAST_DPI`` when fast)
+            fast: Fast rendering mode: lower default resolution, a
+                cumulative distribution of at most ``MAX_MARKERS`` points,
+                one marker per distinct box plot outlier and no tight
+                bounding-box pass when saving
+            
+        Returns:
+            Tuple of (statistics dict, result columns)
+        """
+        if image_format not in PLOT_FORMATS:
+            raise ValueError(f"Unknown plot format '{image_format}', expected one of {list(PLOT_FORMATS)}")
         
         # Analyze queries
-        analysis, responses = self.analyze_test_queries(test_queries)
-        scores = analysis['scores']
-        
-        # Set style
-        sns.set_style("whitegrid")
-        plt.rcParams['figure.figsize'] = (14, 12)
-        
-        # Create figure with subplots
-        fig = plt.figure(figsize=(16, 14))
-        
-        # 1. Histogram of similarity scores
-        ax1 = plt.subplot(2, 3, 1)
-        n, bins, patches = ax1.hist(scores, bins=15, color='steelblue', alpha=0.7, edgecolor='black')
-        ax1.axvline(analysis['mean_confidence'], color='red', linestyle='--', linewidth=2, label=f"Mean: {analysis['mean_confidence']:.2%}")
-        ax1.axvline(self.chatbot.confidence_threshold, color='orange', linestyle='--', linewidth=2, label=f"Threshold: {self.chatbot.confidence_threshold:.2%}")
-        ax1.set_xlabel('Similarity Score', fontsize=11, fontweight='bold')
-        ax1.set_ylabel('Frequency', fontsize=11, fontweight='bold')
-        ax1.set_title('Distribution of Similarity Scores', fontsize=12, fontweight='bold')
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-        
-        # Color bars
-        for i in range(len(patches)):
-            if bins[i] >= self.chatbot.confidence_threshold:
-                patches[i].set_facecolor('green')
-                patches[i].set_alpha(0.6)
-            else:
-                patches[i].set_facecolor('red')
-                patches[i].set_alpha(0.4)
-        
-        # 2. Box plot
-        ax2 = plt.subplot(2, 3, 2)
-        bp = ax2.boxplot(scores, vert=True, patch_artist=True, widths=0.5)
-        bp['boxes'][0].set_facecolor('lightblue')
-        ax2.set_ylabel('Similarity Score', fontsize=11, fontweight='bold')
-        ax2.set_title('Similarity Score Distribution (Box Plot)', fontsize=12, fontweight='bold')
-        ax2.grid(True, alpha=0.3, axis='y')
-        ax2.set_xticklabels(['Scores'])
-        
-        # 3. Success vs Fallback Pie Chart
-        ax3 = plt.subplot(2, 3, 3)
-        sizes = [analysis['successful_matches'], analysis['fallback_responses']]
-        colors = ['#2ecc71', '#e74c3c']
-        labels = [f"Successful\n({analysis['successful_matches']})", 
-                 f"Fallback\n({analysis['fallback_responses']})"]
-        wedges, texts, autotexts = ax3.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
-                                            startangle=90, textprops={'fontsize': 10, 'fontweight': 'bold'})
-        ax3.set_title('Match Success Rate', fontsize=12, fontweight='bold')
-        
-        # 4. Cumulative distribution
-        ax4 = plt.subplot(2, 3, 4)
-        sorted_scores = np.sort(scores)
-        cumulative = np.arange(1, len(sorted_scores) + 1) / len(sorted_scores)
-        ax4.plot(sorted_scores, cumulative, marker='o', linestyle='-', linewidth=2, markersize=6, color='darkblue')
-        ax4.axvline(self.chatbot.confidence_threshold, color='orange', linestyle='--', linewidth=2)
-        ax4.fill_between(sorted_scores, cumulative, alpha=0.3)
-        ax4.set_xlabel('Similarity Score', fontsize=11, fontweight='bold')
-        ax4.set_ylabel('Cumulative Probability', fontsize=11, fontweight='bold')
-        ax4.set_title('Cumulative Distribution of Scores', fontsize=12, fontweight='bold')
-        ax4.grid(True, alpha=0.3)
-        
-        # 5. Statistics text
-        ax5 = plt.subplot(2, 3, 5)
-        ax5.axis('off')
+        analysis, results = evaluation or self.analyze_test_queries(test_queries)
+        
+        if image_format == 'none':
+            self.timings['render'] = 0.0
+            print("✓ Visualization skipped (JSON-only analysis)")
+            return analysis, results
         
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        output_path = Path(output_dir) / f'similarity_scores_analysis.{image_format}'
+        
+        start = time.perf_counter()
+        self._render_figure(analysis, results, output_path,
+                            dpi=dpi or (FAST_DPI if fast else DEFAULT_DPI), tight=not fast,
+                            max_points=MAX_MARKERS if fast else None)
+        self.timings['render'] = time.perf_counter() - start
+        print(f"✓ Visualization saved to: {output_path} (rendered in {self.timings['render']:.2f}s)")
+        
+        return analysis, results
+    
+    def _render_figure(self, analysis: Dict, results: Dict[str, list], output_path: Path,
+                       dpi: int, tight: bool = True, max_points: int = None):
+        """
+        Draw the six-panel performance figure and save it.
+        
+        The histogram is binned with NumPy and the scores are passed as an
+        array, so rendering cost stays flat for large query sets. With
+        ``max_points``, the cumulative distribution is drawn through that
+        many evenly spaced ranks (first and last included) instead of every
+        score, and each distinct box plot outlier is drawn once, which
+        bounds the size of vector output for large query sets.
+        """
+        plt = _load_pyplot()
+        scores = np.asarray(analysis['scores'], dtype=np.float64)
+        threshold = self.chatbot.confidence_threshold
+        
+        # Statistics panel text
         stats_text = f"""
         📊 SIMILARITY SCORE STATISTICS
         
@@ -146,39 +220,115 @@ class ChatbotAnalyzer:
         • Fallback Responses: {analysis['fallback_responses']}
         • Success Rate: {analysis['success_rate']:.1%}
         
-        Threshold: {self.chatbot.confidence_threshold:.2%}
+        Threshold: {threshold:.2%}
         """
         
-        ax5.text(0.1, 0.5, stats_text, fontsize=11, verticalalignment='center',
-                fontfamily='monospace', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
-        
-        # 6. Category distribution
-        ax6 = plt.subplot(2, 3, 6)
-        categories = [r['category'] for r in responses if r['success']]
-        if categories:
-            unique_cats, counts = np.unique(categories, return_counts=True)
-            sorted_idx = np.argsort(counts)[::-1]
-            ax6.barh(unique_cats[sorted_idx], counts[sorted_idx], color='teal', alpha=0.7, edgecolor='black')
-            ax6.set_xlabel('Number of Matches', fontsize=11, fontweight='bold')
-            ax6.set_title('Answer Category Distribution', fontsize=12, fontweight='bold')
-            ax6.grid(True, alpha=0.3, axis='x')
-        
-        plt.suptitle('🏥 Health Chatbot Performance Analysis', fontsize=14, fontweight='bold', y=0.995)
-        plt.tight_layout()
-        
-        # Save figure
-        output_path = Path(output_dir) / 'similarity_scores_analysis.png'
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        print(f"✓ Visualization saved to: {output_path}")
-        
-        plt.close()
-        
-        return analysis, responses
+        with plt.rc_context(WHITEGRID_STYLE):
+            # Create figure with subplots
+            fig = plt.figure(figsize=(16, 14))
+            
+            # 1. Histogram of similarity scores
+            ax1 = plt.subplot(2, 3, 1)
+            counts, bins = np.histogram(scores, bins=15)
+            n, bins, patches = ax1.hist(bins[:-1], bins=bins, weights=counts,
+                                        color='steelblue', alpha=0.7, edgecolor='black')
+            ax1.axvline(analysis['mean_confidence'], color='red', linestyle='--', linewidth=2, label=f"Mean: {analysis['mean_confidence']:.2%}")
+            ax1.axvline(threshold, color='orange', linestyle='--', linewidth=2, label=f"Threshold: {threshold:.2%}")
+            ax1.set_xlabel('Similarity Score', fontsize=11, fontweight='bold')
+            ax1.set_ylabel('Frequency', fontsize=11, fontweight='bold')
+            ax1.set_title('Distribution of Similarity Scores', fontsize=12, fontweight='bold')
+            ax1.legend()
+            ax1.grid(True, alpha=0.3)
+            
+            # Color bars
+            for i in range(len(patches)):
+                if bins[i] >= threshold:
+                    patches[i].set_facecolor('green')
+                    patches[i].set_alpha(0.6)
+                else:
+                    patches[i].set_facecolor('red')
+                    patches[i].set_alpha(0.4)
+            
+            # 2. Box plot
+            ax2 = plt.subplot(2, 3, 2)
+            bp = ax2.boxplot(scores, vert=True, patch_artist=True, widths=0.5)
+            bp['boxes'][0].set_facecolor('lightblue')
+            if max_points:
+                # Repeated outliers overlap exactly; keep one marker per value
+                outliers = np.unique(bp['fliers'][0].get_ydata())
+                bp['fliers'][0].set_data(np.ones_like(outliers), outliers)
+            ax2.set_ylabel('Similarity Score', fontsize=11, fontweight='bold')
+            ax2.set_title('Similarity Score Distribution (Box Plot)', fontsize=12, fontweight='bold')
+            ax2.grid(True, alpha=0.3, axis='y')
+            ax2.set_xticklabels(['Scores'])
+            
+            # 3. Success vs Fallback Pie Chart
+            ax3 = plt.subplot(2, 3, 3)
+            sizes = [analysis['successful_matches'], analysis['fallback_responses']]
+            colors = ['#2ecc71', '#e74c3c']
+            labels = [f"Successful\n({analysis['successful_matches']})", 
+                     f"Fallback\n({analysis['fallback_responses']})"]
+            wedges, texts, autotexts = ax3.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
+                                                startangle=90, textprops={'fontsize': 10, 'fontweight': 'bold'})
+            ax3.set_title('Match Success Rate', fontsize=12, fontweight='bold')
+            
+            # 4. Cumulative distribution (markers thinned out for large sets)
+            ax4 = plt.subplot(2, 3, 4)
+            sorted_scores = np.sort(scores)
+            cumulative = np.arange(1, len(sorted_scores) + 1) / len(sorted_scores)
+            if max_points and len(sorted_scores) > max_points:
+                ranks = np.unique(np.linspace(0, len(sorted_scores) - 1, max_points).round().astype(int))
+                sorted_scores, cumulative = sorted_scores[ranks], cumulative[ranks]
+            ax4.plot(sorted_scores, cumulative, marker='o', linestyle='-', linewidth=2, markersize=6, color='darkblue',
+                     markevery=max(1, len(sorted_scores) // MAX_MARKERS))
+            ax4.axvline(threshold, color='orange', linestyle='--', linewidth=2)
+            ax4.fill_between(sorted_scores, cumulative, alpha=0.3)
+            ax4.set_xlabel('Similarity Score', fontsize=11, fontweight='bold')
+            ax4.set_ylabel('Cumulative Probability', fontsize=11, fontweight='bold')
+            ax4.set_title('Cumulative Distribution of Scores', fontsize=12, fontweight='bold')
+            ax4.grid(True, alpha=0.3)
+            
+            # 5. Statistics text
+            ax5 = plt.subplot(2, 3, 5)
+            ax5.axis('off')
+            ax5.text(0.1, 0.5, stats_text, fontsize=11, verticalalignment='center',
+                    fontfamily='monospace', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
+            
+            # 6. Category distribution
+            ax6 = plt.subplot(2, 3, 6)
+            categories = [c for c, success in zip(results['category'], results['success']) if success]
+            if categories:
+                unique_cats, counts = np.unique(categories, return_counts=True)
+                sorted_idx = np.argsort(counts)[::-1]
+                ax6.barh(unique_cats[sorted_idx], counts[sorted_idx], color='teal', alpha=0.7, edgecolor='black')
+                ax6.set_xlabel('Number of Matches', fontsize=11, fontweight='bold')
+                ax6.set_title('Answer Category Distribution', fontsize=12, fontweight='bold')
+                ax6.grid(True, alpha=0.3, axis='x')
+            
+            plt.suptitle('🏥 Health Chatbot Performance Analysis', fontsize=14, fontweight='bold', y=0.995)
+            plt.tight_layout()
+            
+            # Save figure
+            plt.savefig(output_path, dpi=dpi, bbox_inches='tight' if tight else None)
+            plt.close(fig)
     
-    def generate_query_response_analysis(self, test_queries: list, output_dir: str = 'outputs'):
-        """Generate detailed analysis of queries and responses."""
+    def generate_query_response_analysis(self, test_queries: list, output_dir: str = 'outputs',
+                                         evaluation: Tuple[Dict, Dict[str, list]] = None):
+        """
+        Generate detailed analysis of queries and responses.
+        
+        Args:
+            test_queries: List of test queries
+            output_dir: Directory receiving the JSON file
+            evaluation: Output of ``analyze_test_queries`` for ``test_queries``
+                (computed when omitted)
+            
+        Returns:
+            The analysis written to ``query_response_analysis.json``
+        """
         
         Path(output_dir).mkdir(parents=True, exist_ok=True)
+        _, results = evaluation or self.analyze_test_queries(test_queries)
         
         analysis_data = {
             'metadata': {
@@ -191,18 +341,18 @@ class ChatbotAnalyzer:
         
         print("\n📋 Generating detailed query analysis...")
         
-        for i, query in enumerate(test_queries, 1):
-            response = self.chatbot.answer_query(query)
-            
+        rows = zip(results['query'], results['answer'], results['confidence'], results['category'],
+                   results['success'], results['matched_question'])
+        for i, (query, answer, confidence, category, success, matched_question) in enumerate(rows, 1):
             analysis_data['query_analysis'].append({
                 'query_id': i,
                 'query_text': query,
-                'answer': response['answer'][:150] + '...' if len(response['answer']) > 150 else response['answer'],
-                'confidence': response['confidence'],
-                'confidence_percentage': f"{response['confidence']:.1%}",
-                'category': response['category'],
-                'is_successful': response['success'],
-                'matched_question': response.get('matched_question', 'N/A')
+                'answer': answer[:150] + '...' if len(answer) > 150 else answer,
+                'confidence': confidence,
+                'confidence_percentage': f"{confidence:.1%}",
+                'category': category,
+                'is_successful': success,
+                'matched_question': matched_question
             })
         
         # Save analysis
@@ -215,8 +365,17 @@ class ChatbotAnalyzer:
         return analysis_data
 
 
-def generate_comprehensive_analysis():
-    """Generate comprehensive analysis with visualization."""
+def generate_comprehensive_analysis(output_dir: str = 'outputs', image_format: str = 'png',
+                                    dpi: int = None, fast: bool = False):
+    """
+    Generate comprehensive analysis with visualization.
+    
+    Args:
+        output_dir: Directory receiving the figure and the JSON analysis
+        image_format: Figure format (see ``PLOT_FORMATS``); 'none' writes JSON only
+        dpi: Figure resolution (see ``ChatbotAnalyzer.generate_visualizations``)
+        fast: Use the fast rendering mode
+    """
     
     # Initialize analyzer
     analyzer = ChatbotAnalyzer(dataset_path='data/health_qa_dataset.json')
@@ -279,10 +438,13 @@ def generate_comprehensive_analysis():
     print("🏥 HEALTH CHATBOT - COMPREHENSIVE ANALYSIS")
     print("="*80)
     
-    analysis, responses = analyzer.generate_visualizations(test_queries)
+    # Score the queries once; the plots and the JSON share the results
+    evaluation = analyzer.analyze_test_queries(test_queries)
+    analysis, results = analyzer.generate_visualizations(test_queries, output_dir, evaluation=evaluation,
+                                                         image_format=image_format, dpi=dpi, fast=fast)
     
     # Generate query-response analysis
-    qa_analysis = analyzer.generate_query_response_analysis(test_queries)
+    qa_analysis = analyzer.generate_query_response_analysis(test_queries, output_dir, evaluation=evaluation)
     
     # Print summary
     print("\n" + "="*80)
@@ -297,13 +459,29 @@ def generate_comprehensive_analysis():
     print(f"  • Std Dev: {analysis['std_confidence']:.2%}")
     print(f"  • Min: {analysis['min_confidence']:.2%}")
     print(f"  • Max: {analysis['max_confidence']:.2%}")
+    print(f"\nTiming:")
+    print(f"  • Analysis: {analyzer.timings['analysis']:.2f}s")
+    print(f"  • Render: {analyzer.timings['render']:.2f}s")
     
     print("\n" + "="*80)
-    print("✓ Analysis complete! Check outputs/ directory for visualizations.")
+    print(f"✓ Analysis complete! Check {output_dir}/ directory for visualizations.")
     print("="*80 + "\n")
     
-    return analysis, responses, qa_analysis
+    return analysis, results, qa_analysis
+
+
+def main():
+    """Run the comprehensive analysis from the command line."""
+    parser = argparse.ArgumentParser(description='Health chatbot performance analysis')
+    parser.add_argument('--output-dir', default='outputs', help='Directory for the figure and JSON files')
+    parser.add_argument('--format', dest='image_format', choices=PLOT_FORMATS, default='png',
+                        help="Figure format ('none' writes the JSON analysis only)")
+    parser.add_argument('--dpi', type=int, help=f'Figure resolution (default: {DEFAULT_DPI}, {FAST_DPI} with --fast)')
+    parser.add_argument('--fast', action='store_true', help='Fast rendering mode')
+    args = parser.parse_args()
+
+    generate_comprehensive_analysis(args.output_dir, args.image_format, args.dpi, args.fast)
 
 
 if __name__ == "__main__":
-    generate_comprehensive_analysis()
+    main()